@@ -1,3 +1,4 @@
 #!/bin/bash
 
 protoc --proto_path=protocol --python_out=src/proto/ protocol/protocol.proto
+sha1sum protocol/protocol.proto | cut -d' ' -f1 > src/proto/protocol.proto.sha1
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+ARRAY decoding benchmark: unwraps INT, FLOAT, VECTOR3 and mixed arrays of
+several sizes with the old recursive decoder and the current typed one,
+reporting decodes/s and the objects each decoded value keeps alive.
+
+Run from the src directory:
+    python -m bench.arrays --sizes 10,100,1000
+"""
+
+import gc
+import time
+from optparse import OptionParser
+
+from proto import protocol_pb2 as ghack_pb2
+from client import messages
+from game.objects import Vector
+
+def legacy_unwrap_state(state):
+    """The recursive decoder, one Python object per item, kept for comparison"""
+    if state.type == ghack_pb2.StateValue.ARRAY:
+        return [legacy_unwrap_state(s) for s in state.array_val]
+    val = getattr(state, messages.STATE_TYPES[state.type])
+    if state.type in messages.STATE_MAPPERS:
+        return messages.STATE_MAPPERS[state.type](val)
+    return val
+
+KINDS = {
+        'int': lambda i: i * 7,
+        'float': lambda i: i * 0.5,
+        'vector3': lambda i: Vector(i, i + 1, 0),
+        'mixed': lambda i: (i, i * 0.5, Vector(i, i, i))[i % 3],
+    }
+
+def array_value(kind, size):
+    return messages.wrap_state([KINDS[kind](i) for i in xrange(size)])
+
+def kept_objects(decode, value):
+    """Objects the decoded value holds on to, counted by the collector"""
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.get_count()[0]
+        result = decode(value)
+        kept = gc.get_count()[0] - before
+    finally:
+        gc.enable()
+    del result
+    return kept
+
+def rate(decode, value, min_time, repeat=5):
+    """Decodes per second, the best of repeat runs of at least min_time"""
+    n = 1
+    while True:
+        start = time.time()
+        for i in xrange(n):
+            decode(value)
+        elapsed = time.time() - start
+        if elapsed >= min_time:
+            break
+        n *= 2
+    best = elapsed
+    for i in xrange(repeat - 1):
+        start = time.time()
+        for i in xrange(n):
+            decode(value)
+        best = min(best, time.time() - start)
+    return n / best
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--sizes', default='10,100,1000',
+            help='Array lengths to decode')
+    parser.add_option('--min-time', type='float', default=0.2,
+            help='Seconds each measurement runs for at least')
+    parser.add_option('--repeat', type='int', default=5,
+            help='Runs per measurement; the fastest is reported')
+    options, args = parser.parse_args()
+
+    print "%-8s %6s %14s %14s %8s %11s %11s" % ('kind', 'size',
+            'before/s', 'after/s', 'speedup', 'kept before', 'kept after')
+    for kind in ('int', 'float', 'vector3', 'mixed'):
+        for size in [int(s) for s in options.sizes.split(',')]:
+            value = array_value(kind, size)
+            before = rate(legacy_unwrap_state, value, options.min_time,
+                    options.repeat)
+            after = rate(messages.unwrap_state, value, options.min_time,
+                    options.repeat)
+            print "%-8s %6d %14.0f %14.0f %7.2fx %11d %11d" % (kind, size,
+                    before, after, after / before,
+                    kept_objects(legacy_unwrap_state, value),
+                    kept_objects(messages.unwrap_state, value))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Stream compression benchmark: compresses the stand-in world's traffic one
+tick per flush, as the server sends it, at several zlib levels, reporting
+the compression ratio, how fast each side runs and the CPU it costs per
+megabyte of game traffic.
+
+Run from the src directory:
+    python -m bench.compression --entities 1000 --ticks 200
+    python -m bench.compression --capture session.cap
+
+A capture does not record where the server's flushes were, so each
+recorded read counts as one flush. It must come from an uncompressed
+session.
+"""
+
+import time
+from optparse import OptionParser
+
+from client import framing, compression
+from server.standin import World, parse_rates
+
+def world_flushes(framing_name, ticks, **world_options):
+    """The bytes of each flush: the snapshot, then one per tick"""
+    world = World(**world_options)
+    writer = framing.FrameWriter(framing=framing_name)
+    flushes = []
+    for msg_bytes in world.snapshot_frames():
+        writer.append(msg_bytes)
+    flushes.append(writer.take())
+    for i in xrange(ticks):
+        for msg in world.tick():
+            writer.append(msg.SerializeToString())
+        flushes.append(writer.take())
+    return flushes
+
+def capture_flushes(path):
+    """The bytes of each recorded read, without the capture's headers"""
+    from client.capture import CaptureReader
+    reader = CaptureReader(path)
+    try:
+        return [chunk for offset, chunk in reader]
+    finally:
+        reader.close()
+
+def measure(flushes, level):
+    """(ratio, deflate seconds, inflate seconds) for one pass"""
+    sender = compression.ZlibStream(level)
+    receiver = compression.ZlibStream(level)
+    wire = []
+    start = time.clock()
+    for data in flushes:
+        wire.append(sender.compress(data))
+    deflated = time.clock()
+    for data in wire:
+        receiver.decompress(data)
+    inflated = time.clock()
+    if receiver.raw_in != sender.raw_out:
+        raise AssertionError("stream did not round trip")
+    return sender.ratio_out(), deflated - start, inflated - deflated
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--levels', default='1,6,9',
+            help='zlib levels to compare')
+    parser.add_option('--entities', type='int', default=1000)
+    parser.add_option('--rate', default='Position=1.0,Health=0.1',
+            help='Updates per entity per second, as State=rate,...')
+    parser.add_option('--array-size', type='int', default=0)
+    parser.add_option('--array-rate', type='float', default=0.0)
+    parser.add_option('--ticks', type='int', default=200)
+    parser.add_option('--framing', default=framing.BATCH)
+    parser.add_option('--capture', metavar='FILE',
+            help='Compress a recorded session instead of a stand-in world')
+    parser.add_option('--repeat', type='int', default=3,
+            help='Passes per level; the fastest is reported')
+    options, args = parser.parse_args()
+
+    if options.capture:
+        flushes = capture_flushes(options.capture)
+    else:
+        flushes = world_flushes(options.framing, options.ticks,
+                entities=options.entities, rates=parse_rates(options.rate),
+                array_size=options.array_size,
+                array_rate=options.array_rate)
+    raw = sum(len(data) for data in flushes)
+    mb = raw / float(1 << 20)
+    print "%d flushes, %.1fKB, %.0fB per flush" % (len(flushes),
+            raw / 1024.0, raw / float(len(flushes)))
+
+    print "%-5s %7s %12s %12s %11s %11s" % ('level', 'ratio',
+            'deflate MB/s', 'inflate MB/s', 'deflate ms', 'inflate ms')
+    for level in [int(l) for l in options.levels.split(',')]:
+        runs = [measure(flushes, level) for i in xrange(options.repeat)]
+        ratio = runs[0][0]
+        deflate = max(min(run[1] for run in runs), 1e-9)
+        inflate = max(min(run[2] for run in runs), 1e-9)
+        # CPU per megabyte of uncompressed traffic
+        print "%-5d %6.2fx %12.1f %12.1f %11.2f %11.2f" % (level, ratio,
+                mb / deflate, mb / inflate,
+                deflate * 1000 / mb, inflate * 1000 / mb)
+
+if __name__ == '__main__':
+    main()
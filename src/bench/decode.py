@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Decode pool benchmark: floods one headless client with updates from a
+local server and compares decoding inline on the reactor thread with a
+DecodePool of threads or processes. For each, reports the updates
+applied per second, the time between frames drawn (the tail is how long
+input and rendering waited behind the network) and the CPU used, in
+cores, counting the workers.
+
+Run from the src directory:
+    python -m bench.decode --rate 200000 --modes inline,thread:2,process:2
+
+The server and each client run in their own process; --array-share
+makes that fraction of the updates carry a Path of --array-size vectors.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from optparse import OptionParser
+
+from client import messages
+from game.objects import Vector
+
+def flood_frames(ids, count, array_size, array_share):
+    """Serialized updates for the server to cycle through"""
+    frames = []
+    every = int(1 / array_share) if array_share else 0
+    for i in xrange(count):
+        id = ids[i % len(ids)]
+        if every and i % every == 0:
+            msg = messages.update_state(id, 'Path', [Vector(j % 97, i % 89, 0)
+                    for j in xrange(array_size)])
+        else:
+            msg = messages.update_state(id, 'Position',
+                    Vector(i % 97, i % 89, 0))
+        frames.append(msg.SerializeToString())
+    return frames
+
+def serve(options):
+    """The flood server: the stand-in's handshake, then updates at --rate"""
+    from twisted.internet import reactor
+    from server.standin import StandinFactory, World
+
+    class FloodFactory(StandinFactory):
+        def __init__(self, world):
+            StandinFactory.__init__(self, world)
+            self.frames = flood_frames(sorted(world.entities), 4096,
+                    options.array_size, options.array_share)
+            self._next = 0
+            self._due = 0.0
+
+        def tick(self):
+            self._due += float(options.rate) / self.world.tick_rate
+            count = int(self._due)
+            self._due -= count
+            frames = self.frames
+            start = self._next
+            for session in self.sessions:
+                send_frame = session.send_frame
+                for i in xrange(start, start + count):
+                    send_frame(frames[i % len(frames)])
+            self._next = (start + count) % len(frames)
+            self.flush()
+
+    world = World(entities=options.entities, rates={})
+    reactor.listenTCP(options.port, FloodFactory(world),
+            interface='localhost')
+    print "ready"
+    sys.stdout.flush()
+    reactor.run()
+
+def measure(options):
+    """One client in one --mode; prints its results as a JSON line"""
+    from client.decodepool import DecodePool
+    from game.game import Game
+
+    mode, workers = (options.mode.split(':') + ['0'])[:2]
+    pool = None
+    if mode != 'inline':
+        pool = DecodePool(int(workers), mode, eager_states=Game.eager_states)
+
+    from twisted.internet import reactor
+    from client.client import Client
+    from client.reconnect import Reconnector
+    from game.renderer import HeadlessRenderer
+    from gameloop import GameLoop
+    from metrics import registry
+
+    game = Game('flood', options.fps, renderer=HeadlessRenderer())
+    client = Client(game)
+    client.decode_pool = pool
+    loop = GameLoop(game, client)
+    updates = registry.counter('messages_in.update_state')
+    pooled = registry.histogram('decode_latency')
+    frames = []
+    window = {}
+
+    redraw = game.redraw
+    def timed_redraw():
+        frames.append(time.time())
+        redraw()
+    game.redraw = timed_redraw
+
+    def on_connected(protocol):
+        if not game.running:
+            loop.start()
+
+    def begin():
+        window['start'] = time.time(), updates.value, os.times()
+        del frames[:]
+        reactor.callLater(options.duration, end)
+
+    def end():
+        window['end'] = time.time(), updates.value
+        reconnector.stop()
+        reactor.stop()
+
+    reconnector = Reconnector(client, 'localhost', options.port, on_connected)
+    reconnector.on_give_up = reactor.stop
+    reconnector.start()
+    reactor.callLater(options.warmup, begin)
+    reactor.run()
+    if pool is not None:
+        # Reaped workers count in os.times()'s children
+        pool.close()
+
+    start, first, cpu0 = window['start']
+    end, last = window['end']
+    cpu1 = os.times()
+    elapsed = end - start
+    intervals = sorted(b - a for a, b in zip(frames, frames[1:])) or [0.0]
+    def percentile(fraction):
+        return intervals[min(len(intervals) - 1,
+            int(len(intervals) * fraction))]
+    print json.dumps({
+            'mode': options.mode,
+            'updates': (last - first) / elapsed,
+            'frames': len(frames),
+            'p50': percentile(0.5),
+            'p99': percentile(0.99),
+            'max': intervals[-1],
+            'cpu': sum(cpu1[:4]) - sum(cpu0[:4]),
+            'elapsed': elapsed,
+            'batches': pooled.count,
+        })
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--modes', default='inline,thread:2,process:1,process:2',
+            help='inline, or thread:N or process:N for a pool of N workers')
+    parser.add_option('--rate', type='int', default=200000,
+            help='Updates per second the server sends')
+    parser.add_option('--entities', type='int', default=1000)
+    parser.add_option('--array-size', type='int', default=100)
+    parser.add_option('--array-share', type='float', default=0.0)
+    parser.add_option('--duration', type='float', default=5.0,
+            help='Seconds measured per mode')
+    parser.add_option('--warmup', type='float', default=1.0)
+    parser.add_option('--fps', type='int', default=30)
+    parser.add_option('--port', type='int', default=9199)
+    # Roles the benchmark runs itself in
+    parser.add_option('--serve', action='store_true', help='(internal)')
+    parser.add_option('--mode', help='(internal)')
+    options, args = parser.parse_args()
+
+    if options.serve:
+        return serve(options)
+    if options.mode:
+        return measure(options)
+
+    common = ['--port', str(options.port), '--rate', str(options.rate),
+            '--entities', str(options.entities),
+            '--array-size', str(options.array_size),
+            '--array-share', str(options.array_share),
+            '--duration', str(options.duration),
+            '--warmup', str(options.warmup), '--fps', str(options.fps)]
+    command = [sys.executable, '-m', 'bench.decode'] + common
+    print "%-10s %12s %9s %9s %9s %7s" % ('mode', 'updates/s',
+            'frame p50', 'frame p99', 'frame max', 'cores')
+    for mode in options.modes.split(','):
+        # A fresh server each time, so no backlog carries over
+        server = subprocess.Popen(command + ['--serve'],
+                stdout=subprocess.PIPE)
+        try:
+            server.stdout.readline()
+            output = subprocess.check_output(command + ['--mode', mode],
+                    stderr=open(os.devnull, 'w'))
+        finally:
+            server.terminate()
+            server.wait()
+        result = json.loads(output.strip().splitlines()[-1])
+        if mode != 'inline' and not result['batches']:
+            sys.exit("%s: no batches went through the decode pool" % mode)
+        print "%-10s %12.0f %7.1fms %7.1fms %7.1fms %7.2f" % (mode,
+                result['updates'], result['p50'] * 1000,
+                result['p99'] * 1000, result['max'] * 1000,
+                result['cpu'] / result['elapsed'])
+
+if __name__ == '__main__':
+    main()
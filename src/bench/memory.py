@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Entity memory benchmark: fills a Game with entities carrying the usual
+states through update_entity and reports the bytes reachable from the
+entity table, with plain state dicts and with the compact StateStore.
+
+Run from the src directory:
+    python -m bench.memory --entities 10000
+"""
+
+import gc
+import sys
+import types
+from optparse import OptionParser
+
+from game.game import Game
+from game.objects import Vector
+from game.renderer import HeadlessRenderer
+
+def populate(game, count):
+    for id in xrange(count):
+        game.add_entity(id, 'Spider')
+        game.update_entity(id, 'Position', Vector(id % 300, id // 300, 0))
+        game.update_entity(id, 'Health', 10)
+        game.update_entity(id, 'MaxHealth', 10)
+        game.update_entity(id, 'KillCount', 0)
+        game.update_entity(id, 'Asset', 'S')
+
+def deep_size(*roots):
+    """Bytes of every object reachable from roots, each counted once"""
+    seen = set()
+    stack = list(roots)
+    total = 0
+    skip = (type, types.ModuleType, types.FunctionType, types.ClassType)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, skip):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+def measure(compact, count):
+    game = Game('bench', compact=compact, renderer=HeadlessRenderer())
+    populate(game, count)
+    return deep_size(game.entities, game.store)
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--entities', type='int', default=10000,
+            help='Number of entities')
+    options, args = parser.parse_args()
+
+    for label, compact in (('dicts', False), ('compact', True)):
+        size = measure(compact, options.entities)
+        print "%-8s %10d bytes  %7.1f bytes/entity" % (label, size,
+                float(size) / options.entities)
+
+if __name__ == '__main__':
+    main()
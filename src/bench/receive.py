@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Receive path benchmark: pushes a synthetic stream of framed UpdateState
+messages through GhackProtocol.dataReceived in fixed-size chunks and
+reports bytes/s and frames/s, for the old string buffer and the current
+bytearray reader.
+
+Run from the src directory:
+    python -m bench.receive --size 10 --chunk 65536
+"""
+
+import struct
+import time
+from optparse import OptionParser
+
+from proto import protocol_pb2 as ghack_pb2
+from client import messages
+from client.netclient import GhackProtocol
+
+class LegacyProtocol(GhackProtocol):
+    """The string-concatenating receive path, kept for comparison"""
+    def __init__(self):
+        GhackProtocol.__init__(self)
+        self._buffer = ''
+
+    def dataReceived(self, data):
+        self._buffer += data
+        while self.callback:
+            msg = self.get_message()
+            if not msg:
+                return
+            self.callback(msg)
+
+    def get_message(self):
+        if len(self._buffer) <= 2:
+            return None
+        msg_len = struct.unpack('H', self._buffer[:2])[0]
+        if len(self._buffer) < 2 + msg_len:
+            return None
+        msg = ghack_pb2.Message()
+        msg.ParseFromString(self._buffer[2:msg_len + 2])
+        self._buffer = self._buffer[2 + msg_len:]
+        return msg
+
+def update_frame(i):
+    """A framed Position update, the most common message on the wire"""
+    msg = ghack_pb2.Message()
+    msg.type = ghack_pb2.Message.UPDATESTATE
+    msg.update_state.id = i % 5000
+    msg.update_state.state_id = 'Position'
+    value = msg.update_state.value
+    value.type = ghack_pb2.StateValue.VECTOR3
+    value.vector3_val.x = i % 97
+    value.vector3_val.y = i % 89
+    value.vector3_val.z = 0
+    body = msg.SerializeToString()
+    return struct.pack('H', len(body)) + body
+
+def synthetic_stream(size):
+    """Returns (stream, frame count) of at least size bytes"""
+    frames = [update_frame(i) for i in xrange(1000)]
+    parts = []
+    total = count = 0
+    while total < size:
+        frame = frames[count % len(frames)]
+        parts.append(frame)
+        total += len(frame)
+        count += 1
+    return ''.join(parts), count
+
+def run(protocol_class, stream, chunk):
+    """Returns (seconds, frames) to receive stream in chunk sized reads"""
+    received = [0]
+    def callback(msg):
+        received[0] += 1
+    protocol = protocol_class()
+    protocol.callback = callback
+
+    start = time.time()
+    for offset in xrange(0, len(stream), chunk):
+        protocol.dataReceived(stream[offset:offset + chunk])
+    return time.time() - start, received[0]
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--size', type='float', default=10,
+            help='Stream size in MB')
+    parser.add_option('--chunk', type='int', default=65536,
+            help='Bytes per dataReceived call')
+    options, args = parser.parse_args()
+
+    stream, count = synthetic_stream(int(options.size * 1024 * 1024))
+    print "%d bytes, %d frames, %d byte chunks" % (len(stream), count,
+            options.chunk)
+    for label, cls in (('before', LegacyProtocol), ('after', GhackProtocol)):
+        elapsed, frames = run(cls, stream, options.chunk)
+        assert frames == count, "lost frames: %d of %d" % (frames, count)
+        print "%-7s %8.2f MB/s %10.0f frames/s" % (label,
+                len(stream) / elapsed / (1024 * 1024), frames / elapsed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Startup benchmark: times `main.py --startup-only` cold (no protoc stamp,
+no .pyc files, so protoc runs and everything compiles) and warm (stamp
+current, bytecode cached), then prints a per-module import time table in
+the style of python -X importtime for a warm start.
+
+Run from the src directory:
+    python -m bench.startup --runs 5
+"""
+
+import os
+import sys
+import time
+import runpy
+import subprocess
+import __builtin__
+from optparse import OptionParser
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+MAIN = os.path.join(SRC_DIR, 'main.py')
+
+def remove_bytecode():
+    for dirpath, dirnames, filenames in os.walk(SRC_DIR):
+        for filename in filenames:
+            if filename.endswith('.pyc') or filename.endswith('.pyo'):
+                os.remove(os.path.join(dirpath, filename))
+
+def remove_stamp():
+    from proto import generate
+    if os.path.exists(generate.STAMP):
+        os.remove(generate.STAMP)
+
+def time_start(prepare):
+    prepare()
+    start = time.time()
+    subprocess.check_call([sys.executable, MAIN, '--startup-only'])
+    return time.time() - start
+
+def cold():
+    remove_stamp()
+    remove_bytecode()
+
+def warm():
+    pass
+
+class ImportTimer(object):
+    """Times first imports, like python -X importtime"""
+    def __init__(self):
+        self.rows = []
+        self._stack = []
+        self._import = __builtin__.__import__
+
+    def install(self):
+        __builtin__.__import__ = self
+
+    def uninstall(self):
+        __builtin__.__import__ = self._import
+
+    def __call__(self, name, *args, **kwargs):
+        before = len(sys.modules)
+        self._stack.append(0.0)
+        start = time.time()
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if len(sys.modules) > before:
+                self.rows.append((elapsed - children, elapsed, name,
+                    len(self._stack)))
+
+    def report(self, out=sys.stderr):
+        print >> out, "import time: self [us] | cumulative | imported package"
+        for self_time, cumulative, name, depth in self.rows:
+            print >> out, "import time: %9d | %10d | %s%s" % (
+                    self_time * 1e6, cumulative * 1e6, '  ' * depth, name)
+
+def importtime():
+    """Runs a warm --startup-only in this process with an ImportTimer"""
+    timer = ImportTimer()
+    sys.argv = [MAIN, '--startup-only']
+    sys.path.insert(0, SRC_DIR)
+    timer.install()
+    try:
+        runpy.run_path(MAIN, run_name='__main__')
+    except SystemExit:
+        pass
+    finally:
+        timer.uninstall()
+    timer.report()
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--runs', type='int', default=5,
+            help='Launches to time for each case')
+    parser.add_option('--importtime', action='store_true', default=False,
+            help='Only print the import time table')
+    options, args = parser.parse_args()
+
+    if options.importtime:
+        importtime()
+        return
+
+    for label, prepare in (('cold', cold), ('warm', warm)):
+        times = sorted(time_start(prepare) for i in xrange(options.runs))
+        print "%-5s min %6.1f ms  median %6.1f ms" % (label,
+                times[0] * 1000, times[len(times) // 2] * 1000)
+    sys.stdout.flush()
+    subprocess.check_call([sys.executable, '-m', 'bench.startup',
+        '--importtime'], cwd=SRC_DIR)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Benchmark suite for the client's hot paths, one stage at a time: framing,
+protobuf parsing, unwrapping, handler dispatch, world updates and redraw.
+Reports ops/s and garbage collected objects allocated per op. Python 2
+has no allocation tracing, so allocations are counted in a separate,
+traced run that keeps alive every value a Python function returns or
+binds to a local name. The garbage collector's count then includes those
+objects instead of cancelling them out as they are freed. Only
+temporaries that never reach a name or a return are missed. Runs offline; redraw uses a fake
+curses screen.
+
+Save a baseline, then compare later runs against it; the comparison
+exits non-zero when a stage regresses by more than --tolerance:
+
+    python -m bench.suite --save baseline.json
+    python -m bench.suite --compare baseline.json
+"""
+
+import gc
+import sys
+import json
+import time
+from optparse import OptionParser
+
+from proto import protocol_pb2 as ghack_pb2
+from client import messages, framing
+from client.client import Client, GameHandler
+from client.netclient import GhackProtocol
+from game.game import Game
+from game.objects import Vector
+from game.renderer import HeadlessRenderer
+from game.cursesrenderer import CursesRenderer
+
+# How long each measurement should run, and how many are taken
+MIN_TIME = 0.3
+REPEAT = 5
+
+# Most ops in the traced run that counts allocations
+ALLOCATION_OPS = 2000
+
+# More than the interpreter keeps on its list and dict free lists
+FREE_LISTS = 100
+
+def position_update(i):
+    return messages.update_state(i % 1000, 'Position',
+            Vector(i % 97, i % 89, 0))
+
+def array_update(size=50):
+    return messages.update_state(1, 'Path',
+            [Vector(i, i + 1, 0) for i in xrange(size)])
+
+def framed(msgs):
+    writer = framing.FrameWriter()
+    for msg in msgs:
+        writer.append(msg.SerializeToString())
+    return writer.take()
+
+_block = []
+def position_stream(n):
+    """n framed Position updates, built from a repeated block of 1000"""
+    if not _block:
+        _block.append(framed(position_update(i) for i in xrange(1000)))
+    return _block[0] * (n // 1000 + 1)
+
+class Sink(object):
+    """Stands in for Game when only dispatch is measured"""
+    name = 'bench'
+    eager_states = Game.eager_states
+
+    def add_entity(self, id, name=None):
+        pass
+
+    def remove_entity(self, id, name=None):
+        pass
+
+    def update_entity(self, id, state_id, value=None):
+        pass
+
+    def assign_control(self, id, revoked=False):
+        pass
+
+class FakeWindow(object):
+    """Just enough of a curses window for CursesRenderer.draw"""
+    def __init__(self, height=24, width=80):
+        self.height = height
+        self.width = width
+
+    def erase(self):
+        pass
+
+    def getbegyx(self):
+        return 0, 0
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, *args):
+        pass
+
+    def border(self):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+class FakeScreenRenderer(CursesRenderer):
+    """The curses drawing code, aimed at FakeWindows"""
+    def __init__(self):
+        self.scr = FakeWindow()
+        self.hudwin = FakeWindow(5, 20)
+
+    def color(self, pair):
+        return 0
+
+    def doupdate(self):
+        pass
+
+def populated_game(count, renderer, size=500):
+    game = Game('bench', fps=0, renderer=renderer)
+    for id in xrange(count):
+        game.add_entity(id, 'Spider')
+        game.update_entity(id, 'Position', Vector(id * 7 % size,
+            id * 13 % size, 0))
+        game.update_entity(id, 'Asset', 's')
+    player = count
+    game.add_entity(player, 'Player')
+    for state_id, value in (('Position', Vector(size // 2, size // 2, 0)),
+            ('Health', 10), ('MaxHealth', 10), ('Asset', '@'),
+            ('KillCount', 0)):
+        game.update_entity(player, state_id, value)
+    game.assign_control(player)
+    return game
+
+# Each stage takes an op count n and returns a function doing n ops
+
+def stage_framing(n):
+    reader = framing.FrameReader()
+    reader.feed(position_stream(n))
+    def run():
+        next_frame = reader.next_frame
+        for i in xrange(n):
+            next_frame()
+    return run
+
+def stage_get_message(n):
+    protocol = GhackProtocol()
+    protocol.dataReceived(position_stream(n))
+    def run():
+        get_message = protocol.get_message
+        for i in xrange(n):
+            get_message()
+    return run
+
+def stage_parse(n):
+    body = position_update(1).SerializeToString()
+    def run():
+        for i in xrange(n):
+            msg = ghack_pb2.Message()
+            msg.ParseFromString(body)
+    return run
+
+def stage_unwrap(n):
+    msg = position_update(1)
+    def run():
+        unwrap, unwrap_state = messages.unwrap, messages.unwrap_state
+        for i in xrange(n):
+            unwrap_state(unwrap(msg).value)
+    return run
+
+def stage_unwrap_array(n):
+    msg = array_update()
+    def run():
+        unwrap, unwrap_state = messages.unwrap, messages.unwrap_state
+        for i in xrange(n):
+            unwrap_state(unwrap(msg).value)
+    return run
+
+def stage_dispatch(n):
+    client = Client(Sink())
+    handler = GameHandler(client)
+    msgs = [position_update(i) for i in xrange(100)]
+    def run():
+        handle_msg = handler.handle_msg
+        for i in xrange(n):
+            handle_msg(msgs[i % 100])
+    return run
+
+def stage_dispatch_array(n):
+    client = Client(Sink())
+    handler = GameHandler(client)
+    msg = array_update()
+    def run():
+        handle_msg = handler.handle_msg
+        for i in xrange(n):
+            handle_msg(msg)
+    return run
+
+def stage_update_entity(n):
+    game = populated_game(1000, HeadlessRenderer())
+    values = [Vector(i % 97, i % 89, 0) for i in xrange(100)]
+    def run():
+        update_entity = game.update_entity
+        for i in xrange(n):
+            update_entity(i % 1000, 'Position', values[i % 100])
+    return run
+
+def stage_redraw(n):
+    game = populated_game(5000, FakeScreenRenderer())
+    def run():
+        redraw = game.redraw
+        for i in xrange(n):
+            redraw()
+    return run
+
+STAGES = [
+        ('framing', stage_framing),
+        ('get_message', stage_get_message),
+        ('parse', stage_parse),
+        ('unwrap', stage_unwrap),
+        ('unwrap_array', stage_unwrap_array),
+        ('dispatch', stage_dispatch),
+        ('dispatch_array', stage_dispatch_array),
+        ('update_entity', stage_update_entity),
+        ('redraw', stage_redraw),
+    ]
+
+def timed(stage, n):
+    run = stage(n)
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.time()
+        run()
+        return time.time() - start
+    finally:
+        gc.enable()
+
+def allocations(stage, n=ALLOCATION_OPS):
+    """Garbage collected objects allocated per op, frees suppressed"""
+    run = stage(n)
+    kept = {}
+    def keep(frame, event, arg):
+        # Every value a name is bound to, checked on every line
+        for value in frame.f_locals.itervalues():
+            kept[id(value)] = value
+        if event == 'return':
+            kept[id(arg)] = arg
+        return keep
+    gc.collect()
+    gc.disable()
+    # Objects from the list and dict free lists are not counted, so use
+    # them up first; collect() already emptied the others
+    reserve = [[] for i in xrange(FREE_LISTS)], [{} for i in xrange(
+            FREE_LISTS)]
+    try:
+        before = gc.get_count()[0]
+        sys.settrace(keep)
+        try:
+            run()
+        finally:
+            sys.settrace(None)
+        objects = gc.get_count()[0] - before
+    finally:
+        kept.clear()
+        del reserve
+        gc.enable()
+    return max(0, objects) / float(n)
+
+def measure(stage):
+    """Returns (ops/s, objects allocated/op), the best of REPEAT runs"""
+    n = 10
+    elapsed = timed(stage, n)
+    while elapsed < MIN_TIME:
+        n *= max(2, min(10, int(MIN_TIME / max(elapsed, 1e-6)) + 1))
+        elapsed = timed(stage, n)
+    best = elapsed
+    for i in xrange(REPEAT - 1):
+        best = min(best, timed(stage, n))
+    # Tracing is slow; count allocations over a tenth of the ops at most
+    return n / best, allocations(stage, max(1, min(ALLOCATION_OPS, n // 10)))
+
+def regressions(results, baseline, tolerance):
+    failed = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            failed.append("%s: %.0f ops/s, baseline %.0f" % (name,
+                result['ops_per_sec'], base['ops_per_sec']))
+        if result['objects_per_op'] > base['objects_per_op'] + max(0.5,
+                base['objects_per_op'] * tolerance):
+            failed.append("%s: %.2f objects/op, baseline %.2f" % (name,
+                result['objects_per_op'], base['objects_per_op']))
+    return failed
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--save', metavar='FILE',
+            help='Write results to FILE as a baseline')
+    parser.add_option('--compare', metavar='FILE',
+            help='Compare against the baseline in FILE')
+    parser.add_option('--tolerance', type='float', default=0.25,
+            help='Allowed slowdown before a stage counts as a regression')
+    parser.add_option('--only', metavar='STAGE[,STAGE]',
+            help='Run only these stages')
+    options, args = parser.parse_args()
+
+    only = options.only.split(',') if options.only else None
+    baseline = {}
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print "%-14s %12s %10s %9s" % ('stage', 'ops/s', 'allocs/op', 'change')
+    for name, stage in STAGES:
+        if only and name not in only:
+            continue
+        ops, objects = measure(stage)
+        results[name] = {'ops_per_sec': ops, 'objects_per_op': objects}
+        change = ''
+        if name in baseline:
+            change = "%+.1f%%" % (
+                    (ops / baseline[name]['ops_per_sec'] - 1) * 100)
+        print "%-14s %12.0f %10.2f %9s" % (name, ops, objects, change)
+
+    if options.save:
+        with open(options.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if baseline:
+        failed = regressions(results, baseline, options.tolerance)
+        if failed:
+            print >> sys.stderr, "Regressions:"
+            for line in failed:
+                print >> sys.stderr, "  " + line
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
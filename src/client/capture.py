@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Wire-level capture files: the raw framed byte stream from the server,
+exactly as dataReceived saw it, with the time each chunk arrived.
+
+The file is a header (magic and the wall clock start time) followed by
+append-only records of (seconds since start, length, bytes).
+"""
+
+import os
+import mmap
+import time
+import struct
+
+MAGIC = 'GHCAP001'
+HEADER = struct.Struct('>8sd')
+RECORD = struct.Struct('>dI')
+
+class CaptureError(Exception):
+    pass
+
+class Recorder(object):
+    """Appends received chunks to a capture file"""
+    def __init__(self, path, clock=time.time):
+        self.clock = clock
+        self.start = clock()
+        self.records = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, self.start))
+
+    def write(self, data):
+        self._file.write(RECORD.pack(self.clock() - self.start, len(data)))
+        self._file.write(data)
+        self.records += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+class CaptureReader(object):
+    """Reads a capture file through mmap"""
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            raise CaptureError("%s is not a capture file" % path)
+        self._map = mmap.mmap(self._file.fileno(), size,
+                access=mmap.ACCESS_READ)
+        magic, self.start = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise CaptureError("%s is not a capture file" % path)
+
+    def __iter__(self):
+        """Yields (seconds since start, chunk) for every record"""
+        data = self._map
+        pos = HEADER.size
+        end = len(data)
+        while pos + RECORD.size <= end:
+            offset, length = RECORD.unpack_from(data, pos)
+            pos += RECORD.size
+            if pos + length > end:
+                # A capture cut short mid-write; stop at the last whole record
+                return
+            yield offset, data[pos:pos + length]
+            pos += length
+
+    def close(self):
+        self._map.close()
+        self._file.close()
@@ -4,37 +4,109 @@
 # Use of this source code is governed by the GNU General Public License
 # version 3 (or any later version). See the file COPYING for details.
 
-import struct
 import sys
+import time
+from operator import attrgetter
 
 from proto import protocol_pb2 as ghack_pb2
 import netclient
 import messages
+import framing
+import compression
+import decodepool
+from coalesce import UpdateCoalescer
 from debug import debug
-from game.objects import Vector
+from metrics import registry
+from game.objects import Vector, LazyState
 
 """
 Client:
     Holds a client connection to the game server. 
 """
 
+# Most Move messages sent per second; held keys repeat faster than this
+MOVE_RATE = 15
+
+# Seconds after a re-login to give up waiting for the end of the world
+# snapshot, for servers that never assign control
+RESYNC_TIMEOUT = 5.0
+
+LOGIN_FAILS = {
+        ghack_pb2.LoginResult.ACCESS_DENIED: "wrong name or password",
+        ghack_pb2.LoginResult.SERVER_FULL: "server is full",
+        ghack_pb2.LoginResult.BANNED: "banned",
+    }
+
 class Client(object):
     def __init__(self, game):
         self.game = game
+        # Where GameHandler sends world changes: the game itself, or an
+        # UpdateCoalescer in front of it
+        self.world = game
+        self.coalescer = None
         self.conn = None
         self.handler = None
         self.version = 1
+        # Framings offered to the server in Connect, most preferred first
+        self.framings = framing.FRAMINGS
+        # zlib level to ask for stream compression with, or None
+        self.compress_level = None
         self.connected = False
+        # Lost a logged in connection and not yet logged in again; the
+        # world is kept and drawn meanwhile
+        self.reconnecting = False
+        # Logged in again and reconciling the cached world with the server's
+        self.resyncing = False
+        self.flush_immediately = False
+        self.on_login = None
+        self.on_disconnect = None
+        # A DecodePool to parse game messages off the reactor thread
+        self.decode_pool = None
+        self._resync_call = None
+        self.move_rate = MOVE_RATE
+        self.clock = time.time
+        self._next_move = 0.0
+        self._message_counts = dict((msg_type,
+            registry.counter('messages_in.' + name))
+            for msg_type, name in messages.MESSAGE_TYPES.iteritems())
 
     def run(self):
         """Start the client connection"""
         self.connect()
 
+    def coalesce_updates(self):
+        """Buffer world changes and apply them once per frame"""
+        self.coalescer = UpdateCoalescer(self.game)
+        self.world = self.coalescer
+
+    def apply_updates(self):
+        """Apply buffered world changes; call before each frame"""
+        if self.coalescer is not None:
+            self.coalescer.flush()
+
     def update(self, elapsed_seconds):
         """Runs every frame"""
-        if self.game.direction.len_squared() > 0:
+        if self.game.direction.len_squared() > 0 and self._move_due():
             self.send(messages.move(self.game.direction))
+            self.game.predict_move(self.game.direction)
             self.game.direction = Vector()
+        self.flush()
+
+    def _move_due(self):
+        """
+        Whether move_rate allows a Move now; a held back move waits for a
+        later update, replaced by any newer key press. Moves get evenly
+        spaced slots rather than a minimum gap, so the rate holds even
+        when updates come at a coarser interval.
+        """
+        if not self.move_rate:
+            return True
+        now = self.clock()
+        if now < self._next_move:
+            return False
+        interval = 1.0 / self.move_rate
+        self._next_move = max(self._next_move, now - interval / 2) + interval
+        return True
 
     def handle(self, msg):
         """
@@ -42,69 +114,177 @@ class Client(object):
         objects for the various states, and soon
         """
         debug("<<", msg)
+        counter = self._message_counts.get(msg.type)
+        if counter is not None:
+            counter.value += 1
         if self.handler:
             self.handler.handle_msg(msg)
         else:
             debug("No handler for message, ignoring")
 
+    def handle_decoded(self, decoded):
+        """Handle a batch of messages from the decode pool"""
+        counts = self._message_counts
+        for item in decoded:
+            counter = counts.get(item[0])
+            if counter is not None:
+                counter.value += 1
+        if self.handler:
+            self.handler.handle_decoded(self, decoded)
 
     def connect(self):
         """Do the client-server handshake"""
-        connect = messages.connect(self.version)
+        version_str = framing.offer(self.framings)
+        if self.compress_level is not None:
+            version_str += ' ' + compression.offer()
+        connect = messages.connect(self.version, version_str)
         self.handler = ConnectHandler(self)
-        self.send(connect)
+        self.send(connect, flush=True)
 
     def disconnect(self):
         "Disconnect from the server"
-        disconnect = messages.disconnect(ghack_pb2.Disconnect.QUIT,
-                "Client disconnected")
         self.handler = None
-        self.send(disconnect)
+        self.reconnecting = False
+        if self.conn:
+            disconnect = messages.disconnect(ghack_pb2.Disconnect.QUIT,
+                    "Client disconnected")
+            self.send(disconnect, flush=True)
+            self.conn.close()
+        self.connected = False
+        if self.on_disconnect:
+            self.on_disconnect()
+
+    def connection_lost(self):
+        """Forget the connection, keeping the world if we were logged in"""
+        if self.connected:
+            self.reconnecting = True
+            self.game.set_status("Reconnecting...")
+        self.connected = False
+        self.handler = None
+        self.conn = None
+        self._cancel_resync()
+        if self.game.predictor is not None:
+            # Moves sent on the lost connection will never be answered
+            self.game.predictor.reset()
+
+    def logged_in(self):
+        self.handler = GameHandler(self)
+        self.connected = True
+        if self.decode_pool is not None:
+            self.conn.decode_with(self.decode_pool, self.handle_decoded)
+        if self.reconnecting:
+            self.reconnecting = False
+            self.begin_resync()
+
+    def begin_resync(self):
+        """Take the world the server sends next as a correction of ours"""
+        self.apply_updates()
+        self.game.begin_resync()
+        self.game.set_status("Resyncing...")
+        self.resyncing = True
+        self._resync_call = self.conn.call_later(RESYNC_TIMEOUT,
+                self.end_resync)
+
+    def end_resync(self):
+        """Drop whatever the server did not send again"""
+        if not self.resyncing:
+            return
+        self.resyncing = False
+        self._cancel_resync()
+        self.apply_updates()
+        dropped = self.game.end_resync()
+        self.game.set_status(None)
+        debug("Resynced,", len(self.game.entities), "entities,", dropped,
+                "dropped")
 
-        self.conn.close()
+    def _cancel_resync(self):
+        if self._resync_call is not None and self._resync_call.active():
+            self._resync_call.cancel()
+        self._resync_call = None
 
-    def send(self, msg):
-        "Send a message to the server"
+    def send(self, msg, flush=False):
+        """
+        Queue a message for the server. Queued messages go out together
+        on the next flush(), once per frame, unless flush or
+        flush_immediately is set.
+        """
         debug(">>", msg)
-        msg_bytes = msg.SerializeToString()
-        self.conn.send_bytes(struct.pack('H', len(msg_bytes)))
-        self.conn.send_bytes(msg_bytes)
+        self.conn.send_frame(msg.SerializeToString())
+        if flush or self.flush_immediately:
+            self.conn.flush()
+
+    def flush(self):
+        "Send all queued messages to the server"
+        if self.conn:
+            self.conn.flush()
+
+class HandlerType(type):
+    """
+    Compiles each Handler class's handlers and expected_types into one
+    message type -> (function, field getter) table when the class is
+    built, so dispatching a message allocates nothing.
+    """
+    def __init__(cls, name, bases, attrs):
+        super(HandlerType, cls).__init__(name, bases, attrs)
+        dispatch = {}
+        for msg_type in cls.expected_types:
+            dispatch[msg_type] = (getattr(cls, 'handle').__func__, None)
+        for msg_type, method in cls.handlers.iteritems():
+            dispatch[msg_type] = (getattr(cls, method).__func__,
+                    attrgetter(messages.MESSAGE_TYPES[msg_type]))
+        cls.dispatch = dispatch
 
 class Handler(object):
     """
     Client state is implemented in message handlers.
 
-    A complicated Handler defines a mapping of type -> function in
+    A complicated Handler defines a mapping of type -> method name in
     handlers, which don't have to worry about unwrapping messages or
     splitting logic.
 
     Handlers can also define a list of expected message types that are
     passed (with the wrapping Message intact) to handle()
     """
+    __metaclass__ = HandlerType
+
     def __init__(self, client):
         self.client = client
+        self.unexpected_types = {}
 
     expected_types = []
     handlers = {}
 
     def handle_msg(self, msg):
         """Handle a message"""
-        if msg.type in self.handlers:
-            handler = self.handlers[msg.type](self)
-            handler(self.client, messages.unwrap(msg))
-        elif msg.type in self.expected_types:
-            self.handle(self.client, msg)
-        else:
+        entry = self.dispatch.get(msg.type)
+        if entry is None:
             self.unexpected(msg)
+            return
+        function, field = entry
+        if field is None:
+            function(self, self.client, msg)
+        else:
+            function(self, self.client, field(msg))
 
+    def handle_decoded(self, client, decoded):
+        """
+        Handle messages from the decode pool. Only a GameHandler expects
+        the game messages it decodes; anything else comes as a frame.
+        """
+        for item in decoded:
+            if item[0] in decodepool.DECODED:
+                debug("Decoded message outside the game, ignoring:", item)
+            else:
+                self.handle_msg(decodepool.parse(item[1]))
 
     def unexpected(self, msg):
-        """Handle an unexpected message"""
-        try:
-            s = str(msg)
-            print >> sys.stderr, "Unexpected message:", s
-        except KeyError:
-            print >> sys.stderr, "Unknown message, ignoring"
+        """Handle an unexpected message, complaining once per type"""
+        count = self.unexpected_types.get(msg.type, 0)
+        self.unexpected_types[msg.type] = count + 1
+        if not count:
+            print >> sys.stderr, "Unexpected message type %d, ignoring" % (
+                    msg.type)
+        debug("Unexpected message:", msg)
 
 class ConnectHandler(Handler):
     """Handles the server's connect reply"""
@@ -114,11 +294,23 @@ class ConnectHandler(Handler):
 
         if connect.version != client.version:
             sys.stderr.write("Version strings do not match\n")
-            client.close()
+            client.conn.close()
+            return
+
+        chosen = framing.parse(connect.version_str)
+        name = chosen[0] if chosen else framing.CLASSIC
+        if name not in client.framings:
+            raise framing.FramingError("server chose framing %r" % name)
+        client.conn.set_framing(name)
+        if compression.accepted(connect.version_str):
+            level = client.compress_level
+            if level is None:
+                level = compression.DEFAULT_LEVEL
+            client.conn.set_compression(level)
 
         login = messages.login(client.game.name)
         client.handler = LoginResultHandler(client)
-        client.send(login)
+        client.send(login, flush=True)
 
 class LoginResultHandler(Handler):
     expected_types = [ghack_pb2.Message.LOGINRESULT]
@@ -126,38 +318,71 @@ class LoginResultHandler(Handler):
         login_result = msg.login_result
 
         if not login_result.succeeded:
-            sys.stderr.write("Login failed: " +
-                    LOGIN_FAILS[login_result.reason])
-            client.close()
-        client.handler = GameHandler(client)
-        client.connected = True
+            sys.stderr.write("Login failed: %s\n" % LOGIN_FAILS.get(
+                login_result.reason, "unknown reason"))
+            # Logging in again would only fail again
+            client.reconnecting = False
+            client.conn.close()
+            return
+        resumed = client.reconnecting
+        client.logged_in()
 
-        print >> sys.stderr, "Connection established"
+        if resumed:
+            # The game is already on screen
+            debug("Connection established")
+        else:
+            print >> sys.stderr, "Connection established"
+        if client.on_login:
+            client.on_login()
 
 
 class GameHandler(Handler):
     handlers = {
-            ghack_pb2.Message.ADDENTITY: lambda h: h.handle_add,
-            ghack_pb2.Message.REMOVEENTITY: lambda h: h.handle_remove,
-            ghack_pb2.Message.UPDATESTATE: lambda h: h.handle_update,
-            ghack_pb2.Message.ASSIGNCONTROL: lambda h: h.handle_assign_control,
+            ghack_pb2.Message.ADDENTITY: 'handle_add',
+            ghack_pb2.Message.REMOVEENTITY: 'handle_remove',
+            ghack_pb2.Message.UPDATESTATE: 'handle_update',
+            ghack_pb2.Message.ASSIGNCONTROL: 'handle_assign_control',
         }
     def handle_add(self, client, add):
-        args = {'id': add.id}
-        if add.name:
-            args['name'] = add.name
-        client.game.add_entity(**args)
+        client.world.add_entity(add.id, add.name or None)
 
     def handle_remove(self, client, remove):
-        args = {'id': remove.id}
-        if remove.name:
-            args['name'] = remove.name
-        client.game.remove_entity(**args)
+        client.world.remove_entity(remove.id, remove.name or None)
 
     def handle_update(self, client, update):
-        args = {'id': update.id, 'state_id': update.state_id}
-        args['value'] = messages.unwrap_state(update.value)
-        client.game.update_entity(**args)
+        state_id = update.state_id
+        if state_id in client.game.eager_states:
+            value = messages.unwrap_state(update.value)
+        else:
+            value = LazyState(update.value, messages.unwrap_state)
+        client.world.update_entity(update.id, state_id, value)
 
     def handle_assign_control(self, client, assign_control):
-        pass
+        self.assign_control(client, assign_control.uid,
+                assign_control.revoked)
+
+    def assign_control(self, client, uid, revoked):
+        client.world.assign_control(uid, revoked)
+        # Servers assign control once they have sent the world
+        if client.resyncing and not revoked:
+            client.end_resync()
+
+    def handle_decoded(self, client, decoded):
+        world = client.world
+        for item in decoded:
+            msg_type = item[0]
+            if msg_type == ghack_pb2.Message.UPDATESTATE:
+                msg_type, id, state_id, kind, value = item
+                if kind == decodepool.VECTOR:
+                    value = Vector(*value)
+                elif kind == decodepool.LAZY:
+                    value = LazyState(value, messages.unwrap_state_bytes)
+                world.update_entity(id, state_id, value)
+            elif msg_type == ghack_pb2.Message.ADDENTITY:
+                world.add_entity(item[1], item[2])
+            elif msg_type == ghack_pb2.Message.REMOVEENTITY:
+                world.remove_entity(item[1], item[2])
+            elif msg_type == ghack_pb2.Message.ASSIGNCONTROL:
+                self.assign_control(client, item[1], item[2])
+            else:
+                self.handle_msg(decodepool.parse(item[1]))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Per-frame coalescing of world updates
+"""
+
+class UpdateCoalescer(object):
+    """
+    Sits between GameHandler and Game with the same add/remove/update
+    interface, buffering everything until flush() applies it once a frame.
+
+    Only the last UpdateState for each (id, state_id) survives, applied
+    where it was received, so it stays on the same side of any AddEntity,
+    RemoveEntity or AssignControl as it arrived. Those keep their order,
+    and updates never merge across an add or remove of their entity.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.received = 0
+        self.applied = 0
+        self.batches = 0
+        self._ops = []
+        self._latest = {}
+        self._generation = {}
+
+    def __len__(self):
+        return len(self._ops)
+
+    def coalesced(self):
+        """Updates dropped because a later one replaced them"""
+        return self.received - self.applied - self._pending_updates()
+
+    def add_entity(self, id, name=None):
+        self._barrier(id)
+        self._queue(('add', id, name))
+
+    def remove_entity(self, id, name=None):
+        self._barrier(id)
+        self._queue(('remove', id, name))
+
+    def assign_control(self, id, revoked=False):
+        self._queue(('control', id, revoked))
+
+    def update_entity(self, id, state_id, value=None):
+        self.received += 1
+        key = (id, state_id, self._generation.get(id, 0))
+        op = self._latest.get(key)
+        if op is not None:
+            # Superseded; the new value goes where it arrived
+            op[0] = None
+        op = ['update', id, state_id, value]
+        self._latest[key] = op
+        self._queue(op)
+
+    def flush(self):
+        """Applies everything buffered to the game"""
+        if not self._ops:
+            return
+        ops = self._ops
+        self._ops = []
+        self._latest.clear()
+        self._generation.clear()
+        self.batches += 1
+        game = self.game
+        for op in ops:
+            kind = op[0]
+            if kind == 'update':
+                game.update_entity(op[1], op[2], op[3])
+                self.applied += 1
+            elif kind is None:
+                continue
+            elif kind == 'add':
+                game.add_entity(op[1], op[2])
+            elif kind == 'remove':
+                game.remove_entity(op[1], op[2])
+            else:
+                game.assign_control(op[1], op[2])
+
+    def _queue(self, op):
+        if not self._ops:
+            # Have the game loop schedule the frame that will flush this
+            self.game.scheduler.mark_dirty()
+        self._ops.append(op)
+
+    def _barrier(self, id):
+        self._generation[id] = self._generation.get(id, 0) + 1
+
+    def _pending_updates(self):
+        return len(self._latest)
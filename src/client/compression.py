@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Optional zlib compression of the whole byte stream, under the framing.
+
+The client asks for it with "compress=zlib" in its Connect version_str
+and the server agrees by putting the same token in its reply. Like a
+framing switch, it starts right after the reply: the server flushes the
+reply uncompressed and compresses everything after it, the client
+inflates everything it receives after the reply and compresses from its
+Login on. Each side picks its own compression level.
+
+Every flush ends with a zlib sync flush, so each tick's writes can be
+inflated as soon as they arrive; the shared dictionary still spans the
+whole connection, which is where the repeated state names go.
+"""
+
+import time
+import zlib
+
+from metrics import registry
+
+ZLIB = 'zlib'
+
+DEFAULT_LEVEL = 6
+
+def offer():
+    """The version_str token asking for compression"""
+    return 'compress=' + ZLIB
+
+def accepted(version_str):
+    """Whether version_str asks for or agrees to compression"""
+    return ('compress=' + ZLIB) in (version_str or '').split()
+
+class ZlibStream(object):
+    """
+    One connection's compressor and decompressor, with byte counts and
+    the time spent in each, kept locally and in the metrics registry.
+    """
+    def __init__(self, level=DEFAULT_LEVEL, clock=time.time):
+        self.level = level
+        self.clock = clock
+        self._deflater = zlib.compressobj(level)
+        self._inflater = zlib.decompressobj()
+        self.raw_out = self.wire_out = 0
+        self.wire_in = self.raw_in = 0
+        self.deflate_time = self.inflate_time = 0.0
+        self._raw_out = registry.counter('zlib_raw_out')
+        self._wire_out = registry.counter('zlib_wire_out')
+        self._wire_in = registry.counter('zlib_wire_in')
+        self._raw_in = registry.counter('zlib_raw_in')
+        self._deflate_time = registry.histogram('deflate_time')
+        self._inflate_time = registry.histogram('inflate_time')
+
+    def compress(self, data):
+        """Compress data, flushed so the peer can inflate all of it"""
+        start = self.clock()
+        wire = self._deflater.compress(data) + \
+                self._deflater.flush(zlib.Z_SYNC_FLUSH)
+        elapsed = self.clock() - start
+        self.raw_out += len(data)
+        self.wire_out += len(wire)
+        self.deflate_time += elapsed
+        self._raw_out.value += len(data)
+        self._wire_out.value += len(wire)
+        self._deflate_time.observe(elapsed)
+        return wire
+
+    def decompress(self, wire):
+        start = self.clock()
+        data = self._inflater.decompress(wire)
+        elapsed = self.clock() - start
+        self.wire_in += len(wire)
+        self.raw_in += len(data)
+        self.inflate_time += elapsed
+        self._wire_in.value += len(wire)
+        self._raw_in.value += len(data)
+        self._inflate_time.observe(elapsed)
+        return data
+
+    def ratio_in(self):
+        """Received bytes before compression per byte on the wire"""
+        if not self.wire_in:
+            return 0.0
+        return float(self.raw_in) / self.wire_in
+
+    def ratio_out(self):
+        if not self.wire_out:
+            return 0.0
+        return float(self.raw_out) / self.wire_out
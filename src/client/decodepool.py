@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Optional decoding of received frames off the reactor thread.
+
+Once logged in, a GhackProtocol given a DecodePool sends every complete
+frame it reads to the pool in batches, instead of parsing them in
+dataReceived. Workers parse the game messages into plain tuples, which
+are cheap to send back from a process:
+
+    (UPDATESTATE, id, state_id, kind, value)
+    (ADDENTITY or REMOVEENTITY, id, name)
+    (ASSIGNCONTROL, uid, revoked)
+    (any other type, frame)
+
+where kind says whether value is the state itself, a VECTOR3 as an
+(x, y, z) tuple, or a serialized StateValue to be decoded lazily, as for
+every state not in the game's eager_states. Messages of other types are
+left for the reactor to parse. Batches come back to the reactor thread,
+and are handed on strictly in the order their frames arrived.
+
+Processes let decoding use other cores; threads share the interpreter
+lock with the reactor, so they only help if the protobuf library
+releases it.
+"""
+
+import time
+
+from twisted.internet import reactor
+
+from proto import protocol_pb2 as ghack_pb2
+import messages
+from metrics import registry
+
+THREAD = 'thread'
+PROCESS = 'process'
+
+# Frames per task sent to the pool
+BATCH = 256
+
+# Batches a connection may have in the pool before it stops reading
+MAX_IN_FLIGHT = 64
+
+# What the value of a decoded UpdateState holds
+STATE, VECTOR, LAZY = range(3)
+
+# Message types the workers decode; others come back as frames
+DECODED = frozenset([
+        ghack_pb2.Message.UPDATESTATE,
+        ghack_pb2.Message.ADDENTITY,
+        ghack_pb2.Message.REMOVEENTITY,
+        ghack_pb2.Message.ASSIGNCONTROL,
+    ])
+
+def decode_frame(frame, eager_states):
+    msg = ghack_pb2.Message()
+    msg.ParseFromString(frame)
+    msg_type = msg.type
+    if msg_type == ghack_pb2.Message.UPDATESTATE:
+        update = msg.update_state
+        state_id = update.state_id
+        value = update.value
+        if state_id not in eager_states:
+            return (msg_type, update.id, state_id, LAZY,
+                    value.SerializeToString())
+        if value.type == ghack_pb2.StateValue.VECTOR3:
+            v = value.vector3_val
+            return msg_type, update.id, state_id, VECTOR, (v.x, v.y, v.z)
+        return (msg_type, update.id, state_id, STATE,
+                messages.unwrap_state(value))
+    elif msg_type == ghack_pb2.Message.ADDENTITY:
+        return msg_type, msg.add_entity.id, msg.add_entity.name or None
+    elif msg_type == ghack_pb2.Message.REMOVEENTITY:
+        return msg_type, msg.remove_entity.id, msg.remove_entity.name or None
+    elif msg_type == ghack_pb2.Message.ASSIGNCONTROL:
+        return (msg_type, msg.assign_control.uid,
+                msg.assign_control.revoked)
+    return msg_type, frame
+
+def decode_frames(frames, eager_states):
+    """
+    The pool's task: returns (True, decoded frames, seconds spent), or
+    (False, error, seconds) so a corrupt frame reaches the reactor rather
+    than the pool's log
+    """
+    start = time.time()
+    try:
+        decoded = [decode_frame(frame, eager_states) for frame in frames]
+    except Exception, e:
+        return False, "%s: %s" % (e.__class__.__name__, e), 0.0
+    return True, decoded, time.time() - start
+
+def parse(frame):
+    """The Message in a frame the workers left alone"""
+    msg = ghack_pb2.Message()
+    msg.ParseFromString(frame)
+    return msg
+
+class DecodePool(object):
+    """
+    A pool of decoding workers, threads or processes, that any number of
+    connections can share. Processes are forked when the pool is made, so
+    make it before the reactor runs.
+    """
+    def __init__(self, workers=2, mode=PROCESS, batch=BATCH,
+            eager_states=frozenset()):
+        if mode == THREAD:
+            from multiprocessing.pool import ThreadPool
+            self.pool = ThreadPool(workers)
+        elif mode == PROCESS:
+            from multiprocessing import Pool
+            self.pool = Pool(workers)
+        else:
+            raise ValueError("unknown decode pool mode %r" % mode)
+        self.workers = workers
+        self.mode = mode
+        self.batch = batch
+        self.eager_states = frozenset(eager_states)
+
+    def stream(self, deliver):
+        return DecodeStream(self, deliver)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+class DecodeStream(object):
+    """
+    One connection's batches in the pool. deliver(ok, decoded) is called
+    on the reactor thread for each batch in the order submitted, with ok
+    false and an error string if a frame would not parse.
+    """
+    def __init__(self, pool, deliver):
+        self.pool = pool
+        self.batch = pool.batch
+        self.deliver = deliver
+        self._submitted = 0
+        self._delivered = 0
+        self._done = {}
+        self._started = {}
+        self._latency = registry.histogram('decode_latency')
+        self._decode_time = registry.histogram('decode_time')
+
+    def __len__(self):
+        """Batches submitted and not yet delivered"""
+        return self._submitted - self._delivered
+
+    def submit(self, frames):
+        sequence = self._submitted
+        self._submitted += 1
+        self._started[sequence] = time.time()
+        def finished(result):
+            # Runs on one of the pool's threads
+            reactor.callFromThread(self._finished, sequence, result)
+        self.pool.pool.apply_async(decode_frames,
+                (frames, self.pool.eager_states), callback=finished)
+
+    def close(self):
+        """Drop whatever is still in the pool"""
+        self.deliver = None
+
+    def _finished(self, sequence, result):
+        self._done[sequence] = result
+        # Later batches wait for the ones before them
+        while self._delivered in self._done:
+            sequence = self._delivered
+            ok, decoded, seconds = self._done.pop(sequence)
+            self._delivered += 1
+            self._latency.observe(time.time() - self._started.pop(sequence))
+            if decoded and ok:
+                # Per message, as the inline path measures it
+                self._decode_time.observe(seconds / len(decoded))
+            if self.deliver is not None:
+                self.deliver(ok, decoded)
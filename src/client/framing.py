@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Length-prefixed framing for Messages on the wire.
+
+Every connection starts with classic framing, a two byte little-endian
+length before each Message, which is all old servers speak. The Connect
+exchange can then switch both directions to one of:
+
+    varint  a protobuf style base 128 varint length
+    u32     a four byte big-endian length
+    batch   everything flushed together in one frame: a four byte
+            big-endian length, then each Message with a varint length
+
+The client lists the framings it takes in its Connect version_str, as
+"framing=batch,varint,u32", and the server names its choice the same way
+in its reply. A reply without one, as from old servers, keeps classic.
+Each side switches right after the Connect reply: the server once it has
+queued it, the client once it has read it, even from the middle of a
+received chunk.
+"""
+
+import struct
+
+# Classic framing: every Message is preceded by its length in two bytes
+HEADER = struct.Struct('<H')
+U32 = struct.Struct('>I')
+
+# Drop consumed bytes from the front of the buffer once this many pile up
+COMPACT_THRESHOLD = 64 * 1024
+
+# Longest frame accepted from the wire; anything longer is corrupt
+MAX_FRAME = 64 * 1024 * 1024
+
+CLASSIC = 'classic'
+VARINT = 'varint'
+U32BE = 'u32'
+BATCH = 'batch'
+
+# Framings this side supports, most preferred first
+FRAMINGS = (BATCH, VARINT, U32BE, CLASSIC)
+
+# Fixed size length headers; the others are varints
+HEADERS = {CLASSIC: HEADER, U32BE: U32, BATCH: U32}
+
+class FramingError(Exception):
+    pass
+
+def encode_varint(value):
+    parts = []
+    while value > 0x7f:
+        parts.append(chr(value & 0x7f | 0x80))
+        value >>= 7
+    parts.append(chr(value))
+    return ''.join(parts)
+
+def decode_varint(buf, pos):
+    """Returns (value, end) for the varint at pos, or None if incomplete"""
+    value = shift = 0
+    end = len(buf)
+    while pos < end:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 35:
+            raise FramingError("varint length too long")
+    return None
+
+def offer(framings=FRAMINGS):
+    """The version_str token listing the framings we accept"""
+    return 'framing=' + ','.join(framings)
+
+def parse(version_str):
+    """The framings named in a version_str, in order"""
+    for token in (version_str or '').split():
+        if token.startswith('framing='):
+            return [name for name in token[len('framing='):].split(',')
+                    if name]
+    return []
+
+def choose(version_str, supported=FRAMINGS):
+    """The first framing offered in version_str that we support"""
+    for name in parse(version_str):
+        if name in supported:
+            return name
+    return CLASSIC
+
+class FrameReader(object):
+    """
+    Accumulates received bytes and hands out complete frames.
+
+    Incoming data is appended to a growable bytearray and consumed through
+    a read cursor, so a burst holding many frames is split without copying
+    the unread remainder after every frame. The consumed prefix is only
+    discarded by compact(), and only when it is worth the memmove.
+    """
+    def __init__(self, compact_threshold=COMPACT_THRESHOLD,
+            framing=CLASSIC):
+        self._buffer = bytearray()
+        self._pos = 0
+        self._batch_end = 0
+        self.compact_threshold = compact_threshold
+        self.set_framing(framing)
+
+    def __len__(self):
+        """Number of received bytes not yet handed out as frames"""
+        return len(self._buffer) - self._pos
+
+    def set_framing(self, framing):
+        """
+        Read frames after the current one with framing. Sets next_frame(),
+        which returns the next complete frame body, or None (non-blocking).
+        """
+        if framing not in FRAMINGS:
+            raise FramingError("unknown framing %r" % framing)
+        self.framing = framing
+        self._header = HEADERS.get(framing)
+        # next_frame is picked per framing, to keep branches off the
+        # per-frame path
+        if framing == BATCH:
+            self.next_frame = self._next_batched
+        elif self._header is not None:
+            self.next_frame = self._next_fixed
+        else:
+            self.next_frame = self._next_varint
+
+    def feed(self, data):
+        """Append received bytes"""
+        self._buffer.extend(data)
+
+    def take_unread(self):
+        """Remove and return the bytes not yet handed out as frames, as
+        when a switch in the transport changes what they mean"""
+        if self._batch_end:
+            raise FramingError("cannot take bytes from inside a batch")
+        data = str(self._buffer[self._pos:])
+        del self._buffer[:]
+        self._pos = 0
+        return data
+
+    def _next_fixed(self):
+        buf = self._buffer
+        header = self._header
+        start = self._pos + header.size
+        if len(buf) < start:
+            return None
+
+        frame_len = header.unpack_from(buf, self._pos)[0]
+        if frame_len > MAX_FRAME:
+            raise FramingError("frame of %d bytes is too long" % frame_len)
+        end = start + frame_len
+        if len(buf) < end:
+            return None
+
+        self._pos = end
+        return memoryview(buf)[start:end].tobytes()
+
+    def _next_varint(self):
+        buf = self._buffer
+        decoded = decode_varint(buf, self._pos)
+        if decoded is None:
+            return None
+        frame_len, start = decoded
+        if frame_len > MAX_FRAME:
+            raise FramingError("frame of %d bytes is too long" % frame_len)
+        end = start + frame_len
+        if len(buf) < end:
+            return None
+
+        self._pos = end
+        return memoryview(buf)[start:end].tobytes()
+
+    def _next_batched(self):
+        buf = self._buffer
+        while not self._batch_end:
+            # Wait for a whole batch, then hand out its Messages
+            start = self._pos + U32.size
+            if len(buf) < start:
+                return None
+            batch_len = U32.unpack_from(buf, self._pos)[0]
+            if batch_len > MAX_FRAME:
+                raise FramingError("batch of %d bytes is too long" %
+                        batch_len)
+            if len(buf) < start + batch_len:
+                return None
+            self._pos = start
+            if batch_len:
+                self._batch_end = start + batch_len
+
+        decoded = decode_varint(buf, self._pos)
+        if decoded is None or decoded[1] + decoded[0] > self._batch_end:
+            raise FramingError("message overruns its batch")
+        frame_len, start = decoded
+        self._pos = end = start + frame_len
+        if end == self._batch_end:
+            self._batch_end = 0
+        return memoryview(buf)[start:end].tobytes()
+
+    def compact(self):
+        """Release consumed bytes, cheaply when everything was consumed"""
+        if self._pos == len(self._buffer):
+            del self._buffer[:]
+            self._pos = 0
+        elif self._pos >= self.compact_threshold:
+            del self._buffer[:self._pos]
+            if self._batch_end:
+                self._batch_end -= self._pos
+            self._pos = 0
+
+class FrameWriter(object):
+    """
+    Queues outgoing frames in one preallocated buffer until take() is
+    called, so a whole tick worth of messages leaves in a single write.
+    With batch framing they also leave as a single frame.
+
+    Keeps running counters of how many messages and bytes each flush
+    carried.
+    """
+    def __init__(self, capacity=4096, framing=CLASSIC):
+        self._buffer = bytearray(capacity)
+        self._len = 0
+        self._batch_start = None
+        self.pending = 0
+        self.flushes = 0
+        self.messages_flushed = 0
+        self.bytes_flushed = 0
+        self.last_messages = 0
+        self.last_bytes = 0
+        self.set_framing(framing)
+
+    def __len__(self):
+        """Number of queued bytes"""
+        return self._len
+
+    def set_framing(self, framing):
+        """Frame messages appended from now on with framing"""
+        if framing not in FRAMINGS:
+            raise FramingError("unknown framing %r" % framing)
+        self._close_batch()
+        self.framing = framing
+        self._header = HEADERS.get(framing)
+        self._batch = framing == BATCH
+
+    def append(self, body):
+        """Queue a frame holding body"""
+        size = len(body)
+        if self._batch:
+            if self._batch_start is None:
+                # Room for the batch length, filled in by take()
+                self._batch_start = self._len
+                self._reserve(U32.size)
+            prefix = encode_varint(size)
+        elif self._header is HEADER:
+            if size > 0xffff:
+                raise FramingError("%d byte message is too long for "
+                        "classic framing" % size)
+            prefix = None
+        elif self._header is None:
+            prefix = encode_varint(size)
+        else:
+            prefix = U32.pack(size)
+
+        start = self._len
+        if prefix is None:
+            end = start + HEADER.size + size
+            if end > len(self._buffer):
+                self._grow(end)
+            HEADER.pack_into(self._buffer, start, size)
+        else:
+            end = start + len(prefix) + size
+            if end > len(self._buffer):
+                self._grow(end)
+            self._buffer[start:end - size] = prefix
+        self._buffer[end - size:end] = body
+        self._len = end
+        self.pending += 1
+
+    def take(self):
+        """Returns all queued bytes and empties the queue"""
+        self._close_batch()
+        data = memoryview(self._buffer)[:self._len].tobytes()
+        self.flushes += 1
+        self.messages_flushed += self.pending
+        self.bytes_flushed += self._len
+        self.last_messages = self.pending
+        self.last_bytes = self._len
+        self.pending = 0
+        self._len = 0
+        return data
+
+    def messages_per_flush(self):
+        if not self.flushes:
+            return 0.0
+        return float(self.messages_flushed) / self.flushes
+
+    def bytes_per_flush(self):
+        if not self.flushes:
+            return 0.0
+        return float(self.bytes_flushed) / self.flushes
+
+    def _close_batch(self):
+        """Fill in the length of the open batch, if any"""
+        start = self._batch_start
+        if start is not None:
+            U32.pack_into(self._buffer, start, self._len - start - U32.size)
+            self._batch_start = None
+
+    def _reserve(self, size):
+        end = self._len + size
+        if end > len(self._buffer):
+            self._grow(end)
+        self._len = end
+
+    def _grow(self, needed):
+        size = len(self._buffer) * 2
+        while size < needed:
+            size *= 2
+        self._buffer.extend(bytearray(size - len(self._buffer)))
@@ -4,9 +4,11 @@
 # Use of this source code is governed by the GNU General Public License
 # version 3 (or any later version). See the file COPYING for details.
 
+from array import array
+
 from proto import protocol_pb2 as ghack_pb2
 
-from game.objects import Vector
+from game.objects import Vector, VectorArray
 
 """
 Contains convenience functions to create the various protocol buffer messages
@@ -19,12 +21,48 @@ def unwrap(msg):
 def unwrap_state(state):
     """Unwraps a Message"""
     if state.type == ghack_pb2.StateValue.ARRAY:
-        return [unwrap_state(s) for s in state.array_val]
+        return unwrap_array(state.array_val)
     val = getattr(state, STATE_TYPES[state.type])
     if state.type in STATE_MAPPERS:
         return STATE_MAPPERS[state.type](val)
     return val
 
+def unwrap_state_bytes(data):
+    """Unwraps a serialized StateValue"""
+    state = ghack_pb2.StateValue()
+    state.ParseFromString(data)
+    return unwrap_state(state)
+
+def unwrap_array(values):
+    """
+    Unwraps an ARRAY's items. Arrays of all INT or all FLOAT become an
+    array.array, and arrays of all VECTOR3 a VectorArray; anything else
+    is unwrapped item by item into a list.
+    """
+    if not values:
+        return []
+    kind = values[0].type
+    if kind == ghack_pb2.StateValue.VECTOR3:
+        data = array('d')
+        extend = data.extend
+        for item in values:
+            if item.type != kind:
+                return [unwrap_state(s) for s in values]
+            v = item.vector3_val
+            extend((v.x, v.y, v.z))
+        return VectorArray(data)
+    typecode = ARRAY_TYPECODES.get(kind)
+    if typecode is None:
+        return [unwrap_state(s) for s in values]
+    field = STATE_TYPES[kind]
+    data = array(typecode)
+    append = data.append
+    for item in values:
+        if item.type != kind:
+            return [unwrap_state(s) for s in values]
+        append(getattr(item, field))
+    return data
+
 def login(name, authtoken='', permissions=0):
     msg = ghack_pb2.Message()
     msg.type = ghack_pb2.Message.LOGIN
@@ -33,10 +71,12 @@ def login(name, authtoken='', permissions=0):
     msg.login.permissions = permissions
     return msg
 
-def connect(version):
+def connect(version, version_str=''):
     msg = ghack_pb2.Message()
     msg.type = ghack_pb2.Message.CONNECT
     msg.connect.version = version
+    if version_str:
+        msg.connect.version_str = version_str
     return msg
 
 def disconnect(reason, reason_str=''):
@@ -58,6 +98,76 @@ def move(direction):
     msg.move.direction.z = direction.z
     return msg
 
+# Server side messages, used by the stand-in server and benchmarks
+
+def login_result(succeeded, reason=None):
+    msg = ghack_pb2.Message()
+    msg.type = ghack_pb2.Message.LOGINRESULT
+    msg.login_result.succeeded = succeeded
+    if reason is not None:
+        msg.login_result.reason = reason
+    return msg
+
+def add_entity(id, name=''):
+    msg = ghack_pb2.Message()
+    msg.type = ghack_pb2.Message.ADDENTITY
+    msg.add_entity.id = id
+    if name:
+        msg.add_entity.name = name
+    return msg
+
+def remove_entity(id, name=''):
+    msg = ghack_pb2.Message()
+    msg.type = ghack_pb2.Message.REMOVEENTITY
+    msg.remove_entity.id = id
+    if name:
+        msg.remove_entity.name = name
+    return msg
+
+def update_state(id, state_id, value):
+    """value is a python value, wrapped as by wrap_state()"""
+    msg = ghack_pb2.Message()
+    msg.type = ghack_pb2.Message.UPDATESTATE
+    msg.update_state.id = id
+    msg.update_state.state_id = state_id
+    wrap_state(value, msg.update_state.value)
+    return msg
+
+def assign_control(uid, revoked=False):
+    msg = ghack_pb2.Message()
+    msg.type = ghack_pb2.Message.ASSIGNCONTROL
+    msg.assign_control.uid = uid
+    if revoked:
+        msg.assign_control.revoked = True
+    return msg
+
+def wrap_state(value, state=None):
+    """The inverse of unwrap_state: fills in (or creates) a StateValue"""
+    if state is None:
+        state = ghack_pb2.StateValue()
+    if isinstance(value, bool):
+        state.type = ghack_pb2.StateValue.BOOL
+        state.bool_val = value
+    elif isinstance(value, (int, long)):
+        state.type = ghack_pb2.StateValue.INT
+        state.int_val = value
+    elif isinstance(value, float):
+        state.type = ghack_pb2.StateValue.FLOAT
+        state.float_val = value
+    elif isinstance(value, basestring):
+        state.type = ghack_pb2.StateValue.STRING
+        state.string_val = value
+    elif isinstance(value, Vector):
+        state.type = ghack_pb2.StateValue.VECTOR3
+        state.vector3_val.x = value.x
+        state.vector3_val.y = value.y
+        state.vector3_val.z = value.z
+    else:
+        state.type = ghack_pb2.StateValue.ARRAY
+        for item in value:
+            wrap_state(item, state.array_val.add())
+    return state
+
 MESSAGE_TYPES = {
         ghack_pb2.Message.CONNECT: 'connect',
         ghack_pb2.Message.DISCONNECT: 'disconnect',
@@ -78,6 +188,12 @@ STATE_TYPES = {
         ghack_pb2.StateValue.VECTOR3: 'vector3_val',
     }
 
+# array.array typecodes for homogeneous ARRAYs of scalars
+ARRAY_TYPECODES = {
+        ghack_pb2.StateValue.INT: 'i',
+        ghack_pb2.StateValue.FLOAT: 'd',
+    }
+
 STATE_MAPPERS = {
         ghack_pb2.StateValue.VECTOR3: lambda v: Vector(v.x, v.y, v.z),
     }
@@ -10,7 +10,6 @@ ClientState is a class that keeps data in sync with the server for
 
 import sys
 import time
-import struct
 
 from twisted.internet import reactor
 from twisted.internet.endpoints import TCP4ClientEndpoint
@@ -18,73 +17,218 @@ from twisted.internet.protocol import Protocol, ClientFactory
 
 from proto import protocol_pb2 as ghack_pb2
 from states import Entity
+from metrics import registry, SAMPLE_EVERY
+import framing
+import compression
+import decodepool
 
-def connect(host, port, on_connected):
-    """Create a GhackProtocol connection and fire on_connected"""
+def connect(host, port, on_connected, on_error=None):
+    """
+    Create a GhackProtocol connection and fire on_connected. Failure to
+    connect stops the reactor unless on_error is given.
+    """
 
     point = TCP4ClientEndpoint(reactor, host, port)
     d = point.connect(GhackClientFactory())
     if on_connected:
         d.addCallback(on_connected)
-    def on_error(err):
+    def stop_on_error(err):
         print >> sys.stderr, "Error connecting"
         print >> sys.stderr, err.getTraceback()
         if reactor.running:
             reactor.stop()
-    d.addErrback(on_error)
+    d.addErrback(on_error or stop_on_error)
 
 
 class GhackClientFactory(ClientFactory):
     def buildProtocol(self, addr):
         return GhackProtocol()
-    
-    def clientConnectionLost(self, connector, reason):
-        print >> sys.stderr, "Lost connection:", reason
-        if reactor.running:
-            reactor.stop()
 
 class GhackProtocol(Protocol):
     def __init__(self):
-        self._buffer = ''
+        self._reader = framing.FrameReader()
+        self.writer = framing.FrameWriter()
         self.callback = None
+        # Called with the reason when the connection goes, for reconnecting
+        self.on_lost = None
+        self.capture = None
+        self.stream = None
+        # A DecodeStream once frames are decoded off the reactor thread
+        self.decoder = None
+        self._deliver = None
+        self._paused = False
+        self._bytes_in = registry.counter('bytes_in')
+        self._frames_in = registry.counter('frames_in')
+        self._bytes_out = registry.counter('bytes_out')
+        self._frames_out = registry.counter('frames_out')
+        self._decode_time = registry.histogram('decode_time')
+        self._dispatch_time = registry.histogram('dispatch_time')
+        self._until_sample = SAMPLE_EVERY
+
+    def set_framing(self, framing):
+        """Switch both directions to framing, from the next frame on"""
+        self._reader.set_framing(framing)
+        self.writer.set_framing(framing)
+
+    def set_compression(self, level=compression.DEFAULT_LEVEL):
+        """Compress the stream both ways from here on"""
+        # Whatever is queued was meant to leave as it is
+        self.flush()
+        self.stream = compression.ZlibStream(level)
+        rest = self._reader.take_unread()
+        if rest:
+            self._reader.feed(self.stream.decompress(rest))
+
+    def decode_with(self, pool, deliver):
+        """
+        From the next read on, decode frames in pool, a DecodePool, and
+        hand deliver each batch of decoded messages in arrival order
+        """
+        self.decoder = pool.stream(self._decoded)
+        self._deliver = deliver
+
+    def buffered(self):
+        """Received bytes not yet handed out as messages"""
+        return len(self._reader)
 
     def dataReceived(self, data):
-        self._buffer += data
-
-        # flush the buffer of messages to send
-        while self.callback:
-            msg = self.get_message()
-            if not msg:
-                return
-            try:
-                self.callback(msg)
-            except:
-                self.close()
-                raise
+        if self.capture:
+            self.capture.write(data)
+        self._bytes_in.value += len(data)
+        if self.stream is not None:
+            data = self.stream.decompress(data)
+        self._reader.feed(data)
+        if self.decoder is not None:
+            self._submit_frames()
+            return
+
+        # dispatch every complete message in the buffer, then compact once
+        frames = 0
+        try:
+            # Time the first message of one read in SAMPLE_EVERY
+            self._until_sample -= 1
+            if self._until_sample <= 0 and self.callback:
+                self._until_sample = SAMPLE_EVERY
+                if not self._dispatch_timed():
+                    return
+                frames += 1
+            while self.callback:
+                msg = self.get_message()
+                if msg is None:
+                    return
+                frames += 1
+                try:
+                    self.callback(msg)
+                except:
+                    self.close()
+                    raise
+        finally:
+            self._frames_in.value += frames
+            self._reader.compact()
+
+    def _submit_frames(self):
+        """Sends every complete frame to the decoder, in batches"""
+        reader = self._reader
+        decoder = self.decoder
+        batch = decoder.batch
+        frames = []
+        count = 0
+        try:
+            frame = reader.next_frame()
+            while frame is not None:
+                frames.append(frame)
+                if len(frames) == batch:
+                    decoder.submit(frames)
+                    count += batch
+                    frames = []
+                frame = reader.next_frame()
+        finally:
+            reader.compact()
+        if frames:
+            decoder.submit(frames)
+            count += len(frames)
+        self._frames_in.value += count
+        if len(decoder) >= decodepool.MAX_IN_FLIGHT and not self._paused:
+            # Let TCP hold the rest until the pool catches up
+            self._paused = True
+            self.transport.pauseProducing()
+
+    def _decoded(self, ok, decoded):
+        if self._paused and len(self.decoder) <= decodepool.MAX_IN_FLIGHT // 2:
+            self._paused = False
+            self.transport.resumeProducing()
+        if not ok:
+            print >> sys.stderr, "Bad frame from the server:", decoded
+            self.decoder.close()
+            self.close()
+            return
+        start = time.time()
+        try:
+            self._deliver(decoded)
+        except:
+            self.decoder.close()
+            self.close()
+            raise
+        if decoded:
+            # Per message, as _dispatch_timed measures it
+            self._dispatch_time.observe((time.time() - start) / len(decoded))
+
+    def _dispatch_timed(self):
+        """Decodes and dispatches one message, timing both"""
+        start = time.time()
+        msg = self.get_message()
+        if msg is None:
+            return False
+        decoded = time.time()
+        try:
+            self.callback(msg)
+        except:
+            self.close()
+            raise
+        self._decode_time.observe(decoded - start)
+        self._dispatch_time.observe(time.time() - decoded)
+        return True
+
+    def connectionLost(self, reason):
+        if self.decoder is not None:
+            # A resync after reconnecting brings anything still in the pool
+            self.decoder.close()
+        if self.on_lost:
+            self.on_lost(reason)
 
     def call_later(self, time, fn):
-        reactor.callLater(time, fn)
+        return reactor.callLater(time, fn)
 
     def get_message(self):
         "Dispatches the next message from the server (non-blocking)"
-        if len(self._buffer) <= 2:
-            return None
-
-        msg_len = struct.unpack('H', self._buffer[:2])[0]
-        if len(self._buffer) < 2 + msg_len:
+        frame = self._reader.next_frame()
+        if frame is None:
             return None
 
         msg = ghack_pb2.Message()
-        msg.ParseFromString(self._buffer[2:msg_len + 2])
-
-        self._buffer = self._buffer[2 + msg_len:]
-
+        msg.ParseFromString(frame)
         return msg
 
     def send_bytes(self, byte_buffer):
         self.transport.write(byte_buffer)
 
+    def send_frame(self, msg_bytes):
+        "Queues a serialized message until the next flush()"
+        self.writer.append(msg_bytes)
+
+    def flush(self):
+        "Writes all queued messages in a single transport write"
+        if self.writer.pending:
+            self._frames_out.value += self.writer.pending
+            data = self.writer.take()
+            if self.stream is not None:
+                data = self.stream.compress(data)
+            self._bytes_out.value += len(data)
+            self.transport.write(data)
+
     def close(self):
-        reactor.stop()
+        """Drop this connection; the reactor and other connections go on"""
+        if self.transport:
+            self.transport.loseConnection()
 
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Reconnecting with backoff, keeping the world in between.
+
+When a logged in connection goes, the Client keeps Game.entities and the
+game goes on drawing them. The Reconnector connects again after a short,
+growing and jittered delay, and once the Client has logged in again the
+world the server sends is reconciled against the cached one rather than
+built from scratch (see Client.begin_resync).
+"""
+
+import sys
+import random
+
+from twisted.internet import reactor
+
+import netclient
+from debug import debug
+from metrics import registry
+
+# Seconds before the first attempt, growing by FACTOR up to MAX_DELAY
+INITIAL_DELAY = 0.25
+MAX_DELAY = 30.0
+FACTOR = 2.0
+
+# Each delay is stretched by up to this fraction, so clients dropped by
+# the same outage do not all come back at the same moment
+JITTER = 0.25
+
+class Reconnector(object):
+    """
+    Owns the Client's connections: makes the first one, then another
+    whenever one that had logged in is lost, until stop(). Gives up, and
+    calls on_give_up, when the first connection fails or a connection is
+    lost before logging in, as when the login is refused.
+    on_connected(protocol) wires up each new connection, as the caller
+    of netclient.connect() would, before the handshake starts.
+    """
+    def __init__(self, client, host, port, on_connected=None,
+            initial_delay=INITIAL_DELAY, max_delay=MAX_DELAY, factor=FACTOR,
+            jitter=JITTER):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.on_connected = on_connected
+        self.on_give_up = None
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.rng = random.Random()
+        self.attempts = 0
+        self.stopped = False
+        self._call = None
+        self._reconnects = registry.counter('reconnects')
+
+    def start(self):
+        netclient.connect(self.host, self.port, self._connected, self._failed)
+
+    def stop(self):
+        """Stop reconnecting, as when quitting"""
+        self.stopped = True
+        if self._call is not None and self._call.active():
+            self._call.cancel()
+        self._call = None
+
+    def delay(self):
+        """Seconds to wait before the next attempt"""
+        delay = min(self.initial_delay * self.factor ** self.attempts,
+                self.max_delay)
+        return delay * (1 + self.jitter * self.rng.random())
+
+    def _connected(self, protocol):
+        if self.stopped:
+            protocol.close()
+            return
+        protocol.on_lost = self._lost
+        if self.on_connected:
+            self.on_connected(protocol)
+        self.client.conn = protocol
+        protocol.callback = self.client.handle
+        self.client.run()
+
+    def _failed(self, err):
+        if self.stopped:
+            return
+        if not self.client.reconnecting:
+            self._give_up("Error connecting: %s" % err.getErrorMessage())
+            return
+        self._retry(err.getErrorMessage())
+
+    def _lost(self, reason):
+        if self.client.connected:
+            # It had logged in, so the next outage starts backing off anew
+            self.attempts = 0
+        self.client.connection_lost()
+        if self.stopped:
+            return
+        if not self.client.reconnecting:
+            self._give_up("Lost connection: %s" % reason.getErrorMessage())
+            return
+        self._retry(reason.getErrorMessage())
+
+    def _retry(self, why):
+        delay = self.delay()
+        self.attempts += 1
+        # The game keeps drawing meanwhile, so say so on screen, not stderr
+        debug("Lost connection:", why)
+        self.client.game.set_status("Reconnecting in %.1fs..." % delay)
+        self._call = reactor.callLater(delay, self._reconnect)
+
+    def _reconnect(self):
+        self._call = None
+        self._reconnects.value += 1
+        self.start()
+
+    def _give_up(self, why):
+        print >> sys.stderr, why
+        if self.on_give_up:
+            self.on_give_up()
@@ -8,5 +8,9 @@ import sys
 
 verbose = False
 def debug(*args):
+    """
+    Prints args to stderr, space separated, when verbose. They are only
+    converted to strings then, so pass values rather than formatting them.
+    """
     if verbose:
         print >> sys.stderr, ' '.join(map(str, args))
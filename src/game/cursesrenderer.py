@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+The curses terminal renderer
+"""
+
+import curses
+import sys
+
+import renderer
+from metrics import registry
+
+KEYS = {
+        curses.KEY_UP: renderer.KEY_UP,
+        curses.KEY_DOWN: renderer.KEY_DOWN,
+        curses.KEY_LEFT: renderer.KEY_LEFT,
+        curses.KEY_RIGHT: renderer.KEY_RIGHT,
+        curses.KEY_RESIZE: renderer.KEY_RESIZE,
+        ord('h'): renderer.KEY_DUMP,
+        ord('m'): renderer.KEY_STATS,
+        ord('q'): renderer.KEY_QUIT,
+    }
+
+class CursesRenderer(renderer.Renderer):
+    def __init__(self):
+        self.scr = curses.initscr()
+        curses.noecho()
+        curses.cbreak()
+        curses.start_color()
+        self.scr.keypad(1)
+        
+        curses.curs_set(0)
+        self.scr.nodelay(1)	# Make getch() non-blocking
+        curses.init_pair(1, curses.COLOR_GREEN, curses.COLOR_BLACK)
+        curses.init_pair(2, curses.COLOR_WHITE, curses.COLOR_BLUE)
+        curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLUE)
+        self.create_hud()
+
+    def fileno(self):
+        return sys.stdin.fileno()
+
+    def size(self):
+        return self.scr.getmaxyx()
+
+    def keys(self):
+        keys = []
+        ch = self.scr.getch()
+        while ch != -1:
+            if ch in KEYS:
+                keys.append(KEYS[ch])
+            ch = self.scr.getch()
+        return keys
+
+    def resize(self):
+        self.create_hud()
+
+    def close(self):
+        curses.nocbreak()
+        #stdscr.keypad(0)
+        curses.echo()
+        curses.endwin()
+
+    # Indirection so the drawing code can run against a fake screen
+    def color(self, pair):
+        return curses.color_pair(pair)
+
+    def doupdate(self):
+        curses.doupdate()
+
+    def create_hud(self):
+        y,x = self.scr.getmaxyx()
+        self.hudwin = self.statswin = None
+        try:
+            self.hudwin = curses.newwin(5,20,1,x-21)
+            self.hudwin.nodelay(1)
+            self.statswin = curses.newwin(12,25,6,x-26)
+        except curses.error:
+            sys.stderr.write("HUD cannot be created!\n")
+        
+    def draw_hud(self, player):
+        health = player.get_state('Health')
+        max_health = player.get_state('MaxHealth')
+        kills = player.get_state('KillCount')
+        if self.hudwin is None:
+            return
+        self.hudwin.erase()
+        try:
+            self.hudwin.addstr(1,1,"Health:",self.color(1) | curses.A_BOLD)
+            self.hudwin.addstr(1,8,"%s/%s"%(health,max_health),self.color(1))
+            self.hudwin.addstr(2,1,"Kills:",self.color(1)| curses.A_BOLD)
+            self.hudwin.addstr(2,8,str(kills),self.color(1))
+            self.hudwin.border()
+        except curses.error:
+            sys.stderr.write("HUD cannot be drawn!\n")
+        self.hudwin.noutrefresh()
+
+    def draw_stats(self):
+        """The metrics overlay, under the HUD"""
+        if self.statswin is None:
+            return
+        self.statswin.erase()
+        try:
+            for i, line in enumerate(registry.lines()):
+                self.statswin.addstr(i + 1, 1, line, self.color(3))
+            self.statswin.border()
+        except curses.error:
+            pass
+        self.statswin.noutrefresh()
+
+    def draw(self, game):
+        #print "%d Entities:" % len(game.entities)
+        self.scr.erase()
+        by,bx = self.scr.getbegyx()
+        my,mx = self.scr.getmaxyx()
+        def in_bounds(x,y):
+            return bx<x<mx and by<y<my
+        
+        midy, midx = my/2, mx/2
+        player, offsetx, offsety = game.camera(my, mx)
+        
+        for entity, pos, asset in game.visible(bx-offsetx, by-offsety,
+                mx-offsetx, my-offsety):
+            #self.scr.addstr(int(pos.y),int(pos.x), '⩕⎈☸⨳⩕⩖⩕@', curses.color_pair(2))
+            posx = pos.x + offsetx
+            posy = pos.y + offsety
+            if in_bounds(posx,posy):
+                self.scr.addstr(int(posy),int(posx), asset, self.color(2))
+        self.scr.border()
+        try:
+            self.scr.addstr(0,max(midx-9,0),"GHack SpiderForest",self.color(1))
+            if game.status:
+                self.scr.addstr(my-1,max(midx-len(game.status)/2,0),
+                        game.status,self.color(3) | curses.A_BOLD)
+        except curses.error:
+            print("oh no!")
+            
+        self.scr.noutrefresh()
+        if player:
+            self.draw_hud(player) 
+        if self.show_stats:
+            self.draw_stats()
+        self.doupdate()
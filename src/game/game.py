@@ -11,151 +11,270 @@ which is responsible for updating the game's state in response, and
 implementing the actual gameplay logic
 """
 
-import curses
 import sys
 import os
 
 from debug import debug
-from objects import Entity, Vector
+from objects import Entity, LazyState, Vector
+from interpolation import Interpolator
+from prediction import Predictor
+from render import RenderScheduler
+from spatial import SpatialGrid
+from store import StateStore
+from renderer import (KEY_UP, KEY_DOWN, KEY_LEFT, KEY_RIGHT, KEY_RESIZE,
+        KEY_DUMP, KEY_STATS, KEY_QUIT)
+
+# States an entity needs before it can be drawn as the player with a HUD
+PLAYER_STATES = ('Position', 'Health', 'MaxHealth', 'Asset', 'KillCount')
 
 class Game(object):
-    def __init__(self, name):
+    # States decoded as soon as they arrive, because the game reads them
+    # itself; everything else is kept as a LazyState until first read
+    eager_states = frozenset(PLAYER_STATES)
+
+    def __init__(self, name, fps=30, compact=False, renderer=None,
+            predict=True, interpolate=True):
         self.name = name
         self.entities = {}
+        self.store = StateStore() if compact else None
+        self.names = {}
+        self.controlled = None
+        self.running = False
         self.direction = Vector()
+        self.scheduler = RenderScheduler(fps)
+        self.grid = SpatialGrid()
+        self.predictor = Predictor() if predict else None
+        self.interpolator = Interpolator() if interpolate else None
+        # Shown over the world when set, like while reconnecting
+        self.status = None
+        # Kept entities the server has not sent again yet, while resyncing
+        self._unconfirmed = None
 
-        self._init_curses()
+        if renderer is None:
+            from cursesrenderer import CursesRenderer
+            renderer = CursesRenderer()
+        self.renderer = renderer
 
-    def _init_curses(self):
-        self.scr = curses.initscr()
-        curses.noecho()
-        curses.cbreak()
-        curses.start_color()
-        self.scr.keypad(1)
-        
-        curses.curs_set(0)
-        self.scr.nodelay(1)	# Make getch() non-blocking
-        curses.init_pair(1, curses.COLOR_GREEN, curses.COLOR_BLACK)
-        curses.init_pair(2, curses.COLOR_WHITE, curses.COLOR_BLUE)
-        curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLUE)
-        self.create_hud()
-        
     def update(self, elapsed_seconds):
-        """Runs every frame"""
-        self.running = True
-        self.redraw()
-        self._handle_input()
+        """Runs every simulation tick"""
+        if self.predictor is not None and self.predictor.update(
+                elapsed_seconds):
+            self.scheduler.mark_dirty()
+        if self.interpolator is not None and self.interpolator.active():
+            self.scheduler.mark_dirty()
+        if self.renderer.show_stats:
+            # Keep the metrics overlay current
+            self.scheduler.mark_dirty()
+
+    def render(self):
+        """Redraws if the scheduler says a frame is due"""
+        drawn = self.scheduler.frame(self.redraw)
+        if drawn and self.interpolator is not None and \
+                self.interpolator.active():
+            # Entities are between positions; keep drawing frames
+            self.scheduler.mark_dirty()
+        return drawn
 
     def add_entity(self, id, name=None):
+        if self._unconfirmed is not None and id in self._unconfirmed:
+            self._unconfirmed.discard(id)
+            if self.entities[id].name == name:
+                # Still there after a reconnect: keep it, states and all
+                return
         if id in self.entities:
-            debug("Entity id %d added twice" % id)
-        self.entities[id] = Entity(id, name)
+            debug("Entity id", id, "added twice")
+            self._unindex(self.entities[id])
+        entity = self.entities[id] = Entity(id, name)
+        if self.store is not None:
+            entity.states = self.store.view()
+        self.names.setdefault(name, set()).add(id)
+        self.scheduler.mark_dirty()
 
     def remove_entity(self, id, name=None):
         if id not in self.entities:
-            debug("Entity id %d removed without being added" % id)
+            debug("Entity id", id, "removed without being added")
             return
-        del self.entities[id]
+        if self._unconfirmed is not None:
+            self._unconfirmed.discard(id)
+        self._unindex(self.entities.pop(id))
+        if self.controlled == id:
+            self.controlled = None
+            if self.predictor is not None:
+                self.predictor.reset()
+        self.scheduler.mark_dirty()
+
+    def begin_resync(self):
+        """
+        Keep the world while a new session sends it again. Entities sent
+        again keep their states and history; end_resync() drops the rest.
+        """
+        self._unconfirmed = set(self.entities)
+
+    def end_resync(self):
+        """Drops entities the server did not send again; returns how many"""
+        stale = self._unconfirmed or ()
+        self._unconfirmed = None
+        for id in stale:
+            self.remove_entity(id)
+        return len(stale)
+
+    def set_status(self, status):
+        if status != self.status:
+            self.status = status
+            self.scheduler.mark_dirty()
 
     def update_entity(self, id, state_id, value=None):
         if id not in self.entities:
-            debug("Entity id %d updated without being added" % id)
+            debug("Entity id", id, "updated without being added")
             return
-        self.entities[id].set_state(state_id, value)
-        self.redraw()
+        entity = self.entities[id]
+        entity.set_state(state_id, value)
+        if state_id in PLAYER_STATES:
+            entity.ready = all(entity.states.has_key(s) for s in PLAYER_STATES)
+        if state_id == 'Position':
+            if value is None:
+                self.grid.remove(id)
+            else:
+                self.grid.move(id, value.x, value.y)
+            if id == self.controlled:
+                if self.predictor is not None:
+                    if value is None:
+                        self.predictor.reset()
+                    else:
+                        self.predictor.reconcile(value)
+            elif self.interpolator is not None:
+                if value is None:
+                    self.interpolator.remove(id)
+                else:
+                    self.interpolator.record(id, value)
+        self.scheduler.mark_dirty()
         
+    def assign_control(self, id, revoked=False):
+        """Record the entity this client controls, or that control was lost"""
+        if revoked:
+            if self.controlled == id:
+                self.controlled = None
+        else:
+            self.controlled = id
+            if self.interpolator is not None:
+                # Our own entity is never drawn from its history
+                self.interpolator.remove(id)
+        if self.predictor is not None:
+            self.predictor.reset()
+            if self.controlled in self.entities:
+                self.predictor.base = self.entities[
+                        self.controlled].get_state('Position')
+        self.scheduler.mark_dirty()
+
+    def predict_move(self, direction):
+        """Show a move that has just been sent to the server"""
+        if self.predictor is not None:
+            self.predictor.predict(direction)
+            self.scheduler.mark_dirty()
+
+    def position_of(self, entity):
+        """Where to draw entity, predicted for the controlled one"""
+        if self.predictor is not None and entity.id == self.controlled:
+            predicted = self.predictor.position()
+            if predicted is not None:
+                return predicted
+        return entity.get_state('Position')
+
     def get_player(self): 
-        for entity in self.entities.values():
-            if entity.name == "Player":
-                if entity.states.has_key('Position'):
-                    if entity.states.has_key('Health'):
-                        if entity.states.has_key('MaxHealth'):
-                            if entity.states.has_key('Asset'):
-                                if entity.states.has_key('KillCount'):
-                                    return entity
+        """Returns the controlled entity once it has all PLAYER_STATES"""
+        if self.controlled is not None:
+            entity = self.entities.get(self.controlled)
+            if entity and entity.ready:
+                return entity
+            return None
+        # Servers that never assign control: the first complete "Player"
+        for id in self.names.get("Player", ()):
+            entity = self.entities[id]
+            if entity.ready:
+                return entity
         return None
     
-    def create_hud(self):
-        y,x = self.scr.getmaxyx()
-        try:
-            self.hudwin = curses.newwin(5,20,1,x-21)
-            self.hudwin.nodelay(1)
-        except curses.error:
-            sys.stderr.write("HUD cannot be created!\n")
-        
-    def draw_hud(self, player):
-        health = player.states['Health']
-        max_health = player.states['MaxHealth']
-        kills = player.states['KillCount']
-        self.hudwin.erase()
-        try:
-            self.hudwin.addstr(1,1,"Health:",curses.color_pair(1) | curses.A_BOLD)
-            self.hudwin.addstr(1,8,"%s/%s"%(health,max_health),curses.color_pair(1))
-            self.hudwin.addstr(2,1,"Kills:",curses.color_pair(1)| curses.A_BOLD)
-            self.hudwin.addstr(2,8,str(kills),curses.color_pair(1))
-            self.hudwin.border()
-        except curses.error:
-            sys.stderr.write("HUD cannot be drawn!\n")
-        self.hudwin.noutrefresh()
+    def _unindex(self, entity):
+        ids = self.names.get(entity.name)
+        if ids:
+            ids.discard(entity.id)
+            if not ids:
+                del self.names[entity.name]
+        self.grid.remove(entity.id)
+        if self.interpolator is not None:
+            self.interpolator.remove(entity.id)
+        if self.store is not None:
+            self.store.release(entity.states)
 
-    def redraw(self):
-        #print "%d Entities:" % len(self.entities)
-        self.scr.erase()
-        def in_bounds(x,y):
-            by,bx = self.scr.getbegyx()
-            my,mx = self.scr.getmaxyx()
-            return bx<x<mx and by<y<my
-        
-        def restrict(x,lower,upper):
-            return min(max(lower,x),upper)
-        
+    def camera(self, height, width):
+        """
+        Returns (player, offsetx, offsety): the offsets that put the
+        player in the middle of a height x width view
+        """
         offsety = offsetx = 0
-        maxy, maxx = self.scr.getmaxyx()
-        midy, midx = maxy/2, maxx/2
         player = self.get_player()
         if player:
-            pos = player.states['Position'] 
-            offsety,offsetx = midy-pos.y,midx-pos.x
-        
-        
-        for entity in self.entities.values():
-            #print(entity.name, entity.states)
-            if entity.states.has_key('Position'):
-                pos = entity.states['Position']
-                if entity.states.has_key('Asset'):
-                    asset = entity.states['Asset']
-                    #self.scr.addstr(int(pos.y),int(pos.x), '⩕⎈☸⨳⩕⩖⩕@', curses.color_pair(2))
-                    posx = pos.x + offsetx
-                    posy = pos.y + offsety
-                    if in_bounds(posx,posy):
-                        self.scr.addstr(int(posy),int(posx), asset, curses.color_pair(2))
-        self.scr.border()
-        try:
-            self.scr.addstr(0,max(midx-9,0),"GHack SpiderForest",curses.color_pair(1))
-        except curses.error:
-            print("oh no!")
-            
-        self.scr.noutrefresh()
-        if player:
-            self.draw_hud(player) 
-        curses.doupdate()
+            pos = self.position_of(player)
+            offsety, offsetx = height/2 - pos.y, width/2 - pos.x
+        return player, offsetx, offsety
+
+    def visible(self, x0, y0, x1, y1):
+        """Yields (entity, position, asset) for drawables near a world box"""
+        predicted = None
+        if self.predictor is not None and self.controlled is not None:
+            predicted = self.predictor.position()
+        interpolator = self.interpolator
+        now = interpolator.clock() if interpolator is not None else None
+        # Only look at the grid buckets under the box
+        for id in self.grid.query(x0, y0, x1, y1):
+            entity = self.entities[id]
+            states = entity.states
+            asset = states.get('Asset')
+            if asset is None:
+                continue
+            if id == self.controlled:
+                # Drawn where the camera centres, never behind it
+                pos = predicted or states['Position']
+            elif interpolator is not None:
+                pos = interpolator.position(id, now) or states['Position']
+            else:
+                pos = states['Position']
+            # Both are normally eager; get_state decodes and caches if not
+            if type(asset) is LazyState:
+                asset = entity.get_state('Asset')
+            if type(pos) is LazyState:
+                pos = entity.get_state('Position')
+            yield entity, pos, asset
+
+    def redraw(self):
+        self.renderer.draw(self)
+
+    def handle_input(self):
+        """Handles every key pressed since the last call"""
+        for key in self.renderer.keys():
+            self._handle_key(key)
 
-    def _handle_input(self):
-        ch = self.scr.getch()
-        if ch == curses.KEY_UP:
+    def _handle_key(self, key):
+        if key == KEY_UP:
             self.move(0,-1)
-        elif ch == curses.KEY_DOWN:
+        elif key == KEY_DOWN:
             self.move(0,1)
-        elif ch == curses.KEY_LEFT:
+        elif key == KEY_LEFT:
             self.move(-1,0)
-        elif ch == curses.KEY_RIGHT:
+        elif key == KEY_RIGHT:
             self.move(1,0)
-        elif ch == curses.KEY_RESIZE:
-            self.create_hud()
-        elif ch == ord('h'):
+        elif key == KEY_RESIZE:
+            self.renderer.resize()
+            self.scheduler.mark_dirty()
+        elif key == KEY_DUMP:
             for entity in self.entities.values():
-                sys.stderr.write(str(entity.id) + str(entity.name)+str(entity.states)+"\n")
-        elif ch == ord('q'):
+                states = dict((state_id, entity.get_state(state_id))
+                        for state_id in entity.states.keys())
+                sys.stderr.write(str(entity.id) + str(entity.name)+str(states)+"\n")
+        elif key == KEY_STATS:
+            self.renderer.toggle_stats()
+            self.scheduler.mark_dirty()
+        elif key == KEY_QUIT:
             self.running = False
         
     def move(self, x, y):
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Smooth movement for entities the server moves
+"""
+
+import time
+from array import array
+
+from objects import Vector
+
+# Samples kept per entity
+HISTORY = 8
+
+# Bounds on how far behind the newest samples entities are drawn
+MIN_DELAY = 0.05
+MAX_DELAY = 1.0
+
+# Longest an entity keeps moving past its newest sample
+EXTRAPOLATE = 0.25
+
+# Steps longer than this many cells are jumps, not walks
+TELEPORT = 4
+
+# Weight of each new arrival interval in the running mean
+GAIN = 0.125
+
+class Interpolator(object):
+    """
+    Keeps a short history of timestamped positions for each entity and
+    draws entities a little in the past, between two known positions, so
+    they move smoothly however bursty the updates are. When the history
+    runs out an entity carries on at its last velocity for a moment, then
+    settles on its newest position.
+
+    Each entity's delay follows the time between its own updates: a
+    running mean plus twice its mean deviation, so late packets rarely
+    leave nothing to interpolate towards, and a slow or jittery entity
+    doesn't hold back the rest.
+
+    All histories share one array of doubles, HISTORY (time, x, y, z)
+    rings per slot, with slots reused through a free list. The per-slot
+    delay, mean interval, deviation and settle time are parallel arrays
+    indexed by slot.
+    """
+    def __init__(self, history=HISTORY, min_delay=MIN_DELAY,
+            max_delay=MAX_DELAY, extrapolate=EXTRAPOLATE, clock=time.time):
+        self.history = history
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.extrapolate = extrapolate
+        self.clock = clock
+        self._slots = {}
+        self._free = []
+        self._data = array('d')
+        self._heads = array('i')
+        self._counts = array('i')
+        self._delays = array('d')
+        self._means = array('d')
+        self._deviations = array('d')
+        self._settles = array('d')
+
+    def __len__(self):
+        return len(self._slots)
+
+    def record(self, id, position, now=None):
+        """Add a position that arrived for id at now"""
+        if now is None:
+            now = self.clock()
+        slot = self._slots.get(id)
+        if slot is None:
+            slot = self._slots[id] = self._allocate()
+        data = self._data
+        history = self.history
+        head = self._heads[slot]
+        count = self._counts[slot]
+        if count:
+            interval = now - data[4 * (slot * history + (head - 1) % history)]
+            # An idle entity starting again says nothing about jitter
+            if interval <= 2 * self.max_delay:
+                # Fold the time between updates into the delay
+                mean = self._means[slot]
+                error = interval - mean
+                mean += GAIN * error
+                self._means[slot] = mean
+                if error < 0:
+                    error = -error
+                deviation = self._deviations[slot]
+                deviation += GAIN * (error - deviation)
+                self._deviations[slot] = deviation
+                delay = mean + 2 * deviation
+                if delay < self.min_delay:
+                    delay = self.min_delay
+                elif delay > self.max_delay:
+                    delay = self.max_delay
+                self._delays[slot] = delay
+            if count < history:
+                self._counts[slot] = count + 1
+            # Drawn between samples until the newest is delay behind, then
+            # carried on for up to extrapolate more
+            self._settles[slot] = now + self._delays[slot] + self.extrapolate
+        else:
+            self._counts[slot] = 1
+        i = 4 * (slot * history + head)
+        data[i] = now
+        data[i + 1] = position.x
+        data[i + 2] = position.y
+        data[i + 3] = position.z
+        head += 1
+        self._heads[slot] = head if head < history else 0
+
+    def remove(self, id):
+        slot = self._slots.pop(id, None)
+        if slot is not None:
+            self._counts[slot] = 0
+            self._heads[slot] = 0
+            self._reset(slot)
+            self._free.append(slot)
+
+    def active(self, now=None):
+        """Whether some entity is still being drawn between samples"""
+        if not self._settles:
+            return False
+        if now is None:
+            now = self.clock()
+        return now < max(self._settles)
+
+    def delay(self, id):
+        """How far behind its newest sample id is drawn"""
+        slot = self._slots.get(id)
+        if slot is None:
+            return self.min_delay
+        return self._delays[slot]
+
+    def position(self, id, now):
+        """
+        Where id should be drawn at now, or None when it is simply at its
+        newest position
+        """
+        slot = self._slots.get(id)
+        if slot is None:
+            return None
+        count = self._counts[slot]
+        if count < 2:
+            return None
+        data = self._data
+        history = self.history
+        first = slot * history
+        head = self._heads[slot]
+        t = now - self._delays[slot]
+        i = 4 * (first + (head - 1) % history)
+        if t >= data[i]:
+            ahead = t - data[i]
+            if ahead >= self.extrapolate:
+                return None
+            # Past the newest sample: carry on at the last velocity a while
+            older = 4 * (first + (head - 2) % history)
+            span = data[i] - data[older]
+            if span <= 0:
+                return None
+            return self._between(older, i, 1 + ahead / span)
+
+        # Newest to oldest, for the first sample at or before t
+        for k in xrange(2, count + 1):
+            newer = i
+            i = 4 * (first + (head - k) % history)
+            if data[i] <= t:
+                return self._between(i, newer, (t - data[i]) /
+                        (data[newer] - data[i]))
+        # Older than the whole history
+        return Vector(data[i + 1], data[i + 2], data[i + 3])
+
+    def _between(self, a, b, fraction):
+        data = self._data
+        dx = data[b + 1] - data[a + 1]
+        dy = data[b + 2] - data[a + 2]
+        dz = data[b + 3] - data[a + 3]
+        if dx * dx + dy * dy + dz * dz > TELEPORT * TELEPORT:
+            # Jumps happen at once, when they are due
+            if fraction < 1:
+                return Vector(data[a + 1], data[a + 2], data[a + 3])
+            return Vector(data[b + 1], data[b + 2], data[b + 3])
+        return Vector(data[a + 1] + dx * fraction,
+                data[a + 2] + dy * fraction, data[a + 3] + dz * fraction)
+
+    def _allocate(self):
+        if self._free:
+            return self._free.pop()
+        slot = len(self._counts)
+        self._data.extend([0.0] * (4 * self.history))
+        self._heads.append(0)
+        self._counts.append(0)
+        self._delays.append(0.0)
+        self._means.append(0.0)
+        self._deviations.append(0.0)
+        self._settles.append(0.0)
+        self._reset(slot)
+        return slot
+
+    def _reset(self, slot):
+        self._delays[slot] = self.min_delay
+        self._means[slot] = self.min_delay
+        self._deviations[slot] = 0.0
+        self._settles[slot] = 0.0
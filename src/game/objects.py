@@ -8,15 +8,27 @@
 Basic entity and state types
 """
 
+from array import array
+
 class Entity(object):
+    __slots__ = ('id', 'name', 'states', 'ready')
+
     def __init__(self, id, name, **states):
         self.id = id
         self.name = name
         self.states = states
+        self.ready = False
 
     def set_state(self, state_id, val):
         self.states[state_id] = val
 
+    def get_state(self, state_id, default=None):
+        """A state's value, decoding a LazyState the first time it is read"""
+        val = self.states.get(state_id, default)
+        if type(val) is LazyState:
+            val = self.states[state_id] = val.value()
+        return val
+
     def __unicode__(self):
         return self.name
 
@@ -26,8 +38,28 @@ class Entity(object):
             name = name[:6] + '...'
         return "<Entity id=%d, name='%s'>" % (self.id, name)
 
+class LazyState(object):
+    """
+    A state value still in its wire form. Entity.get_state decodes it on
+    first read and caches the result in its place; the next update of the
+    state replaces both.
+    """
+    __slots__ = ('raw', 'decode')
+
+    def __init__(self, raw, decode):
+        self.raw = raw
+        self.decode = decode
+
+    def value(self):
+        return self.decode(self.raw)
+
+    def __repr__(self):
+        return repr(self.value())
+
 class Vector(object):
     """A simple vector structure"""
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x=0, y=0, z=0):
         self.x = x
         self.y = y
@@ -42,4 +74,45 @@ class Vector(object):
         return "Vector(%s,%s,%s)" % (self.x,self.y,self.z)
     
     def __str__(self):
-        return "<%s,%s,%s>" % (self.x,self.y,self.z)
\ No newline at end of file
+        return "<%s,%s,%s>" % (self.x,self.y,self.z)
+
+class VectorArray(object):
+    """
+    A sequence of vectors stored as N x 3 doubles in one flat array, so a
+    long path is one buffer rather than N Vector objects. Indexing and
+    iterating give Vectors; as_numpy() gives an (N, 3) float64 view.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data=None):
+        self.data = array('d') if data is None else data
+
+    def __len__(self):
+        return len(self.data) // 3
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("VectorArray index out of range")
+        data = self.data
+        return Vector(data[3 * i], data[3 * i + 1], data[3 * i + 2])
+
+    def __iter__(self):
+        data = self.data
+        for i in xrange(0, len(data), 3):
+            yield Vector(data[i], data[i + 1], data[i + 2])
+
+    def __eq__(self, other):
+        return isinstance(other, VectorArray) and self.data == other.data
+
+    def __ne__(self, other):
+        return not self == other
+
+    def as_numpy(self):
+        """The vectors as an (N, 3) numpy array sharing this buffer"""
+        import numpy
+        return numpy.frombuffer(self.data, numpy.float64).reshape(-1, 3)
+
+    def __repr__(self):
+        return "VectorArray(%r)" % list(self)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Client side prediction of the controlled entity's movement
+"""
+
+import time
+from collections import deque
+
+from objects import Vector
+
+# Seconds before an unanswered move is assumed lost
+MOVE_TIMEOUT = 1.0
+
+# Seconds for half of a correction to be smoothed away
+SMOOTHING = 0.05
+
+# Corrections smaller than this many cells snap into place
+SNAP = 0.05
+
+class Predictor(object):
+    """
+    Moves the controlled entity as soon as a Move is sent, instead of a
+    round trip later when the server's Position arrives.
+
+    Every sent move is tagged with a local sequence number and kept until
+    the server answers it. Move carries no sequence number on the wire,
+    so answers are matched by position: an authoritative Position retires
+    the oldest pending moves that lead from the previous one to it. A
+    Position no prefix leads to (a push, a teleport, or a clamped or
+    refused move) retires nothing: the pending moves are replayed from
+    it, and any that never get answered are dropped by the timeout.
+    That also copes with several moves answered by one update, as when
+    updates are coalesced. The predicted position is the authoritative
+    one plus the moves still pending. When a new authoritative position
+    disagrees with what was being shown, the difference is kept as an
+    offset that decays away, so the entity glides rather than jumps.
+    """
+    def __init__(self, timeout=MOVE_TIMEOUT, smoothing=SMOOTHING,
+            clock=time.time):
+        self.timeout = timeout
+        self.smoothing = smoothing
+        self.clock = clock
+        self.base = None
+        self.offset = Vector()
+        self.pending = deque()
+        self.sequence = 0
+        self.corrections = 0
+        self.lost = 0
+
+    def predict(self, direction):
+        """Record a sent move; returns its sequence number"""
+        self.sequence += 1
+        if self.base is not None:
+            self.pending.append((self.sequence, direction, self.clock()))
+        return self.sequence
+
+    def reconcile(self, position):
+        """Take an authoritative position for the controlled entity"""
+        shown = self.position()
+        for i in xrange(self._answered(position)):
+            self.pending.popleft()
+        self.base = position
+        self._correct(shown)
+
+    def update(self, elapsed):
+        """Decay the correction offset and forget moves that went
+        unanswered; returns whether the shown position changed"""
+        changed = False
+        if self.pending:
+            cutoff = self.clock() - self.timeout
+            if self.pending[0][2] < cutoff:
+                shown = self.position()
+                while self.pending and self.pending[0][2] < cutoff:
+                    self.pending.popleft()
+                    self.lost += 1
+                self._correct(shown)
+                changed = True
+        offset = self.offset
+        if offset.x or offset.y or offset.z:
+            decay = 0.5 ** (elapsed / self.smoothing) if self.smoothing else 0
+            offset.x *= decay
+            offset.y *= decay
+            offset.z *= decay
+            if offset.len_squared() < SNAP * SNAP:
+                self.offset = Vector()
+            changed = True
+        return changed
+
+    def position(self):
+        """Where the controlled entity should be drawn, or None"""
+        base = self.base
+        if base is None:
+            return None
+        x = base.x + self.offset.x
+        y = base.y + self.offset.y
+        z = base.z + self.offset.z
+        for sequence, direction, sent in self.pending:
+            x += direction.x
+            y += direction.y
+            z += direction.z
+        return Vector(x, y, z)
+
+    def reset(self):
+        """Forget everything, as when control changes hands"""
+        self.base = None
+        self.offset = Vector()
+        self.pending.clear()
+
+    def _answered(self, position):
+        """How many of the oldest pending moves position accounts for"""
+        if not self.pending or self.base is None:
+            return 0
+        x, y, z = self.base.x, self.base.y, self.base.z
+        count = 0
+        for sequence, direction, sent in self.pending:
+            x += direction.x
+            y += direction.y
+            z += direction.z
+            count += 1
+            if (abs(x - position.x) < SNAP and abs(y - position.y) < SNAP and
+                    abs(z - position.z) < SNAP):
+                return count
+        return 0
+
+    def _correct(self, shown):
+        """Keep the entity at shown, to be smoothed toward the prediction"""
+        if shown is None:
+            return
+        self.offset = Vector()
+        target = self.position()
+        error = Vector(shown.x - target.x, shown.y - target.y,
+                shown.z - target.z)
+        if error.len_squared() >= SNAP * SNAP:
+            self.offset = error
+            self.corrections += 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Frame scheduling for redraws
+"""
+
+import time
+from collections import deque
+
+from metrics import registry
+
+class RenderScheduler(object):
+    """
+    Draws at most once per frame, and only when something changed.
+
+    Incoming state marks the world dirty; frame() is called every game loop
+    frame and only redraws when the world is dirty and the fps cap allows
+    it. An fps of 0 disables the cap. If on_dirty is set, it is called
+    whenever the world goes from clean to dirty, so an event driven loop
+    can schedule the next frame instead of polling.
+
+    The frame_interval histogram only sees back-to-back frames, where the
+    world went dirty again before the cap (or, uncapped, the draw itself)
+    let the next frame through, so idle gaps don't read as jitter.
+    """
+    def __init__(self, fps=30, history=120, clock=time.time):
+        self.fps = fps
+        self.clock = clock
+        self.dirty = True
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        self.draw_times = deque(maxlen=history)
+        self.total_draw_time = 0.0
+        self._last_draw = None
+        self._next_due = None
+        self._dirtied = None
+        self.on_dirty = None
+        self._redraw_time = registry.histogram('redraw_time')
+        self._frame_interval = registry.histogram('frame_interval')
+
+    def mark_dirty(self):
+        """Note that the world has changed since the last draw"""
+        if not self.dirty:
+            self.dirty = True
+            self._dirtied = self.clock()
+            if self.on_dirty:
+                self.on_dirty()
+
+    def frame(self, draw):
+        """Call draw() if due, returns whether it was called"""
+        now = self.clock()
+        if not self.dirty or self._throttled(now):
+            self.frames_skipped += 1
+            return False
+
+        self.dirty = False
+        draw()
+        elapsed = self.clock() - now
+        self.draw_times.append(elapsed)
+        self.total_draw_time += elapsed
+        self.frames_drawn += 1
+        self._redraw_time.observe(elapsed)
+        if self._next_due is not None and self._dirtied <= self._next_due:
+            self._frame_interval.observe(now - self._last_draw)
+        self._last_draw = now
+        if self.fps:
+            self._next_due = now + 1.0 / self.fps
+        else:
+            self._next_due = now + elapsed
+        return True
+
+    def last_draw_time(self):
+        if not self.draw_times:
+            return 0.0
+        return self.draw_times[-1]
+
+    def mean_draw_time(self):
+        if not self.frames_drawn:
+            return 0.0
+        return self.total_draw_time / self.frames_drawn
+
+    def delay(self):
+        """Seconds until the fps cap allows the next draw"""
+        if not self.fps or self._last_draw is None:
+            return 0.0
+        return max(0.0, self._last_draw + 1.0 / self.fps - self.clock())
+
+    def _throttled(self, now):
+        if not self.fps or self._last_draw is None:
+            return False
+        return now - self._last_draw < 1.0 / self.fps
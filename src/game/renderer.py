@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Renderer backends. A renderer draws the Game's world and supplies its
+input as backend independent key names; the Game itself never talks to
+the terminal.
+"""
+
+import time
+from collections import deque
+
+# Keys the Game understands
+KEY_UP = 'up'
+KEY_DOWN = 'down'
+KEY_LEFT = 'left'
+KEY_RIGHT = 'right'
+KEY_RESIZE = 'resize'
+KEY_DUMP = 'dump'
+KEY_STATS = 'stats'
+KEY_QUIT = 'quit'
+
+class Renderer(object):
+    """
+    The interface every backend implements. The defaults are a fixed
+    size view that draws nothing and reads no keys.
+    """
+    show_stats = False
+    height = 24
+    width = 80
+
+    def fileno(self):
+        """File descriptor that becomes readable on input, or None"""
+        return None
+
+    def size(self):
+        """Returns (height, width) of the view in cells"""
+        return self.height, self.width
+
+    def draw(self, game):
+        """Draws a frame of game"""
+        pass
+
+    def keys(self):
+        """Returns the keys pressed since the last call"""
+        return []
+
+    def resize(self):
+        """Called when the view has changed size"""
+        pass
+
+    def toggle_stats(self):
+        """Show or hide the metrics overlay"""
+        self.show_stats = not self.show_stats
+
+    def close(self):
+        """Releases the output device"""
+        pass
+
+class ScriptedInput(object):
+    """
+    Key source for headless runs. Keys can be pushed programmatically,
+    or given as a script of (seconds, key) pairs that become due that
+    many seconds after the first poll.
+    """
+    def __init__(self, script=(), clock=time.time):
+        self.clock = clock
+        self._queue = deque()
+        self._script = deque(sorted(script))
+        self._start = None
+
+    def push(self, *keys):
+        self._queue.extend(keys)
+
+    def keys(self):
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        while self._script and self._script[0][0] <= now - self._start:
+            self._queue.append(self._script.popleft()[1])
+        keys = list(self._queue)
+        self._queue.clear()
+        return keys
+
+    def done(self):
+        """True once the script and queue are exhausted"""
+        return not self._script and not self._queue
+
+    @classmethod
+    def parse(cls, script):
+        """Builds a ScriptedInput from 'seconds:key,seconds:key,...'"""
+        pairs = []
+        for item in script.split(','):
+            if item.strip():
+                when, key = item.split(':')
+                pairs.append((float(when), key.strip()))
+        return cls(pairs)
+
+class HeadlessRenderer(Renderer):
+    """
+    Keeps no screen at all: a frame walks the entities a screen of the
+    same size would show, without drawing them, and input comes from a
+    ScriptedInput. Lets a Game run as a bot or test process without a TTY.
+    """
+    def __init__(self, input=None, height=24, width=80):
+        self.input = input or ScriptedInput()
+        self.height = height
+        self.width = width
+        self.frames = 0
+        # Entities in view in the last frame
+        self.drawn = 0
+
+    def draw(self, game):
+        player, offsetx, offsety = game.camera(self.height, self.width)
+        drawn = 0
+        for entity, pos, asset in game.visible(-offsetx, -offsety,
+                self.width - offsetx, self.height - offsety):
+            drawn += 1
+        self.drawn = drawn
+        self.frames += 1
+
+    def keys(self):
+        return self.input.keys()
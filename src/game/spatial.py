@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Spatial index of entity positions
+"""
+
+class SpatialGrid(object):
+    """
+    A uniform grid of buckets holding entity ids.
+
+    Entities are moved between buckets as their positions change, so a
+    query only visits the buckets overlapping the requested rectangle
+    rather than every entity in the world.
+    """
+    def __init__(self, cell_size=16):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._where = {}
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, id):
+        return id in self._where
+
+    def cell(self, x, y):
+        """Returns the bucket key holding position x, y"""
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def move(self, id, x, y):
+        """Insert an entity, or move it to the bucket holding x, y"""
+        cell = self.cell(x, y)
+        old = self._where.get(id)
+        if old == cell:
+            return
+        if old is not None:
+            self._discard(id, old)
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            bucket = self._cells[cell] = set()
+        bucket.add(id)
+        self._where[id] = cell
+
+    def remove(self, id):
+        """Drop an entity from the index, if it is there"""
+        cell = self._where.pop(id, None)
+        if cell is not None:
+            self._discard(id, cell)
+
+    def query(self, x0, y0, x1, y1):
+        """Yields ids in the buckets overlapping the rectangle"""
+        cx0, cy0 = self.cell(x0, y0)
+        cx1, cy1 = self.cell(x1, y1)
+        cells = self._cells
+        for cy in xrange(cy0, cy1 + 1):
+            for cx in xrange(cx0, cx1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for id in bucket:
+                        yield id
+
+    def _discard(self, id, cell):
+        bucket = self._cells[cell]
+        bucket.discard(id)
+        if not bucket:
+            del self._cells[cell]
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Compact, column-backed storage for the frequently used entity states
+"""
+
+from array import array
+
+from objects import Vector
+
+# States held in columns, keyed to their bit in the presence mask
+POSITION = 'Position'
+INT_STATES = ('Health', 'MaxHealth', 'KillCount')
+OBJECT_STATES = ('Asset',)
+HOT_BITS = dict((state_id, 1 << i) for i, state_id in
+        enumerate((POSITION,) + INT_STATES + OBJECT_STATES))
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+class StateStore(object):
+    """
+    Holds the states every entity carries in columns, one slot per entity.
+
+    Position takes three doubles per slot and Health, MaxHealth and
+    KillCount an int32 each, all in contiguous arrays; Asset is a plain
+    list of references. The Vector a Position read returns is kept until
+    the Position changes, so drawing a frame does not build a new one
+    for every entity. A byte per slot records which of them are set.
+    Slots freed by release() are reused before the columns grow. Values
+    that do not fit a column (a float Health, say) fall back to the
+    entity's own dict.
+    """
+    def __init__(self, capacity=256):
+        self._capacity = 0
+        self._positions = array('d')
+        self._ints = dict((state_id, array('i')) for state_id in INT_STATES)
+        self._objects = dict((state_id, []) for state_id in OBJECT_STATES)
+        self._vectors = []
+        self._present = array('B')
+        self._free = []
+        self._used = 0
+        self._grow(capacity)
+
+    def __len__(self):
+        """Number of slots in use"""
+        return self._used - len(self._free)
+
+    def view(self):
+        """Allocates a slot and returns a StateView over it"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._used == self._capacity:
+                self._grow(self._capacity * 2)
+            slot = self._used
+            self._used += 1
+        self._present[slot] = 0
+        return StateView(self, slot)
+
+    def release(self, view):
+        """Returns the view's slot to the free list"""
+        slot = view._slot
+        if slot is None:
+            return
+        self._present[slot] = 0
+        for column in self._objects.itervalues():
+            column[slot] = None
+        self._vectors[slot] = None
+        self._free.append(slot)
+        view._slot = None
+        view._extra = None
+
+    def nbytes(self):
+        """Bytes held by the numeric columns"""
+        arrays = [self._positions, self._present] + self._ints.values()
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def get(self, slot, state_id):
+        """Returns the stored value; KeyError if it is not set"""
+        if not self._present[slot] & HOT_BITS[state_id]:
+            raise KeyError(state_id)
+        if state_id == POSITION:
+            vector = self._vectors[slot]
+            if vector is None:
+                i = slot * 3
+                p = self._positions
+                vector = self._vectors[slot] = Vector(p[i], p[i + 1],
+                        p[i + 2])
+            return vector
+        if state_id in self._ints:
+            return self._ints[state_id][slot]
+        return self._objects[state_id][slot]
+
+    def has(self, slot, state_id):
+        return bool(self._present[slot] & HOT_BITS[state_id])
+
+    def set(self, slot, state_id, value):
+        """Stores value, returns False if it does not fit the column"""
+        if state_id == POSITION:
+            if not isinstance(value, Vector):
+                self.clear(slot, state_id)
+                return False
+            i = slot * 3
+            p = self._positions
+            p[i] = value.x
+            p[i + 1] = value.y
+            p[i + 2] = value.z
+            self._vectors[slot] = None
+        elif state_id in self._ints:
+            if (type(value) not in (int, long) or
+                    not INT_MIN <= value <= INT_MAX):
+                self.clear(slot, state_id)
+                return False
+            self._ints[state_id][slot] = value
+        else:
+            self._objects[state_id][slot] = value
+        self._present[slot] |= HOT_BITS[state_id]
+        return True
+
+    def clear(self, slot, state_id):
+        self._present[slot] &= ~HOT_BITS[state_id] & 0xff
+        if state_id == POSITION:
+            self._vectors[slot] = None
+        elif state_id in self._objects:
+            self._objects[state_id][slot] = None
+
+    def set_states(self, slot):
+        """Returns the column state ids that are set"""
+        present = self._present[slot]
+        return [state_id for state_id, bit in HOT_BITS.iteritems()
+                if present & bit]
+
+    def _grow(self, capacity):
+        extra = capacity - self._capacity
+        self._positions.extend(array('d', [0.0]) * (extra * 3))
+        for column in self._ints.itervalues():
+            column.extend(array('i', [0]) * extra)
+        for column in self._objects.itervalues():
+            column.extend([None] * extra)
+        self._vectors.extend([None] * extra)
+        self._present.extend(array('B', [0]) * extra)
+        self._capacity = capacity
+
+class StateView(object):
+    """
+    Dict-like view of one entity's states. Column states live in the
+    StateStore, anything else in a per-entity dict made on first use.
+    """
+    __slots__ = ('_store', '_slot', '_extra')
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+        self._extra = None
+
+    def __getitem__(self, state_id):
+        if state_id in HOT_BITS and self._store.has(self._slot, state_id):
+            return self._store.get(self._slot, state_id)
+        if self._extra is None:
+            raise KeyError(state_id)
+        return self._extra[state_id]
+
+    def __setitem__(self, state_id, value):
+        if state_id in HOT_BITS and self._store.set(self._slot, state_id,
+                value):
+            if self._extra:
+                self._extra.pop(state_id, None)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[state_id] = value
+
+    def __delitem__(self, state_id):
+        if state_id in HOT_BITS and self._store.has(self._slot, state_id):
+            self._store.clear(self._slot, state_id)
+        elif self._extra is None:
+            raise KeyError(state_id)
+        else:
+            del self._extra[state_id]
+
+    def __contains__(self, state_id):
+        if state_id in HOT_BITS and self._store.has(self._slot, state_id):
+            return True
+        return self._extra is not None and state_id in self._extra
+
+    has_key = __contains__
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        keys = self._store.set_states(self._slot)
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def get(self, state_id, default=None):
+        try:
+            return self[state_id]
+        except KeyError:
+            return default
+
+    def items(self):
+        return [(state_id, self[state_id]) for state_id in self.keys()]
+
+    def values(self):
+        return [self[state_id] for state_id in self.keys()]
+
+    def __repr__(self):
+        return repr(dict(self.items()))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+The event driven game loop. Key presses, network traffic and a fixed
+rate simulation tick wake it up; rendering is scheduled only when the
+world has changed, capped by the Game's RenderScheduler.
+"""
+
+import time
+
+from zope.interface import implementer
+from twisted.internet import reactor, task
+from twisted.internet.interfaces import IReadDescriptor
+
+# Simulation ticks per second
+TICK_RATE = 20
+
+@implementer(IReadDescriptor)
+class InputReader(object):
+    """Wakes the game loop when the renderer's input becomes readable"""
+    def __init__(self, loop, fd):
+        self.loop = loop
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+    def doRead(self):
+        self.loop.on_input()
+
+    def connectionLost(self, reason):
+        pass
+
+    def logPrefix(self):
+        return 'input'
+
+class GameLoop(object):
+    def __init__(self, game, client, tick_rate=TICK_RATE):
+        self.game = game
+        self.client = client
+        self.tick_rate = tick_rate
+        self._reader = None
+        fd = game.renderer.fileno()
+        if fd is not None:
+            self._reader = InputReader(self, fd)
+        self._ticker = task.LoopingCall(self.tick)
+        self._render_call = None
+        self._last_tick = None
+
+    def start(self):
+        self.game.running = True
+        self.game.scheduler.on_dirty = self.request_render
+        if self._reader:
+            reactor.addReader(self._reader)
+        self._last_tick = time.time()
+        self._ticker.start(1.0 / self.tick_rate, now=False)
+        self.request_render()
+
+    def stop(self):
+        self.game.running = False
+        self.game.scheduler.on_dirty = None
+        if self._reader:
+            reactor.removeReader(self._reader)
+        if self._ticker.running:
+            self._ticker.stop()
+        if self._render_call and self._render_call.active():
+            self._render_call.cancel()
+        self._render_call = None
+
+    def tick(self):
+        """Fixed rate simulation step"""
+        now = time.time()
+        delta = now - self._last_tick
+        self._last_tick = now
+
+        # Picks up scripted input, and input that arrives without the
+        # renderer's fd becoming readable, like terminal resizes
+        self.game.handle_input()
+        if self._check_quit():
+            return
+        self.game.update(delta)
+        if self.client.connected:
+            self.client.update(delta)
+        if self.game.scheduler.dirty:
+            self.request_render()
+
+    def on_input(self):
+        """Key presses are handled, and moves sent, as soon as they arrive"""
+        self.game.handle_input()
+        if self._check_quit():
+            return
+        if self.client.connected:
+            self.client.update(0)
+
+    def request_render(self):
+        """Schedule a frame, no sooner than the fps cap allows"""
+        if self._render_call is None:
+            self._render_call = reactor.callLater(
+                    self.game.scheduler.delay(), self._render)
+
+    def _render(self):
+        self._render_call = None
+        # The world stays on screen, stale, while reconnecting
+        if not (self.client.connected or self.client.reconnecting):
+            return
+        self.client.apply_updates()
+        self.game.render()
+        if self.game.scheduler.dirty:
+            self.request_render()
+
+    def _check_quit(self):
+        if self.game.running:
+            return False
+        self.stop()
+        self.client.disconnect()
+        return True
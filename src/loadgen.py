@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Load generator: runs many headless clients on one reactor. Each does the
+normal Connect/Login handshake, then walks in a movement pattern while
+receiving the world. At the end it reports handshake latency, messages
+per second received and memory per client.
+
+    python src/loadgen.py --clients 100 --pattern square --duration 30
+"""
+
+import sys
+import os
+import time
+import random
+from optparse import OptionParser
+
+from main import generate_protoc
+
+# Movement patterns: functions of (bot, step) returning a key, or None
+PATTERNS = {
+        'none': lambda bot, step: None,
+        'random': lambda bot, step: bot.rng.choice(
+            ('up', 'down', 'left', 'right')),
+        'square': lambda bot, step: ('right', 'down', 'left', 'up')[
+            (step // 5) % 4],
+        'line': lambda bot, step: ('left', 'right')[(step // 10) % 2],
+    }
+
+def rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except IOError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class Bot(object):
+    """One headless Game/Client pair with its own stats"""
+    def __init__(self, index, options, decode_pool=None):
+        from client.client import Client
+        from game.game import Game
+        from game.renderer import HeadlessRenderer
+
+        self.index = index
+        self.rng = random.Random(options.seed + index)
+        self.pattern = PATTERNS[options.pattern]
+        self.move_rate = options.move_rate
+        self.tick_rate = options.tick_rate
+        self.renderer = HeadlessRenderer()
+        self.game = Game('%s%d' % (options.name, index), options.fps,
+                options.compact, self.renderer)
+        self.client = Client(self.game)
+        self.client.on_login = self.on_login
+        self.client.decode_pool = decode_pool
+        self.loop = None
+        self.started = None
+        self.handshake = None
+        self.messages = 0
+        self.error = None
+        self._mover = None
+        self._step = 0
+
+    def connect(self, host, port):
+        from client import netclient
+        self.started = time.time()
+        netclient.connect(host, port, self.on_connected, self.on_error)
+
+    def on_connected(self, protocol):
+        def callback(msg):
+            self.messages += 1
+            self.client.handle(msg)
+        protocol.callback = callback
+        handle_decoded = self.client.handle_decoded
+        def decoded_callback(decoded):
+            self.messages += len(decoded)
+            handle_decoded(decoded)
+        self.client.handle_decoded = decoded_callback
+        self.client.conn = protocol
+        self.client.run()
+
+    def on_error(self, err):
+        self.error = err.getErrorMessage()
+
+    def on_login(self):
+        from twisted.internet import task
+        from gameloop import GameLoop
+        self.handshake = time.time() - self.started
+        self.loop = GameLoop(self.game, self.client, self.tick_rate)
+        self.loop.start()
+        if self.move_rate > 0:
+            self._mover = task.LoopingCall(self.move)
+            self._mover.start(1.0 / self.move_rate, now=False)
+
+    def move(self):
+        key = self.pattern(self, self._step)
+        self._step += 1
+        if key:
+            self.renderer.input.push(key)
+
+    def stop(self):
+        if self._mover and self._mover.running:
+            self._mover.stop()
+        if self.loop:
+            self.loop.stop()
+        if self.client.connected:
+            self.client.disconnect()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def report(bots, elapsed, rss_before):
+    logged_in = [bot for bot in bots if bot.handshake is not None]
+    failed = [bot for bot in bots if bot.error]
+    print "clients:    %d started, %d logged in, %d failed to connect" % (
+            len(bots), len(logged_in), len(failed))
+    if not logged_in:
+        return
+    latencies = [bot.handshake * 1000 for bot in logged_in]
+    print "handshake:  min %.1f  median %.1f  p95 %.1f  max %.1f ms" % (
+            min(latencies), percentile(latencies, 0.5),
+            percentile(latencies, 0.95), max(latencies))
+    rates = [bot.messages / elapsed for bot in logged_in]
+    print "received:   %.0f msgs/s total, per client min %.0f  " \
+            "median %.0f  max %.0f" % (sum(rates), min(rates),
+            percentile(rates, 0.5), max(rates))
+    predictors = [bot.game.predictor for bot in logged_in
+            if bot.game.predictor is not None]
+    if predictors:
+        print "prediction: %d moves, %d corrected, %d unanswered" % (
+                sum(p.sequence for p in predictors),
+                sum(p.corrections for p in predictors),
+                sum(p.lost for p in predictors))
+    entities = [len(bot.game.entities) for bot in logged_in]
+    print "memory:     %.1f KB/client (rss), %.0f entities/client" % (
+            (rss_bytes() - rss_before) / 1024.0 / len(bots),
+            float(sum(entities)) / len(logged_in))
+
+def main(options, decode_pool=None):
+    from twisted.internet import reactor
+    import debug
+    debug.verbose = options.verbose
+
+    rss_before = rss_bytes()
+    bots = [Bot(i, options, decode_pool) for i in xrange(options.clients)]
+    # Stagger connects so the server's accept queue isn't the benchmark
+    for i, bot in enumerate(bots):
+        reactor.callLater(i * options.ramp, bot.connect, options.host,
+                int(options.port))
+
+    start = time.time()
+    def finish():
+        elapsed = time.time() - start
+        for bot in bots:
+            bot.stop()
+        report(bots, elapsed, rss_before)
+        reactor.stop()
+    reactor.callLater(options.duration, finish)
+
+if __name__ == '__main__':
+    parser = OptionParser()
+    parser.add_option('-s', '--host',
+            help='Server hostname',
+            default='localhost')
+    parser.add_option('-p', '--port',
+            help='Server port',
+            default='9190')
+    parser.add_option('-n', '--name',
+            help='Player name prefix',
+            default='bot')
+    parser.add_option('-c', '--clients',
+            help='Number of concurrent clients',
+            type='int',
+            default=10)
+    parser.add_option('-d', '--duration',
+            help='Seconds to run before reporting',
+            type='float',
+            default=10)
+    parser.add_option('--ramp',
+            help='Seconds between client connects',
+            type='float',
+            default=0.01)
+    parser.add_option('--pattern',
+            help='Movement pattern: ' + ', '.join(sorted(PATTERNS)),
+            choices=sorted(PATTERNS),
+            default='random')
+    parser.add_option('--move-rate',
+            help='Moves per second per client',
+            type='float',
+            default=5)
+    parser.add_option('--seed',
+            help='Random seed for movement',
+            type='int',
+            default=1)
+    parser.add_option('--fps',
+            help='Headless frames per second per client',
+            type='int',
+            default=10)
+    parser.add_option('--tick-rate',
+            help='Simulation ticks per second per client',
+            type='int',
+            default=20)
+    parser.add_option('--compact',
+            help='Keep hot entity states in compact arrays',
+            action='store_true',
+            default=False)
+    parser.add_option('--decode-workers',
+            help='Parse every client\'s game messages in one shared pool '
+                 'of this many worker processes',
+            type='int',
+            default=0)
+    parser.add_option('--decode-threads',
+            help='Use threads rather than processes for --decode-workers',
+            action='store_true',
+            default=False)
+    parser.add_option('-v', '--verbose',
+            action='store_true',
+            default=False)
+
+    options, args = parser.parse_args()
+    generate_protoc()
+
+    from main import decode_pool
+    from game.game import Game
+    pool = decode_pool(options, Game.eager_states)
+    from twisted.internet import reactor
+    reactor.callWhenRunning(main, options, pool)
+    reactor.run()
+    sys.exit(0)
@@ -6,80 +6,119 @@
 
 import sys
 import os
-import time
-from optparse import OptionParser
-import subprocess
-import curses
 import atexit
+from optparse import OptionParser
 
-from twisted.internet import reactor
+# The protocol bindings have to be current before anything imports them,
+# so everything past this point is imported inside the functions below.
+from proto import generate
 
-# It's bad form to put code before an import, unless it has to go there:
 def generate_protoc():
-    """Regenerate the protoc python code (call before importing)"""
-    path = os.path.dirname(os.path.realpath(__file__))
-    parent = os.path.dirname(path)
-    proto_dir = os.path.join(parent, 'protocol')
-    proto_file = os.path.join(proto_dir, 'protocol.proto')
-    output_dir = os.path.join(path, 'proto')
-    if os.path.exists(proto_file):
-        cmd = "protoc --proto_path=%(proto_dir)s --python_out=%(output_dir)s %(proto_file)s" % locals()
-
-        subprocess.call(cmd, shell=True)
-try:
-    generate_protoc()
-except:
-    print "Failed to generate protobuf file -- is protoc installed?"
-    sys.exit(1)
-
-
-from client import netclient
-from client.client import Client # redundaaaant
-from game.game import Game
-import debug
-
-# sleep 00ms between updates
-UPDATE_DELAY = 0.003
-
-def gameloop(game, client):
-    def inner(last_frame):
-        if not game.running:
-            client.disconnect()
-            return
-        this_frame = time.time()
-        delta = this_frame - last_frame
-        if client.connected:
-            game.update(delta)
-            client.update(delta)
-        reactor.callLater(UPDATE_DELAY, inner, this_frame)
-
-    last_frame = time.time() - UPDATE_DELAY
-    game.running = True
-    inner(last_frame)
-
-def run(host, port, name):
-    game = Game(name)
+    """Regenerate the protoc python code if the .proto changed"""
+    try:
+        generate.generate()
+    except Exception, e:
+        if not os.path.exists(generate.BINDINGS):
+            print "Failed to generate protobuf file -- is protoc installed?"
+            sys.exit(1)
+        print >> sys.stderr, "Using existing protobuf file:", e
+
+def run(host, port, name, flush_immediately=False, fps=30,
+        compact=False, tick_rate=20, renderer=None, capture=None,
+        coalesce=False, metrics=None, metrics_interval=5.0, predict=True,
+        move_rate=15, interpolate=True, framings=None, compress=None,
+        decode_pool=None):
+    from twisted.internet import reactor, task
+    from client.client import Client # redundaaaant
+    from client.reconnect import Reconnector
+    from game.game import Game
+    from gameloop import GameLoop
+    from metrics import registry
+
+    game = Game(name, fps, compact, renderer, predict, interpolate)
+    atexit.register(game.renderer.close)
     client = Client(game)
+    client.flush_immediately = flush_immediately
+    client.move_rate = move_rate
+    if framings:
+        client.framings = framings
+    client.compress_level = compress
+    client.decode_pool = decode_pool
+    if coalesce:
+        client.coalesce_updates()
+    registry.gauge('entities', lambda: len(game.entities))
+    if metrics:
+        metrics_file = open(metrics, 'a')
+        task.LoopingCall(registry.dump, metrics_file).start(metrics_interval)
+        atexit.register(registry.dump, metrics_file)
+
+    registry.gauge('receive_buffer',
+            lambda: client.conn.buffered() if client.conn else 0)
+    registry.gauge('send_buffer',
+            lambda: len(client.conn.writer) if client.conn else 0)
+    loop = GameLoop(game, client, tick_rate)
 
     def on_connected(protocol):
-        protocol.callback = lambda msg: client.handle(msg)
-        client.conn = protocol
-        client.run()
-        gameloop(game, client)
-
-    netclient.connect(host, port, on_connected)
+        if not game.running:
+            # The first connection; later ones are reconnects
+            if capture:
+                # Only the first session is recorded: a replay can't
+                # follow the stream into a new connection's handshake
+                from client.capture import Recorder
+                protocol.capture = Recorder(capture)
+                atexit.register(protocol.capture.close)
+            loop.start()
+
+    reconnector = Reconnector(client, host, port, on_connected)
+    def quit():
+        reconnector.stop()
+        if reactor.running:
+            reactor.stop()
+    client.on_disconnect = quit
+    reconnector.on_give_up = quit
+    reconnector.start()
     
-def cleanup():
-    curses.nocbreak()
-    #stdscr.keypad(0)
-    curses.echo()
-    curses.endwin()
-
+def decode_pool(options, eager_states):
+    """The DecodePool --decode-workers asks for, or None"""
+    if not options.decode_workers:
+        return None
+    from client.decodepool import DecodePool, THREAD, PROCESS
+    pool = DecodePool(options.decode_workers,
+            THREAD if options.decode_threads else PROCESS,
+            eager_states=eager_states)
+    atexit.register(pool.close)
+    return pool
 
 def main(options, args):
+    import debug
     debug.verbose = options.verbose
+    if options.trace:
+        import tracing
+        tracer = tracing.Tracer()
+        tracing.instrument(tracer)
+        atexit.register(tracer.write, options.trace)
+    from game.game import Game
+    # Forked first, so the workers copy as little as possible
+    pool = decode_pool(options, Game.eager_states)
+    renderer = None
+    if options.headless:
+        from game.renderer import HeadlessRenderer, ScriptedInput
+        renderer = HeadlessRenderer(ScriptedInput.parse(options.script))
     #(run,options.host,int(options.port),options.name)
-    run(options.host, int(options.port), options.name)
+    run(options.host, int(options.port), options.name,
+            options.flush_immediately, options.fps, options.compact,
+            options.tick_rate, renderer, options.capture, options.coalesce,
+            options.metrics, options.metrics_interval, options.predict,
+            options.move_rate, options.interpolate,
+            [name.strip() for name in options.framing.split(',')],
+            options.compress, pool)
+
+def startup_only():
+    """Does all the importing a normal run does, then exits"""
+    from twisted.internet import reactor
+    from client import netclient, client
+    from game import game, cursesrenderer
+    import gameloop
 
 if __name__ == '__main__':
     parser = OptionParser()
@@ -96,10 +135,94 @@ if __name__ == '__main__':
             help='Player name',
             action='store_true',
             default=False)
+    parser.add_option('--fps',
+            help='Maximum redraws per second, 0 for no limit',
+            type='int',
+            default=30)
+    parser.add_option('--tick-rate',
+            help='Simulation ticks per second',
+            type='int',
+            default=20)
+    parser.add_option('--compact',
+            help='Keep hot entity states in compact arrays',
+            action='store_true',
+            default=False)
+    parser.add_option('--coalesce',
+            help='Apply server updates once per frame, keeping only the '
+                 'last of each state',
+            action='store_true',
+            default=False)
+    parser.add_option('--no-predict',
+            help='Only move the player when the server says so',
+            action='store_false',
+            dest='predict',
+            default=True)
+    parser.add_option('--no-interpolate',
+            help='Draw other entities where the server last put them',
+            action='store_false',
+            dest='interpolate',
+            default=True)
+    parser.add_option('--move-rate',
+            help='Most moves sent per second, 0 for no limit',
+            type='int',
+            default=15)
+    parser.add_option('--framing',
+            help='Framings to offer the server, most preferred first: '
+                 'batch, varint, u32, classic',
+            default='batch,varint,u32,classic')
+    parser.add_option('--compress',
+            help='Ask the server for zlib stream compression, compressing '
+                 'what we send at this level (0-9)',
+            type='int',
+            metavar='LEVEL')
+    parser.add_option('--decode-workers',
+            help='Parse game messages in this many worker processes '
+                 'instead of on the reactor thread',
+            type='int',
+            default=0)
+    parser.add_option('--decode-threads',
+            help='Use threads rather than processes for --decode-workers',
+            action='store_true',
+            default=False)
+    parser.add_option('--flush-immediately',
+            help='Write each message as it is sent instead of once per frame',
+            action='store_true',
+            default=False)
+    parser.add_option('--headless',
+            help='Run without a terminal, taking input from --script',
+            action='store_true',
+            default=False)
+    parser.add_option('--script',
+            help='Headless key script: seconds:key,... with keys '
+                 'up, down, left, right and quit',
+            default='')
+    parser.add_option('--capture',
+            help='Record the raw server byte stream to this file',
+            metavar='FILE')
+    parser.add_option('--metrics',
+            help='Append a JSON line of runtime metrics to this file '
+                 'every --metrics-interval seconds',
+            metavar='FILE')
+    parser.add_option('--metrics-interval',
+            help='Seconds between --metrics lines',
+            type='float',
+            default=5.0)
+    parser.add_option('--trace',
+            help='Record spans of each stage and write them to this file '
+                 'in Chrome trace event format',
+            metavar='FILE')
+    parser.add_option('--startup-only',
+            help='Exit once everything is imported (for timing startup)',
+            action='store_true',
+            default=False)
     
-    atexit.register(cleanup)
-
     options, args = parser.parse_args()
+    generate_protoc()
+    if options.startup_only:
+        startup_only()
+        sys.exit(0)
+
+    from twisted.internet import reactor
     reactor.callWhenRunning(main, options, args)
     reactor.run()
     sys.exit(0)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Runtime metrics: counters, histograms and gauges in one registry.
+
+Instruments are looked up once, when the code using them is set up, and
+are cheap to update afterwards: a counter is an integer add, and hot paths
+only time one call in SAMPLE_EVERY. Gauges are functions, only called when
+a snapshot is taken.
+"""
+
+import json
+import math
+import time
+
+# Hot paths time one call (or one batch of calls) in this many
+SAMPLE_EVERY = 16
+
+# Histogram buckets per doubling of the observed value
+RESOLUTION = 4
+
+class Counter(object):
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+class Histogram(object):
+    """
+    Count, sum, extremes and logarithmic buckets of observed values, enough
+    for means, deviations and percentiles (to within a bucket, about 19%)
+    in constant space.
+    """
+    __slots__ = ('count', 'total', 'squares', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.squares += value * value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value > 0:
+            bucket = int(math.floor(math.log(value, 2) * RESOLUTION))
+        else:
+            bucket = float('-inf')
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def mean(self):
+        if not self.count:
+            return 0.0
+        return self.total / self.count
+
+    def stddev(self):
+        if not self.count:
+            return 0.0
+        mean = self.mean()
+        return math.sqrt(max(0.0, self.squares / self.count - mean * mean))
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of values"""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= wanted:
+                return min(2 ** ((bucket + 1.0) / RESOLUTION), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+                'count': self.count,
+                'mean': self.mean(),
+                'stddev': self.stddev(),
+                'min': self.min or 0.0,
+                'max': self.max or 0.0,
+                'p50': self.percentile(0.5),
+                'p95': self.percentile(0.95),
+            }
+
+class Registry(object):
+    """Named instruments; asking twice for a name gives the same one"""
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.started = clock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+    def counter(self, name):
+        if name not in self.counters:
+            self.counters[name] = Counter()
+        return self.counters[name]
+
+    def histogram(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def gauge(self, name, function):
+        """Report function() as name in every snapshot"""
+        self.gauges[name] = function
+
+    def snapshot(self):
+        """Every instrument's current value, as plain data"""
+        return {
+                'time': self.clock(),
+                'uptime': self.clock() - self.started,
+                'counters': dict((name, counter.value)
+                    for name, counter in self.counters.iteritems()),
+                'gauges': dict((name, function())
+                    for name, function in self.gauges.iteritems()),
+                'histograms': dict((name, histogram.summary())
+                    for name, histogram in self.histograms.iteritems()),
+            }
+
+    def dump(self, f):
+        """Write a snapshot to f as one line of JSON"""
+        f.write(json.dumps(self.snapshot(), sort_keys=True) + '\n')
+        f.flush()
+
+    def lines(self):
+        """A short human readable summary, for the stats overlay"""
+        snapshot = self.snapshot()
+        counters = snapshot['counters']
+        gauges = snapshot['gauges']
+        histograms = snapshot['histograms']
+        def ms(name, key='mean'):
+            return histograms.get(name, {}).get(key, 0.0) * 1000
+        uptime = max(snapshot['uptime'], 1e-6)
+        lines = [
+                "in  %7.1fKB %6d fr" % (counters.get('bytes_in', 0) / 1024.0,
+                    counters.get('frames_in', 0)),
+                "out %7.1fKB %6d fr" % (counters.get('bytes_out', 0) / 1024.0,
+                    counters.get('frames_out', 0)),
+                "msgs/s  %10.0f" % (counters.get('frames_in', 0) / uptime),
+                "decode  %8.3fms" % ms('decode_time'),
+                "dispatch%8.3fms" % ms('dispatch_time'),
+                "redraw  %8.3fms" % ms('redraw_time'),
+                "jitter  %8.3fms" % ms('frame_interval', 'stddev'),
+                "entities %9d" % gauges.get('entities', 0),
+                "buffer   %8dB" % gauges.get('receive_buffer', 0),
+            ]
+        if counters.get('zlib_wire_in'):
+            lines.append("zlib in  %7.2fx" % (
+                float(counters['zlib_raw_in']) / counters['zlib_wire_in']))
+        return lines
+
+# The process wide registry
+registry = Registry()
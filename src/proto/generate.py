@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Regenerates protocol_pb2.py from protocol/protocol.proto, but only when
+the .proto has changed since the last run. The SHA1 of the .proto that
+produced the current bindings is kept in protocol.proto.sha1 next to
+them; build.sh writes the same stamp.
+
+Prebuilt bindings can be shipped by leaving out protocol/ (or setting
+GHACK_PREBUILT_PROTO=1), in which case protoc is never run.
+
+Must not import protocol_pb2 itself. Run directly to force a rebuild:
+    python src/proto/generate.py
+"""
+
+import os
+import sys
+import hashlib
+import subprocess
+
+OUTPUT_DIR = os.path.dirname(os.path.realpath(__file__))
+PROTO_DIR = os.path.join(os.path.dirname(os.path.dirname(OUTPUT_DIR)),
+        'protocol')
+PROTO_FILE = os.path.join(PROTO_DIR, 'protocol.proto')
+BINDINGS = os.path.join(OUTPUT_DIR, 'protocol_pb2.py')
+STAMP = os.path.join(OUTPUT_DIR, 'protocol.proto.sha1')
+
+def proto_digest():
+    with open(PROTO_FILE, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def stamped_digest():
+    try:
+        with open(STAMP) as f:
+            return f.read().strip()
+    except IOError:
+        return None
+
+def prebuilt():
+    """True when the shipped bindings are to be used as they are"""
+    return (os.environ.get('GHACK_PREBUILT_PROTO') == '1' or
+            not os.path.exists(PROTO_FILE))
+
+def up_to_date():
+    return (os.path.exists(BINDINGS) and
+            stamped_digest() == proto_digest())
+
+def generate(force=False):
+    """
+    Runs protoc if the bindings are missing or stale. Returns True if it
+    ran; raises OSError or CalledProcessError if protoc is unusable.
+    """
+    if prebuilt() or (not force and up_to_date()):
+        return False
+    subprocess.check_call(['protoc', '--proto_path=' + PROTO_DIR,
+        '--python_out=' + OUTPUT_DIR, PROTO_FILE])
+    with open(STAMP, 'w') as f:
+        f.write(proto_digest() + '\n')
+    return True
+
+if __name__ == '__main__':
+    try:
+        generate(force=True)
+    except (OSError, subprocess.CalledProcessError), e:
+        print >> sys.stderr, "Failed to generate protobuf file:", e
+        sys.exit(1)
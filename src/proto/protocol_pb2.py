@@ -0,0 +1,899 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: protocol.proto
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from google.protobuf import reflection as _reflection
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor.FileDescriptor(
+  name='protocol.proto',
+  package='protocol',
+  syntax='proto2',
+  serialized_options=None,
+  create_key=_descriptor._internal_create_key,
+  serialized_pb=b'\n\x0eprotocol.proto\x12\x08protocol\"\xaf\x04\n\x07Message\x12$\n\x04type\x18\x01 \x02(\x0e\x32\x16.protocol.Message.Type\x12\'\n\nadd_entity\x18\x02 \x01(\x0b\x32\x13.protocol.AddEntity\x12-\n\rremove_entity\x18\x03 \x01(\x0b\x32\x16.protocol.RemoveEntity\x12+\n\x0cupdate_state\x18\x04 \x01(\x0b\x32\x15.protocol.UpdateState\x12\x1c\n\x04move\x18\x05 \x01(\x0b\x32\x0e.protocol.Move\x12\"\n\x07\x63onnect\x18\x10 \x01(\x0b\x32\x11.protocol.Connect\x12(\n\ndisconnect\x18\x11 \x01(\x0b\x32\x14.protocol.Disconnect\x12\x1e\n\x05login\x18\x12 \x01(\x0b\x32\x0f.protocol.Login\x12+\n\x0clogin_result\x18\x13 \x01(\x0b\x32\x15.protocol.LoginResult\x12/\n\x0e\x61ssign_control\x18\x14 \x01(\x0b\x32\x17.protocol.AssignControl\"\x8e\x01\n\x04Type\x12\x0b\n\x07\x43ONNECT\x10\x01\x12\x0e\n\nDISCONNECT\x10\x02\x12\t\n\x05LOGIN\x10\x03\x12\x0f\n\x0bLOGINRESULT\x10\x04\x12\r\n\tADDENTITY\x10\x05\x12\x10\n\x0cREMOVEENTITY\x10\x06\x12\x0f\n\x0bUPDATESTATE\x10\x07\x12\x08\n\x04MOVE\x10\x08\x12\x11\n\rASSIGNCONTROL\x10\t\"/\n\x07\x43onnect\x12\x0f\n\x07version\x18\x01 \x02(\r\x12\x13\n\x0bversion_str\x18\x02 \x01(\t\"\x9d\x01\n\nDisconnect\x12+\n\x06reason\x18\x01 \x02(\x0e\x32\x1b.protocol.Disconnect.Reason\x12\x12\n\nreason_str\x18\x02 \x01(\t\"N\n\x06Reason\x12\x08\n\x04QUIT\x10\x01\x12\x12\n\x0ePROTOCOL_ERROR\x10\x02\x12\x1a\n\x16WRONG_PROTOCOL_VERSION\x10\x03\x12\n\n\x06KICKED\x10\x04\"=\n\x05Login\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\x11\n\tauthtoken\x18\x02 \x01(\t\x12\x13\n\x0bpermissions\x18\x03 \x01(\r\"\x96\x01\n\x0bLoginResult\x12\x11\n\tsucceeded\x18\x01 \x02(\x08\x12,\n\x06reason\x18\x02 \x01(\x0e\x32\x1c.protocol.LoginResult.Reason\"F\n\x06Reason\x12\x0c\n\x08\x41\x43\x43\x45PTED\x10\x00\x12\x11\n\rACCESS_DENIED\x10\x01\x12\x0f\n\x0bSERVER_FULL\x10\x02\x12\n\n\x06\x42\x41NNED\x10\x03\"%\n\tAddEntity\x12\n\n\x02id\x18\x01 \x02(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\"(\n\x0cRemoveEntity\x12\n\n\x02id\x18\x01 \x02(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\"P\n\x0bUpdateState\x12\n\n\x02id\x18\x01 \x02(\x05\x12\x10\n\x08state_id\x18\x02 \x02(\t\x12#\n\x05value\x18\x03 \x02(\x0b\x32\x14.protocol.StateValue\"\x9a\x02\n\nStateValue\x12\'\n\x04type\x18\x01 \x02(\x0e\x32\x19.protocol.StateValue.Type\x12\x10\n\x08\x62ool_val\x18\x02 \x01(\x08\x12\x0f\n\x07int_val\x18\x03 \x01(\x05\x12\x11\n\tfloat_val\x18\x04 \x01(\x02\x12\x12\n\nstring_val\x18\x05 \x01(\t\x12&\n\x0bvector3_val\x18\x06 \x01(\x0b\x32\x11.protocol.Vector3\x12\'\n\tarray_val\x18\x0f \x03(\x0b\x32\x14.protocol.StateValue\"H\n\x04Type\x12\x08\n\x04\x42OOL\x10\x01\x12\x07\n\x03INT\x10\x02\x12\t\n\x05\x46LOAT\x10\x03\x12\n\n\x06STRING\x10\x04\x12\t\n\x05\x41RRAY\x10\x05\x12\x0b\n\x07VECTOR3\x10\x06\"*\n\x07Vector3\x12\t\n\x01x\x18\x01 \x02(\x01\x12\t\n\x01y\x18\x02 \x02(\x01\x12\t\n\x01z\x18\x03 \x02(\x01\",\n\x04Move\x12$\n\tdirection\x18\x01 \x02(\x0b\x32\x11.protocol.Vector3\"-\n\rAssignControl\x12\x0b\n\x03uid\x18\x01 \x02(\x05\x12\x0f\n\x07revoked\x18\x02 \x01(\x08'
+)
+
+
+
+_MESSAGE_TYPE = _descriptor.EnumDescriptor(
+  name='Type',
+  full_name='protocol.Message.Type',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='CONNECT', index=0, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='DISCONNECT', index=1, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='LOGIN', index=2, number=3,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='LOGINRESULT', index=3, number=4,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ADDENTITY', index=4, number=5,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='REMOVEENTITY', index=5, number=6,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='UPDATESTATE', index=6, number=7,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='MOVE', index=7, number=8,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ASSIGNCONTROL', index=8, number=9,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=446,
+  serialized_end=588,
+)
+_sym_db.RegisterEnumDescriptor(_MESSAGE_TYPE)
+
+_DISCONNECT_REASON = _descriptor.EnumDescriptor(
+  name='Reason',
+  full_name='protocol.Disconnect.Reason',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='QUIT', index=0, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='PROTOCOL_ERROR', index=1, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='WRONG_PROTOCOL_VERSION', index=2, number=3,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='KICKED', index=3, number=4,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=719,
+  serialized_end=797,
+)
+_sym_db.RegisterEnumDescriptor(_DISCONNECT_REASON)
+
+_LOGINRESULT_REASON = _descriptor.EnumDescriptor(
+  name='Reason',
+  full_name='protocol.LoginResult.Reason',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='ACCEPTED', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ACCESS_DENIED', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='SERVER_FULL', index=2, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='BANNED', index=3, number=3,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=943,
+  serialized_end=1013,
+)
+_sym_db.RegisterEnumDescriptor(_LOGINRESULT_REASON)
+
+_STATEVALUE_TYPE = _descriptor.EnumDescriptor(
+  name='Type',
+  full_name='protocol.StateValue.Type',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='BOOL', index=0, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='INT', index=1, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='FLOAT', index=2, number=3,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='STRING', index=3, number=4,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ARRAY', index=4, number=5,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='VECTOR3', index=5, number=6,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=1389,
+  serialized_end=1461,
+)
+_sym_db.RegisterEnumDescriptor(_STATEVALUE_TYPE)
+
+
+_MESSAGE = _descriptor.Descriptor(
+  name='Message',
+  full_name='protocol.Message',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='type', full_name='protocol.Message.type', index=0,
+      number=1, type=14, cpp_type=8, label=2,
+      has_default_value=False, default_value=1,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='add_entity', full_name='protocol.Message.add_entity', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='remove_entity', full_name='protocol.Message.remove_entity', index=2,
+      number=3, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='update_state', full_name='protocol.Message.update_state', index=3,
+      number=4, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='move', full_name='protocol.Message.move', index=4,
+      number=5, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='connect', full_name='protocol.Message.connect', index=5,
+      number=16, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='disconnect', full_name='protocol.Message.disconnect', index=6,
+      number=17, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='login', full_name='protocol.Message.login', index=7,
+      number=18, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='login_result', full_name='protocol.Message.login_result', index=8,
+      number=19, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='assign_control', full_name='protocol.Message.assign_control', index=9,
+      number=20, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+    _MESSAGE_TYPE,
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=29,
+  serialized_end=588,
+)
+
+
+_CONNECT = _descriptor.Descriptor(
+  name='Connect',
+  full_name='protocol.Connect',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='version', full_name='protocol.Connect.version', index=0,
+      number=1, type=13, cpp_type=3, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='version_str', full_name='protocol.Connect.version_str', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=590,
+  serialized_end=637,
+)
+
+
+_DISCONNECT = _descriptor.Descriptor(
+  name='Disconnect',
+  full_name='protocol.Disconnect',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='reason', full_name='protocol.Disconnect.reason', index=0,
+      number=1, type=14, cpp_type=8, label=2,
+      has_default_value=False, default_value=1,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='reason_str', full_name='protocol.Disconnect.reason_str', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+    _DISCONNECT_REASON,
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=640,
+  serialized_end=797,
+)
+
+
+_LOGIN = _descriptor.Descriptor(
+  name='Login',
+  full_name='protocol.Login',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='protocol.Login.name', index=0,
+      number=1, type=9, cpp_type=9, label=2,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='authtoken', full_name='protocol.Login.authtoken', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='permissions', full_name='protocol.Login.permissions', index=2,
+      number=3, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=799,
+  serialized_end=860,
+)
+
+
+_LOGINRESULT = _descriptor.Descriptor(
+  name='LoginResult',
+  full_name='protocol.LoginResult',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='succeeded', full_name='protocol.LoginResult.succeeded', index=0,
+      number=1, type=8, cpp_type=7, label=2,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='reason', full_name='protocol.LoginResult.reason', index=1,
+      number=2, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+    _LOGINRESULT_REASON,
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=863,
+  serialized_end=1013,
+)
+
+
+_ADDENTITY = _descriptor.Descriptor(
+  name='AddEntity',
+  full_name='protocol.AddEntity',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='id', full_name='protocol.AddEntity.id', index=0,
+      number=1, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='name', full_name='protocol.AddEntity.name', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1015,
+  serialized_end=1052,
+)
+
+
+_REMOVEENTITY = _descriptor.Descriptor(
+  name='RemoveEntity',
+  full_name='protocol.RemoveEntity',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='id', full_name='protocol.RemoveEntity.id', index=0,
+      number=1, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='name', full_name='protocol.RemoveEntity.name', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1054,
+  serialized_end=1094,
+)
+
+
+_UPDATESTATE = _descriptor.Descriptor(
+  name='UpdateState',
+  full_name='protocol.UpdateState',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='id', full_name='protocol.UpdateState.id', index=0,
+      number=1, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='state_id', full_name='protocol.UpdateState.state_id', index=1,
+      number=2, type=9, cpp_type=9, label=2,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='value', full_name='protocol.UpdateState.value', index=2,
+      number=3, type=11, cpp_type=10, label=2,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1096,
+  serialized_end=1176,
+)
+
+
+_STATEVALUE = _descriptor.Descriptor(
+  name='StateValue',
+  full_name='protocol.StateValue',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='type', full_name='protocol.StateValue.type', index=0,
+      number=1, type=14, cpp_type=8, label=2,
+      has_default_value=False, default_value=1,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='bool_val', full_name='protocol.StateValue.bool_val', index=1,
+      number=2, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='int_val', full_name='protocol.StateValue.int_val', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='float_val', full_name='protocol.StateValue.float_val', index=3,
+      number=4, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='string_val', full_name='protocol.StateValue.string_val', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='vector3_val', full_name='protocol.StateValue.vector3_val', index=5,
+      number=6, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='array_val', full_name='protocol.StateValue.array_val', index=6,
+      number=15, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+    _STATEVALUE_TYPE,
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1179,
+  serialized_end=1461,
+)
+
+
+_VECTOR3 = _descriptor.Descriptor(
+  name='Vector3',
+  full_name='protocol.Vector3',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='x', full_name='protocol.Vector3.x', index=0,
+      number=1, type=1, cpp_type=5, label=2,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='y', full_name='protocol.Vector3.y', index=1,
+      number=2, type=1, cpp_type=5, label=2,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='z', full_name='protocol.Vector3.z', index=2,
+      number=3, type=1, cpp_type=5, label=2,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1463,
+  serialized_end=1505,
+)
+
+
+_MOVE = _descriptor.Descriptor(
+  name='Move',
+  full_name='protocol.Move',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='direction', full_name='protocol.Move.direction', index=0,
+      number=1, type=11, cpp_type=10, label=2,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1507,
+  serialized_end=1551,
+)
+
+
+_ASSIGNCONTROL = _descriptor.Descriptor(
+  name='AssignControl',
+  full_name='protocol.AssignControl',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='uid', full_name='protocol.AssignControl.uid', index=0,
+      number=1, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='revoked', full_name='protocol.AssignControl.revoked', index=1,
+      number=2, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1553,
+  serialized_end=1598,
+)
+
+_MESSAGE.fields_by_name['type'].enum_type = _MESSAGE_TYPE
+_MESSAGE.fields_by_name['add_entity'].message_type = _ADDENTITY
+_MESSAGE.fields_by_name['remove_entity'].message_type = _REMOVEENTITY
+_MESSAGE.fields_by_name['update_state'].message_type = _UPDATESTATE
+_MESSAGE.fields_by_name['move'].message_type = _MOVE
+_MESSAGE.fields_by_name['connect'].message_type = _CONNECT
+_MESSAGE.fields_by_name['disconnect'].message_type = _DISCONNECT
+_MESSAGE.fields_by_name['login'].message_type = _LOGIN
+_MESSAGE.fields_by_name['login_result'].message_type = _LOGINRESULT
+_MESSAGE.fields_by_name['assign_control'].message_type = _ASSIGNCONTROL
+_MESSAGE_TYPE.containing_type = _MESSAGE
+_DISCONNECT.fields_by_name['reason'].enum_type = _DISCONNECT_REASON
+_DISCONNECT_REASON.containing_type = _DISCONNECT
+_LOGINRESULT.fields_by_name['reason'].enum_type = _LOGINRESULT_REASON
+_LOGINRESULT_REASON.containing_type = _LOGINRESULT
+_UPDATESTATE.fields_by_name['value'].message_type = _STATEVALUE
+_STATEVALUE.fields_by_name['type'].enum_type = _STATEVALUE_TYPE
+_STATEVALUE.fields_by_name['vector3_val'].message_type = _VECTOR3
+_STATEVALUE.fields_by_name['array_val'].message_type = _STATEVALUE
+_STATEVALUE_TYPE.containing_type = _STATEVALUE
+_MOVE.fields_by_name['direction'].message_type = _VECTOR3
+DESCRIPTOR.message_types_by_name['Message'] = _MESSAGE
+DESCRIPTOR.message_types_by_name['Connect'] = _CONNECT
+DESCRIPTOR.message_types_by_name['Disconnect'] = _DISCONNECT
+DESCRIPTOR.message_types_by_name['Login'] = _LOGIN
+DESCRIPTOR.message_types_by_name['LoginResult'] = _LOGINRESULT
+DESCRIPTOR.message_types_by_name['AddEntity'] = _ADDENTITY
+DESCRIPTOR.message_types_by_name['RemoveEntity'] = _REMOVEENTITY
+DESCRIPTOR.message_types_by_name['UpdateState'] = _UPDATESTATE
+DESCRIPTOR.message_types_by_name['StateValue'] = _STATEVALUE
+DESCRIPTOR.message_types_by_name['Vector3'] = _VECTOR3
+DESCRIPTOR.message_types_by_name['Move'] = _MOVE
+DESCRIPTOR.message_types_by_name['AssignControl'] = _ASSIGNCONTROL
+_sym_db.RegisterFileDescriptor(DESCRIPTOR)
+
+Message = _reflection.GeneratedProtocolMessageType('Message', (_message.Message,), {
+  'DESCRIPTOR' : _MESSAGE,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.Message)
+  })
+_sym_db.RegisterMessage(Message)
+
+Connect = _reflection.GeneratedProtocolMessageType('Connect', (_message.Message,), {
+  'DESCRIPTOR' : _CONNECT,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.Connect)
+  })
+_sym_db.RegisterMessage(Connect)
+
+Disconnect = _reflection.GeneratedProtocolMessageType('Disconnect', (_message.Message,), {
+  'DESCRIPTOR' : _DISCONNECT,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.Disconnect)
+  })
+_sym_db.RegisterMessage(Disconnect)
+
+Login = _reflection.GeneratedProtocolMessageType('Login', (_message.Message,), {
+  'DESCRIPTOR' : _LOGIN,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.Login)
+  })
+_sym_db.RegisterMessage(Login)
+
+LoginResult = _reflection.GeneratedProtocolMessageType('LoginResult', (_message.Message,), {
+  'DESCRIPTOR' : _LOGINRESULT,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.LoginResult)
+  })
+_sym_db.RegisterMessage(LoginResult)
+
+AddEntity = _reflection.GeneratedProtocolMessageType('AddEntity', (_message.Message,), {
+  'DESCRIPTOR' : _ADDENTITY,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.AddEntity)
+  })
+_sym_db.RegisterMessage(AddEntity)
+
+RemoveEntity = _reflection.GeneratedProtocolMessageType('RemoveEntity', (_message.Message,), {
+  'DESCRIPTOR' : _REMOVEENTITY,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.RemoveEntity)
+  })
+_sym_db.RegisterMessage(RemoveEntity)
+
+UpdateState = _reflection.GeneratedProtocolMessageType('UpdateState', (_message.Message,), {
+  'DESCRIPTOR' : _UPDATESTATE,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.UpdateState)
+  })
+_sym_db.RegisterMessage(UpdateState)
+
+StateValue = _reflection.GeneratedProtocolMessageType('StateValue', (_message.Message,), {
+  'DESCRIPTOR' : _STATEVALUE,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.StateValue)
+  })
+_sym_db.RegisterMessage(StateValue)
+
+Vector3 = _reflection.GeneratedProtocolMessageType('Vector3', (_message.Message,), {
+  'DESCRIPTOR' : _VECTOR3,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.Vector3)
+  })
+_sym_db.RegisterMessage(Vector3)
+
+Move = _reflection.GeneratedProtocolMessageType('Move', (_message.Message,), {
+  'DESCRIPTOR' : _MOVE,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.Move)
+  })
+_sym_db.RegisterMessage(Move)
+
+AssignControl = _reflection.GeneratedProtocolMessageType('AssignControl', (_message.Message,), {
+  'DESCRIPTOR' : _ASSIGNCONTROL,
+  '__module__' : 'protocol_pb2'
+  # @@protoc_insertion_point(class_scope:protocol.AssignControl)
+  })
+_sym_db.RegisterMessage(AssignControl)
+
+
+# @@protoc_insertion_point(module_scope)
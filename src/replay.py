@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Replays a capture made with main.py --capture through the normal
+GhackProtocol -> Client.handle -> GameHandler -> Game path, either at the
+recorded pace or as fast as possible. A max speed replay is the end to end
+throughput benchmark for decode, dispatch, world update and render.
+
+    python src/replay.py session.cap --max-speed
+    python src/replay.py session.cap --curses
+"""
+
+import sys
+import time
+import atexit
+from optparse import OptionParser
+
+from main import generate_protoc
+
+class NullTransport(object):
+    """Swallows everything the client sends during a replay"""
+    def write(self, data):
+        pass
+
+    def writeSequence(self, data):
+        pass
+
+    def loseConnection(self):
+        pass
+
+def setup(options):
+    """Returns (game, client, protocol) wired together as main.run does"""
+    from client.client import Client
+    from client.netclient import GhackProtocol
+    from game.game import Game
+    from game.renderer import HeadlessRenderer
+
+    renderer = None if options.curses else HeadlessRenderer()
+    game = Game('replay', options.fps, options.compact, renderer)
+    atexit.register(game.renderer.close)
+    client = Client(game)
+    if options.coalesce:
+        client.coalesce_updates()
+    protocol = GhackProtocol()
+    protocol.makeConnection(NullTransport())
+    protocol.callback = client.handle
+    client.conn = protocol
+    # Puts the client in the state the recorded server replies expect
+    client.run()
+    return game, client, protocol
+
+def replay_max_speed(reader, options):
+    """Feeds every record back to back, rendering after each one"""
+    game, client, protocol = setup(options)
+    # Every record gets its frame; an fps cap would skip most of them
+    game.scheduler.fps = 0
+    messages = [0]
+    handle = protocol.callback
+    def counting(msg):
+        messages[0] += 1
+        handle(msg)
+    protocol.callback = counting
+
+    records = size = 0
+    start = time.time()
+    for offset, chunk in reader:
+        protocol.dataReceived(chunk)
+        client.apply_updates()
+        game.render()
+        records += 1
+        size += len(chunk)
+    elapsed = time.time() - start
+
+    print "%d records, %d bytes, %d messages, %d entities at the end" % (
+            records, size, messages[0], len(game.entities))
+    print "%.3f s: %.2f MB/s, %.0f msgs/s, %d frames drawn" % (elapsed,
+            size / elapsed / (1024 * 1024), messages[0] / elapsed,
+            game.scheduler.frames_drawn)
+    report_coalescing(client)
+
+def report_coalescing(client):
+    coalescer = client.coalescer
+    if coalescer is not None and coalescer.received:
+        print "%d updates received, %d applied, %d coalesced (%.1f%%) " \
+                "in %d batches" % (coalescer.received, coalescer.applied,
+                coalescer.coalesced(),
+                100.0 * coalescer.coalesced() / coalescer.received,
+                coalescer.batches)
+
+def replay_recorded(reader, options):
+    """Feeds records at their recorded times, under the normal game loop"""
+    from twisted.internet import reactor
+    from gameloop import GameLoop
+
+    game, client, protocol = setup(options)
+    loop = GameLoop(game, client)
+    records = iter(reader)
+    start = time.time()
+
+    def finish():
+        loop.stop()
+        reactor.stop()
+
+    def feed(chunk):
+        protocol.dataReceived(chunk)
+        schedule()
+
+    def schedule():
+        for offset, chunk in records:
+            delay = offset / options.speed - (time.time() - start)
+            reactor.callLater(max(0, delay), feed, chunk)
+            return
+        reactor.callLater(options.linger, finish)
+
+    # Quitting the game disconnects the client, which stops the replay
+    client.on_disconnect = finish
+    loop.start()
+    schedule()
+    reactor.run()
+    report_coalescing(client)
+
+def main():
+    parser = OptionParser(usage='%prog [options] CAPTURE')
+    parser.add_option('--max-speed',
+            help='Replay as fast as possible and report throughput',
+            action='store_true',
+            default=False)
+    parser.add_option('--speed',
+            help='Playback speed multiplier for recorded pace',
+            type='float',
+            default=1.0)
+    parser.add_option('--curses',
+            help='Draw to the terminal instead of running headless',
+            action='store_true',
+            default=False)
+    parser.add_option('--fps',
+            help='Maximum redraws per second, 0 for no limit; '
+                 '--max-speed always draws every frame',
+            type='int',
+            default=30)
+    parser.add_option('--compact',
+            help='Keep hot entity states in compact arrays',
+            action='store_true',
+            default=False)
+    parser.add_option('--coalesce',
+            help='Apply updates once per frame, keeping only the last '
+                 'of each state',
+            action='store_true',
+            default=False)
+    parser.add_option('--trace',
+            help='Write a Chrome trace event file of the replay',
+            metavar='FILE')
+    parser.add_option('--linger',
+            help='Seconds to keep running after the last record',
+            type='float',
+            default=1.0)
+    options, args = parser.parse_args()
+    if len(args) != 1:
+        parser.error("a capture file is required")
+
+    generate_protoc()
+    if options.trace:
+        import tracing
+        tracer = tracing.Tracer()
+        tracing.instrument(tracer)
+        atexit.register(tracer.write, options.trace)
+    from client.capture import CaptureReader
+    reader = CaptureReader(args[0])
+    if options.max_speed:
+        replay_max_speed(reader, options)
+    else:
+        replay_recorded(reader, options)
+    reader.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+A local stand-in for the ghack server, for benchmarks and offline testing.
+
+It speaks protocol.proto, negotiating framing in Connect as the client
+does (--framing classic behaves like an old server), answers Connect and
+Login, and then streams a synthetic world: N entities whose
+states update at configurable rates, AddEntity/RemoveEntity churn, and
+optional large ARRAY states. The world is simulated in fixed ticks from a
+seeded random generator, so the same options always produce the same
+message stream regardless of how many clients watch it.
+
+Run from the src directory:
+    python -m server.standin --entities 1000 --rate Position=2,Health=0.1
+"""
+
+import sys
+import random
+from optparse import OptionParser
+
+from twisted.internet import reactor, task
+from twisted.internet.protocol import Protocol, Factory
+
+from proto import protocol_pb2 as ghack_pb2
+from client import messages, framing, compression
+from game.objects import Vector
+
+PROTOCOL_VERSION = 1
+
+# Updates per entity per second, for each state the world animates
+DEFAULT_RATES = {'Position': 1.0, 'Health': 0.1}
+
+# Assets a spider can have
+ASSETS = 'sSbr'
+
+# States whose updates the world can generate, besides Position
+INT_STATES = ('Health', 'MaxHealth', 'KillCount')
+CHOICES = {'Asset': ASSETS}
+ANIMATED = frozenset(('Position',) + INT_STATES + tuple(CHOICES))
+
+# Players are numbered from here up, apart from the generated entities
+PLAYER_IDS = 1 << 24
+
+class World(object):
+    """
+    The simulated world. tick() advances it by one step and returns the
+    Messages describing what changed; snapshot() describes all of it.
+    Only the seeded generator decides what happens, so every run with the
+    same parameters yields the same stream. Players are kept apart from
+    that generator and take ids from their own range, so neither their
+    moves nor their comings and goings perturb it.
+    """
+    def __init__(self, entities=100, rates=None, churn=0.0, array_size=0,
+            array_rate=0.0, size=200, tick_rate=20, seed=1):
+        self.rng = random.Random(seed)
+        self.rates = DEFAULT_RATES if rates is None else rates
+        unknown = sorted(set(self.rates) - ANIMATED)
+        if unknown:
+            raise ValueError("cannot animate %s; rates can be given for %s"
+                    % (', '.join(unknown), ', '.join(sorted(ANIMATED))))
+        self.churn = churn
+        self.array_size = array_size
+        self.array_rate = array_rate
+        self.size = size
+        self.tick_rate = tick_rate
+        self.entities = {}
+        self.players = set()
+        self.ticks = 0
+        self._next_id = 1
+        self._next_player_id = PLAYER_IDS
+        self._due = {}
+        self._snapshot = None
+        for i in xrange(entities):
+            self._spawn()
+
+    def snapshot(self):
+        """Messages that build the whole world from scratch"""
+        msgs = []
+        for id in sorted(self.entities):
+            name, states = self.entities[id]
+            msgs.append(messages.add_entity(id, name))
+            for state_id in sorted(states):
+                msgs.append(messages.update_state(id, state_id,
+                    states[state_id]))
+        return msgs
+
+    def snapshot_frames(self):
+        """snapshot() serialized, cached until the world next changes"""
+        if self._snapshot is None:
+            self._snapshot = [msg.SerializeToString()
+                    for msg in self.snapshot()]
+        return self._snapshot
+
+    def tick(self):
+        """Advance one step, returning the Messages it produced"""
+        self.ticks += 1
+        msgs = []
+        npcs = sorted(set(self.entities) - self.players)
+        for state_id in sorted(self.rates):
+            for i in xrange(self._count(state_id, self.rates[state_id] *
+                    len(npcs))):
+                id = self.rng.choice(npcs)
+                msgs.append(self._animate(id, state_id))
+        if self.array_size:
+            for i in xrange(self._count('Path', self.array_rate *
+                    len(npcs))):
+                id = self.rng.choice(npcs)
+                msgs.append(self._set(id, 'Path', self._path()))
+        for i in xrange(self._count('churn', self.churn)):
+            if not npcs:
+                break
+            victim = self.rng.choice(npcs)
+            msgs.append(self._despawn(victim))
+            npcs.remove(victim)
+            msgs.extend(self._spawn())
+        return msgs
+
+    def add_player(self, name):
+        """Spawns a player; returns (id, Messages announcing it)"""
+        id = self._next_player_id
+        self._next_player_id += 1
+        self._snapshot = None
+        self.players.add(id)
+        states = {
+                'Position': Vector(self.size // 2, self.size // 2, 0),
+                'Health': 100, 'MaxHealth': 100,
+                'Asset': '@', 'KillCount': 0,
+            }
+        self.entities[id] = ('Player', states)
+        msgs = [messages.add_entity(id, 'Player')]
+        for state_id in sorted(states):
+            msgs.append(messages.update_state(id, state_id, states[state_id]))
+        return id, msgs
+
+    def move_player(self, id, direction):
+        """Applies a Move; returns the Position update"""
+        pos = self.entities[id][1]['Position']
+        return self._set(id, 'Position', Vector(
+            self._clamp(pos.x + direction.x),
+            self._clamp(pos.y + direction.y), pos.z))
+
+    def remove_player(self, id):
+        self.players.discard(id)
+        return self._despawn(id)
+
+    def _count(self, key, per_second):
+        """Whole events due this tick at per_second, carrying fractions"""
+        due = self._due.get(key, 0.0) + per_second / self.tick_rate
+        count = int(due)
+        self._due[key] = due - count
+        return count
+
+    def _new_id(self):
+        id = self._next_id
+        self._next_id += 1
+        return id
+
+    def _spawn(self):
+        id = self._new_id()
+        self._snapshot = None
+        rng = self.rng
+        states = {
+                'Position': Vector(rng.randrange(self.size),
+                    rng.randrange(self.size), 0),
+                'Health': 10, 'MaxHealth': 10,
+                'Asset': rng.choice(ASSETS),
+            }
+        if self.array_size:
+            states['Path'] = self._path()
+        self.entities[id] = ('Spider', states)
+        msgs = [messages.add_entity(id, 'Spider')]
+        for state_id in sorted(states):
+            msgs.append(messages.update_state(id, state_id, states[state_id]))
+        return msgs
+
+    def _despawn(self, id):
+        self._snapshot = None
+        name = self.entities.pop(id)[0]
+        return messages.remove_entity(id, name)
+
+    def _animate(self, id, state_id):
+        states = self.entities[id][1]
+        rng = self.rng
+        if state_id == 'Position':
+            pos = states['Position']
+            value = Vector(self._clamp(pos.x + rng.choice((-1, 0, 1))),
+                    self._clamp(pos.y + rng.choice((-1, 0, 1))), 0)
+        elif state_id in INT_STATES:
+            value = rng.randrange(1, 11)
+        else:
+            value = rng.choice(CHOICES[state_id])
+        return self._set(id, state_id, value)
+
+    def _path(self):
+        rng = self.rng
+        return [Vector(rng.randrange(self.size), rng.randrange(self.size), 0)
+                for i in xrange(self.array_size)]
+
+    def _set(self, id, state_id, value):
+        self._snapshot = None
+        self.entities[id][1][state_id] = value
+        return messages.update_state(id, state_id, value)
+
+    def _clamp(self, v):
+        return min(max(v, 0), self.size - 1)
+
+class StandinProtocol(Protocol):
+    """One client connection: handshake, then world updates"""
+    def __init__(self):
+        self._reader = framing.FrameReader()
+        self.writer = framing.FrameWriter()
+        self.player = None
+        self.logged_in = False
+        self.stream = None
+
+    def connectionLost(self, reason):
+        self.factory.leave(self)
+
+    def dataReceived(self, data):
+        if self.stream is not None:
+            data = self.stream.decompress(data)
+        self._reader.feed(data)
+        frame = self._reader.next_frame()
+        while frame is not None:
+            msg = ghack_pb2.Message()
+            msg.ParseFromString(frame)
+            self.handle(msg)
+            frame = self._reader.next_frame()
+        self._reader.compact()
+        self.flush()
+
+    def handle(self, msg):
+        if msg.type == ghack_pb2.Message.CONNECT:
+            # Old clients offer nothing and get classic framing
+            name = framing.choose(msg.connect.version_str,
+                    self.factory.framings)
+            tokens = []
+            if name != framing.CLASSIC:
+                tokens.append(framing.offer([name]))
+            compress = (self.factory.compress_level is not None and
+                    compression.accepted(msg.connect.version_str))
+            if compress:
+                tokens.append(compression.offer())
+            self.send(messages.connect(PROTOCOL_VERSION, ' '.join(tokens)))
+            # Everything after the reply, both ways, uses the new framing
+            self.writer.set_framing(name)
+            self._reader.set_framing(name)
+            if compress:
+                self.flush()
+                self.stream = compression.ZlibStream(
+                        self.factory.compress_level)
+                rest = self._reader.take_unread()
+                if rest:
+                    self._reader.feed(self.stream.decompress(rest))
+        elif msg.type == ghack_pb2.Message.LOGIN:
+            self.send(messages.login_result(True))
+            self.factory.join(self, msg.login.name)
+        elif msg.type == ghack_pb2.Message.MOVE and self.player is not None:
+            self.factory.move(self, msg.move.direction)
+        elif msg.type == ghack_pb2.Message.DISCONNECT:
+            self.transport.loseConnection()
+
+    def send(self, msg):
+        self.writer.append(msg.SerializeToString())
+
+    def send_frame(self, msg_bytes):
+        self.writer.append(msg_bytes)
+
+    def flush(self):
+        if self.writer.pending:
+            data = self.writer.take()
+            if self.stream is not None:
+                data = self.stream.compress(data)
+            self.transport.write(data)
+
+class StandinFactory(Factory):
+    protocol = StandinProtocol
+
+    def __init__(self, world, framings=framing.FRAMINGS, compress_level=None):
+        self.world = world
+        self.framings = framings
+        self.compress_level = compress_level
+        self.sessions = []
+        self._ticker = task.LoopingCall(self.tick)
+
+    def startFactory(self):
+        self._ticker.start(1.0 / self.world.tick_rate, now=False)
+
+    def stopFactory(self):
+        if self._ticker.running:
+            self._ticker.stop()
+
+    def join(self, session, name):
+        """Sends the world to a newly logged in session"""
+        for msg_bytes in self.world.snapshot_frames():
+            session.send_frame(msg_bytes)
+        session.logged_in = True
+        self.sessions.append(session)
+        # Everyone, the new player included, hears about the new player
+        session.player, msgs = self.world.add_player(name)
+        self.broadcast(msgs)
+        session.send(messages.assign_control(session.player))
+
+    def leave(self, session):
+        if session in self.sessions:
+            self.sessions.remove(session)
+            self.broadcast([self.world.remove_player(session.player)])
+            self.flush()
+
+    def move(self, session, direction):
+        self.broadcast([self.world.move_player(session.player, direction)])
+
+    def tick(self):
+        self.broadcast(self.world.tick())
+        self.flush()
+
+    def broadcast(self, msgs):
+        """Serializes each Message once and queues it for every session"""
+        for msg in msgs:
+            msg_bytes = msg.SerializeToString()
+            for session in self.sessions:
+                session.send_frame(msg_bytes)
+
+    def flush(self):
+        for session in self.sessions:
+            session.flush()
+
+def listen(port=9190, interface='localhost', framings=framing.FRAMINGS,
+        compress_level=None, **world_options):
+    """Starts a stand-in server on the running reactor, returns its port"""
+    return reactor.listenTCP(port, StandinFactory(World(**world_options),
+        framings, compress_level), interface=interface)
+
+def parse_rates(rates):
+    """Parses 'State=rate,State=rate' into a dict"""
+    parsed = {}
+    for item in rates.split(','):
+        if item.strip():
+            state_id, rate = item.split('=')
+            parsed[state_id.strip()] = float(rate)
+    return parsed
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-p', '--port', type='int', default=9190,
+            help='Port to listen on')
+    parser.add_option('--interface', default='localhost',
+            help='Interface to listen on')
+    parser.add_option('--entities', type='int', default=100,
+            help='Number of entities in the world')
+    parser.add_option('--rate', default='Position=1,Health=0.1',
+            help='Updates per entity per second: State=rate,... for any '
+                 'of ' + ', '.join(sorted(ANIMATED)))
+    parser.add_option('--churn', type='float', default=0.0,
+            help='Entities removed and replaced per second')
+    parser.add_option('--array-size', type='int', default=0,
+            help='Vectors in each entity\'s Path ARRAY state (0 for none)')
+    parser.add_option('--array-rate', type='float', default=0.1,
+            help='Path updates per entity per second')
+    parser.add_option('--size', type='int', default=200,
+            help='Width and height of the world')
+    parser.add_option('--tick-rate', type='int', default=20,
+            help='World ticks per second')
+    parser.add_option('--seed', type='int', default=1,
+            help='Random seed; equal seeds give equal streams')
+    parser.add_option('--framing', default=','.join(framing.FRAMINGS),
+            help='Framings to accept, most preferred first; "classic" '
+                 'behaves like an old server')
+    parser.add_option('--compress', type='int', metavar='LEVEL',
+            help='Agree to zlib stream compression at this level (0-9) '
+                 'when a client asks')
+    options, args = parser.parse_args()
+
+    try:
+        listen(options.port, options.interface,
+                [name.strip() for name in options.framing.split(',')],
+                options.compress,
+                entities=options.entities,
+                rates=parse_rates(options.rate), churn=options.churn,
+                array_size=options.array_size,
+                array_rate=options.array_rate,
+                size=options.size, tick_rate=options.tick_rate,
+                seed=options.seed)
+    except ValueError, e:
+        parser.error(str(e))
+    print >> sys.stderr, "Stand-in server listening on %s:%d" % (
+            options.interface, options.port)
+    reactor.run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for the benchmark suite's allocation counts
+"""
+
+from twisted.trial import unittest
+
+from bench import suite
+
+def stage_temporaries(n):
+    """Allocates a list per op that is freed straight away"""
+    def run():
+        for i in xrange(n):
+            items = [i]
+    return run
+
+def stage_nothing(n):
+    def run():
+        for i in xrange(n):
+            pass
+    return run
+
+class AllocationTest(unittest.TestCase):
+    def test_freed_objects_counted(self):
+        self.assertApproximates(suite.allocations(stage_temporaries, 500),
+                1.0, 0.05)
+
+    def test_nothing_allocated(self):
+        self.assertApproximates(suite.allocations(stage_nothing, 500),
+                0.0, 0.05)
+
+    def test_unwrap_array_allocates(self):
+        self.assertTrue(suite.allocations(suite.stage_unwrap_array, 200)
+                >= 1.0)
+
+    def test_regression_detected(self):
+        baseline = {'unwrap': {'ops_per_sec': 1000.0, 'objects_per_op': 1.0}}
+        results = {'unwrap': {'ops_per_sec': 1000.0, 'objects_per_op': 2.0}}
+        self.assertEqual(len(suite.regressions(results, baseline, 0.25)), 1)
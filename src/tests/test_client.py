@@ -0,0 +1,35 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for the Client's handling of a lost connection
+"""
+
+from twisted.trial import unittest
+
+from client.client import Client
+from game.game import Game
+from game.objects import Vector
+from game.renderer import HeadlessRenderer
+
+class ConnectionLostTest(unittest.TestCase):
+    def setUp(self):
+        self.game = Game('test', renderer=HeadlessRenderer(), predict=True)
+        self.client = Client(self.game)
+        self.game.add_entity(1, 'Player')
+        self.game.update_entity(1, 'Position', Vector(0, 0, 0))
+        self.game.assign_control(1)
+        self.client.connected = True
+
+    def test_world_kept(self):
+        self.client.connection_lost()
+        self.assertTrue(self.client.reconnecting)
+        self.assertEqual(list(self.game.entities), [1])
+        self.assertEqual(self.game.status, "Reconnecting...")
+
+    def test_pending_moves_forgotten(self):
+        self.game.predict_move(Vector(1, 0, 0))
+        self.assertEqual(len(self.game.predictor.pending), 1)
+        self.client.connection_lost()
+        self.assertEqual(len(self.game.predictor.pending), 0)
@@ -0,0 +1,62 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for the per-frame UpdateCoalescer
+"""
+
+from twisted.trial import unittest
+
+from client.coalesce import UpdateCoalescer
+from game.render import RenderScheduler
+
+class RecordingGame(object):
+    """Records the calls the coalescer makes, in order"""
+    def __init__(self):
+        self.scheduler = RenderScheduler()
+        self.calls = []
+
+    def add_entity(self, id, name=None):
+        self.calls.append(('add', id))
+
+    def remove_entity(self, id, name=None):
+        self.calls.append(('remove', id))
+
+    def update_entity(self, id, state_id, value=None):
+        self.calls.append(('update', id, state_id, value))
+
+    def assign_control(self, id, revoked=False):
+        self.calls.append(('control', id))
+
+class UpdateCoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.game = RecordingGame()
+        self.coalescer = UpdateCoalescer(self.game)
+
+    def test_last_value_wins(self):
+        for x in xrange(5):
+            self.coalescer.update_entity(1, 'Position', x)
+        self.coalescer.update_entity(2, 'Position', 9)
+        self.assertEqual(self.coalescer.coalesced(), 4)
+        self.coalescer.flush()
+        self.assertEqual(self.game.calls, [('update', 1, 'Position', 4),
+                ('update', 2, 'Position', 9)])
+        self.assertEqual(self.coalescer.applied, 2)
+
+    def test_update_after_control_stays_after(self):
+        self.coalescer.update_entity(5, 'Position', 1)
+        self.coalescer.assign_control(5)
+        self.coalescer.update_entity(5, 'Position', 2)
+        self.coalescer.flush()
+        self.assertEqual(self.game.calls, [('control', 5),
+                ('update', 5, 'Position', 2)])
+
+    def test_no_merge_across_remove_and_add(self):
+        self.coalescer.update_entity(3, 'Health', 1)
+        self.coalescer.remove_entity(3)
+        self.coalescer.add_entity(3)
+        self.coalescer.update_entity(3, 'Health', 2)
+        self.coalescer.flush()
+        self.assertEqual(self.game.calls, [('update', 3, 'Health', 1),
+                ('remove', 3), ('add', 3), ('update', 3, 'Health', 2)])
@@ -0,0 +1,122 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for FrameReader and FrameWriter
+"""
+
+from twisted.trial import unittest
+
+from client import framing
+
+BODIES = ['', 'a', 'hello', 'x' * 300, 'y' * 70000]
+
+def written(framing_name, bodies):
+    writer = framing.FrameWriter(framing=framing_name)
+    for body in bodies:
+        writer.append(body)
+    return writer.take()
+
+class FrameReaderTest(unittest.TestCase):
+    def read_all(self, reader):
+        frames = []
+        frame = reader.next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = reader.next_frame()
+        reader.compact()
+        return frames
+
+    def feed_in_pieces(self, framing_name, data, size):
+        """Feeds data size bytes at a time, reading after every piece"""
+        reader = framing.FrameReader(framing=framing_name)
+        frames = []
+        for i in xrange(0, len(data), size):
+            reader.feed(data[i:i + size])
+            frames.extend(self.read_all(reader))
+        self.assertEqual(len(reader), 0)
+        return frames
+
+    def check_pieces(self, framing_name, bodies):
+        if framing_name == framing.CLASSIC:
+            bodies = [body for body in bodies if len(body) <= 0xffff]
+        data = written(framing_name, bodies)
+        for size in (1, 2, 3, 7, 1000, len(data)):
+            self.assertEqual(self.feed_in_pieces(framing_name, data, size),
+                    bodies)
+
+    def test_split_classic(self):
+        self.check_pieces(framing.CLASSIC, BODIES)
+
+    def test_split_varint(self):
+        self.check_pieces(framing.VARINT, BODIES)
+
+    def test_split_u32(self):
+        self.check_pieces(framing.U32BE, BODIES)
+
+    def test_split_header(self):
+        # A varint length of two bytes arriving one at a time
+        data = written(framing.VARINT, ['z' * 200])
+        reader = framing.FrameReader(framing=framing.VARINT)
+        reader.feed(data[:1])
+        self.assertIdentical(reader.next_frame(), None)
+        reader.feed(data[1:2])
+        self.assertIdentical(reader.next_frame(), None)
+        reader.feed(data[2:])
+        self.assertEqual(reader.next_frame(), 'z' * 200)
+
+    def test_split_body(self):
+        data = written(framing.U32BE, ['abcdef'])
+        reader = framing.FrameReader(framing=framing.U32BE)
+        reader.feed(data[:7])
+        self.assertIdentical(reader.next_frame(), None)
+        reader.feed(data[7:])
+        self.assertEqual(reader.next_frame(), 'abcdef')
+        self.assertIdentical(reader.next_frame(), None)
+
+    def test_batch_spanning_reads(self):
+        data = written(framing.BATCH, BODIES)
+        reader = framing.FrameReader(framing=framing.BATCH)
+        middle = len(data) // 2
+        reader.feed(data[:middle])
+        # Nothing comes out of a batch until all of it is here
+        self.assertEqual(self.read_all(reader), [])
+        reader.feed(data[middle:])
+        self.assertEqual(self.read_all(reader), BODIES)
+
+    def test_batches_in_pieces(self):
+        data = written(framing.BATCH, BODIES[:3]) + \
+                written(framing.BATCH, BODIES[3:])
+        for size in (1, 5, 1000, len(data)):
+            self.assertEqual(self.feed_in_pieces(framing.BATCH, data, size),
+                    BODIES)
+
+    def test_switch_mid_chunk(self):
+        data = written(framing.CLASSIC, ['connect']) + \
+                written(framing.VARINT, ['after'])
+        reader = framing.FrameReader()
+        reader.feed(data)
+        self.assertEqual(reader.next_frame(), 'connect')
+        reader.set_framing(framing.VARINT)
+        self.assertEqual(reader.next_frame(), 'after')
+
+    def test_oversized_u32_header(self):
+        reader = framing.FrameReader(framing=framing.U32BE)
+        reader.feed('\xff\xff\xff\xff')
+        self.assertRaises(framing.FramingError, reader.next_frame)
+
+    def test_oversized_varint_header(self):
+        reader = framing.FrameReader(framing=framing.VARINT)
+        reader.feed(framing.encode_varint(framing.MAX_FRAME + 1))
+        self.assertRaises(framing.FramingError, reader.next_frame)
+
+    def test_oversized_batch_header(self):
+        reader = framing.FrameReader(framing=framing.BATCH)
+        reader.feed('\xff\xff\xff\xff')
+        self.assertRaises(framing.FramingError, reader.next_frame)
+
+class FrameWriterTest(unittest.TestCase):
+    def test_classic_too_long(self):
+        writer = framing.FrameWriter()
+        self.assertRaises(framing.FramingError, writer.append, 'x' * 70000)
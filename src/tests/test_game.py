@@ -0,0 +1,164 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for where Game draws entities
+"""
+
+from twisted.trial import unittest
+
+from game.game import Game
+from game.interpolation import Interpolator
+from game.objects import Vector
+from game.prediction import Predictor
+from game.render import RenderScheduler
+from game.renderer import HeadlessRenderer
+from metrics import registry
+
+class Clock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class ControlledEntityTest(unittest.TestCase):
+    predict = False
+
+    def setUp(self):
+        self.clock = Clock()
+        self.game = Game('test', renderer=HeadlessRenderer(),
+                predict=self.predict)
+        self.game.interpolator = Interpolator(clock=self.clock)
+        for id, name in ((1, 'Player'), (2, 'Spider')):
+            self.game.add_entity(id, name)
+            self.game.update_entity(id, 'Asset', name[0])
+        for state_id in ('Health', 'MaxHealth', 'KillCount'):
+            self.game.update_entity(1, state_id, 10)
+        self.game.assign_control(1)
+
+    def walk(self):
+        for step in xrange(1, 6):
+            self.clock.now += 0.1
+            for id in (1, 2):
+                self.game.update_entity(id, 'Position', Vector(step, id, 0))
+        # Lets any prediction correction settle
+        self.game.update(1.0)
+
+    def drawn(self):
+        return dict((entity.id, (pos.x, pos.y)) for entity, pos, asset in
+                self.game.visible(-10, -10, 10, 10))
+
+    def test_controlled_entity_not_interpolated(self):
+        self.walk()
+        drawn = self.drawn()
+        self.assertEqual(drawn[1], (5, 1))
+        # Everyone else is drawn a little in the past
+        self.assertTrue(drawn[2][0] < 5)
+        self.assertIdentical(
+                self.game.interpolator.position(1, self.clock.now), None)
+
+    def test_drawn_where_camera_centres(self):
+        self.walk()
+        player, offsetx, offsety = self.game.camera(20, 20)
+        self.assertEqual(self.drawn()[1], (10 - offsetx, 10 - offsety))
+
+    def test_history_dropped_on_assign(self):
+        self.game.assign_control(2)
+        self.walk()
+        self.game.assign_control(1)
+        self.assertEqual(self.drawn()[1], (5, 1))
+
+class PredictedControlledEntityTest(ControlledEntityTest):
+    predict = True
+
+class InterpolatorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.interpolator = Interpolator(clock=self.clock)
+
+    def record(self, id, x, now):
+        self.interpolator.record(id, Vector(x, 0, 0), now)
+
+    def test_delay_per_entity(self):
+        for step in xrange(20):
+            self.record(1, step, 100 + step * 0.1)
+            self.record(2, step, 100 + step * 0.5)
+        self.assertTrue(self.interpolator.delay(1) < 0.2)
+        self.assertTrue(self.interpolator.delay(2) > 0.5)
+
+    def test_active_between_samples(self):
+        self.record(1, 0, 100.0)
+        # One sample leaves nothing to move between
+        self.assertFalse(self.interpolator.active(100.0))
+        self.record(1, 1, 100.1)
+        self.assertTrue(self.interpolator.active(100.1))
+        self.assertFalse(self.interpolator.active(102.0))
+
+    def test_removed_entity_settles(self):
+        self.record(1, 0, 100.0)
+        self.record(1, 1, 100.1)
+        self.interpolator.remove(1)
+        self.assertFalse(self.interpolator.active(100.1))
+
+class PredictorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.predictor = Predictor(smoothing=0, clock=self.clock)
+        self.predictor.reconcile(Vector(0, 0, 0))
+
+    def shown(self):
+        # Smoothing is off, so one update settles any correction
+        self.predictor.update(0.1)
+        pos = self.predictor.position()
+        return (pos.x, pos.y, pos.z)
+
+    def test_unrelated_position_keeps_pending(self):
+        self.predictor.predict(Vector(1, 0, 0))
+        # Pushed somewhere no pending move leads to
+        self.predictor.reconcile(Vector(0, 5, 0))
+        self.predictor.predict(Vector(1, 0, 0))
+        self.assertEqual(len(self.predictor.pending), 2)
+        self.assertEqual(self.shown(), (2, 5, 0))
+        # Both moves then answered from the new position
+        self.predictor.reconcile(Vector(2, 5, 0))
+        self.assertEqual(len(self.predictor.pending), 0)
+        self.assertEqual(self.predictor.lost, 0)
+
+    def test_unanswered_moves_time_out(self):
+        self.predictor.predict(Vector(1, 0, 0))
+        self.predictor.reconcile(Vector(0, 5, 0))
+        self.clock.now += self.predictor.timeout + 0.1
+        self.predictor.update(0.1)
+        self.assertEqual(len(self.predictor.pending), 0)
+        self.assertEqual(self.predictor.lost, 1)
+        self.assertEqual(self.shown(), (0, 5, 0))
+
+class RenderSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.scheduler = RenderScheduler(fps=10, clock=self.clock)
+        self.intervals = registry.histogram('frame_interval')
+
+    def draw_at(self, now):
+        self.clock.now = now
+        self.scheduler.mark_dirty()
+        self.assertTrue(self.scheduler.frame(lambda: None))
+
+    def test_idle_gap_not_an_interval(self):
+        self.draw_at(100.0)
+        before = self.intervals.count
+        self.draw_at(105.0)
+        self.assertEqual(self.intervals.count, before)
+
+    def test_back_to_back_frames_observed(self):
+        self.draw_at(100.0)
+        before = self.intervals.count
+        # Dirty again before the cap lets the next frame through
+        self.clock.now = 100.05
+        self.scheduler.mark_dirty()
+        self.assertFalse(self.scheduler.frame(lambda: None))
+        self.clock.now = 100.2
+        self.assertTrue(self.scheduler.frame(lambda: None))
+        self.assertEqual(self.intervals.count, before + 1)
@@ -0,0 +1,38 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for GhackProtocol's receive path
+"""
+
+from twisted.trial import unittest
+from twisted.test.proto_helpers import StringTransport
+
+from client import framing, messages
+from client.netclient import GhackProtocol
+from metrics import SAMPLE_EVERY
+
+def classic_frame(msg):
+    body = msg.SerializeToString()
+    return framing.HEADER.pack(len(body)) + body
+
+class SamplingTest(unittest.TestCase):
+    def setUp(self):
+        self.protocol = GhackProtocol()
+        self.protocol.makeConnection(StringTransport())
+        self.received = []
+
+    def test_sampling_survives_reads_without_callback(self):
+        frame = classic_frame(messages.add_entity(1, 'Spider'))
+        # Reads before anyone listens must not stop the sampling
+        for i in xrange(SAMPLE_EVERY * 2):
+            self.protocol.dataReceived('')
+        self.protocol.dataReceived(frame)
+        self.protocol.callback = self.received.append
+        sampled = self.protocol._decode_time.count
+        for i in xrange(SAMPLE_EVERY):
+            self.protocol.dataReceived(frame)
+        self.assertEqual(len(self.received), SAMPLE_EVERY + 1)
+        self.assertEqual(self.protocol._decode_time.count, sampled + 1)
+        self.assertEqual(self.protocol._dispatch_time.count, sampled + 1)
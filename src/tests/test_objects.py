@@ -0,0 +1,65 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for entity states decoded on first read
+"""
+
+from twisted.trial import unittest
+
+from game.game import Game
+from game.objects import LazyState, Vector
+from game.renderer import HeadlessRenderer
+
+class CountingDecoder(object):
+    """Decodes by upper-casing the raw value, counting each call"""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, raw):
+        self.calls += 1
+        return raw.upper()
+
+class LazyStateTest(unittest.TestCase):
+    compact = False
+
+    def setUp(self):
+        self.game = Game('test', compact=self.compact,
+                renderer=HeadlessRenderer())
+        self.game.add_entity(1, 'Spider')
+        self.entity = self.game.entities[1]
+        self.decode = CountingDecoder()
+
+    def test_decoded_once(self):
+        self.game.update_entity(1, 'Taunt', LazyState('boo', self.decode))
+        self.assertEqual(self.decode.calls, 0)
+        self.assertEqual(self.entity.get_state('Taunt'), 'BOO')
+        self.assertEqual(self.entity.get_state('Taunt'), 'BOO')
+        self.assertEqual(self.decode.calls, 1)
+        self.assertEqual(self.entity.states['Taunt'], 'BOO')
+
+    def test_update_replaces_cached(self):
+        self.game.update_entity(1, 'Taunt', LazyState('boo', self.decode))
+        self.entity.get_state('Taunt')
+        self.game.update_entity(1, 'Taunt', LazyState('hiss', self.decode))
+        self.assertEqual(self.entity.get_state('Taunt'), 'HISS')
+        self.assertEqual(self.entity.get_state('Taunt'), 'HISS')
+        self.assertEqual(self.decode.calls, 2)
+
+    def test_hot_state_decoded_on_draw(self):
+        # Asset is usually eager, but a lazy one must still draw
+        self.game.update_entity(1, 'Asset', LazyState('s', self.decode))
+        self.game.update_entity(1, 'Position', Vector(3, 4, 0))
+        drawn = list(self.game.visible(0, 0, 10, 10))
+        self.assertEqual([(e.id, asset) for e, pos, asset in drawn],
+                [(1, 'S')])
+        list(self.game.visible(0, 0, 10, 10))
+        self.assertEqual(self.decode.calls, 1)
+
+    def test_missing(self):
+        self.assertIdentical(self.entity.get_state('Taunt'), None)
+        self.assertEqual(self.entity.get_state('Taunt', 7), 7)
+
+class CompactLazyStateTest(LazyStateTest):
+    compact = True
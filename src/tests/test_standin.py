@@ -0,0 +1,188 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+End to end tests of a Client against a local stand-in server
+"""
+
+from twisted.internet import defer, reactor, task
+from twisted.internet.endpoints import TCP4ClientEndpoint
+from twisted.trial import unittest
+
+from client import framing, messages
+from client.client import Client
+from client.decodepool import DecodePool, THREAD
+from client.netclient import GhackClientFactory
+from game.game import Game
+from game.objects import Vector, VectorArray
+from game.renderer import HeadlessRenderer
+from metrics import registry
+from server.standin import StandinFactory, World, ASSETS
+
+# Vectors in a Path state big enough to need more than 64 KB
+LARGE_PATH = 4000
+
+def wait_for(condition, interval=0.01):
+    """A Deferred that fires once condition() is true"""
+    d = defer.Deferred()
+    def check():
+        if condition():
+            poll.stop()
+            d.callback(None)
+    poll = task.LoopingCall(check)
+    poll.start(interval)
+    return d
+
+class StandinTest(unittest.TestCase):
+    timeout = 10
+
+    def start_server(self, framings=framing.FRAMINGS, **world_options):
+        world_options.setdefault('entities', 10)
+        self.factory = StandinFactory(World(**world_options), framings)
+        self.port = reactor.listenTCP(0, self.factory, interface='127.0.0.1')
+        self.addCleanup(self.port.stopListening)
+
+    @defer.inlineCallbacks
+    def log_in(self, framings=framing.FRAMINGS, decode_pool=None):
+        """Connects a Client offering framings, returns once it is in
+        control of its player"""
+        game = Game('test', renderer=HeadlessRenderer())
+        self.client = client = Client(game)
+        client.framings = framings
+        client.decode_pool = decode_pool
+        point = TCP4ClientEndpoint(reactor, '127.0.0.1',
+                self.port.getHost().port)
+        self.protocol = protocol = yield point.connect(GhackClientFactory())
+        self.lost = defer.Deferred()
+        protocol.on_lost = lambda reason: self.lost.callback(None)
+        self.addCleanup(self.disconnect)
+        protocol.callback = client.handle
+        client.conn = protocol
+        client.run()
+        yield wait_for(lambda: game.controlled is not None and
+                game.get_player() is not None)
+        defer.returnValue(game)
+
+    @defer.inlineCallbacks
+    def disconnect(self):
+        if self.client.conn is not None:
+            self.client.disconnect()
+        yield self.lost
+        yield wait_for(lambda: not self.factory.sessions)
+
+    @defer.inlineCallbacks
+    def check_negotiated(self, offered, expected, server=framing.FRAMINGS):
+        self.start_server(server)
+        game = yield self.log_in(offered)
+        self.assertEqual(self.protocol._reader.framing, expected)
+        self.assertEqual(self.protocol.writer.framing, expected)
+        session = self.factory.sessions[0]
+        self.assertEqual(session._reader.framing, expected)
+        self.assertEqual(session.writer.framing, expected)
+        # The whole world and our own player arrived
+        self.assertEqual(sorted(game.entities),
+                sorted(self.factory.world.entities))
+        self.assertEqual(game.controlled, session.player)
+        yield self.check_move(game)
+
+    @defer.inlineCallbacks
+    def check_move(self, game):
+        """A Move reaches the server and its answer comes back"""
+        player = game.entities[game.controlled]
+        start = player.get_state('Position')
+        self.client.send(messages.move(Vector(1, 0, 0)), flush=True)
+        yield wait_for(lambda: player.get_state('Position').x == start.x + 1)
+
+    def test_classic(self):
+        return self.check_negotiated((framing.CLASSIC,), framing.CLASSIC)
+
+    def test_varint(self):
+        return self.check_negotiated((framing.VARINT,), framing.VARINT)
+
+    def test_u32(self):
+        return self.check_negotiated((framing.U32BE,), framing.U32BE)
+
+    def test_batch(self):
+        return self.check_negotiated((framing.BATCH,), framing.BATCH)
+
+    def test_preference(self):
+        # The server picks the first framing offered that it takes
+        return self.check_negotiated((framing.U32BE, framing.VARINT),
+                framing.VARINT, (framing.VARINT, framing.CLASSIC))
+
+    def test_old_server(self):
+        # A server that ignores the offer keeps classic framing
+        return self.check_negotiated(framing.FRAMINGS, framing.CLASSIC,
+                (framing.CLASSIC,))
+
+    @defer.inlineCallbacks
+    def check_large_frame(self, name):
+        self.start_server((name,), entities=1, array_size=LARGE_PATH)
+        game = yield self.log_in((name,))
+        self.assertEqual(self.protocol._reader.framing, name)
+
+        # Server to client: the spider's Path
+        spider = [entity for entity in game.entities.values()
+                if entity.name == 'Spider'][0]
+        path = spider.get_state('Path')
+        self.assertIsInstance(path, VectorArray)
+        self.assertEqual(len(path), LARGE_PATH)
+        world_path = self.factory.world.entities[spider.id][1]['Path']
+        self.assertEqual([(v.x, v.y) for v in path],
+                [(v.x, v.y) for v in world_path])
+
+        # Client to server: the same Path, then a Move that must still be
+        # read correctly after it
+        big = messages.update_state(spider.id, 'Path', world_path)
+        self.assertTrue(len(big.SerializeToString()) > 0xffff)
+        self.client.send(big)
+        yield self.check_move(game)
+
+    def test_large_frame_u32(self):
+        return self.check_large_frame(framing.U32BE)
+
+    def test_large_frame_varint(self):
+        return self.check_large_frame(framing.VARINT)
+
+    def test_large_frame_batch(self):
+        return self.check_large_frame(framing.BATCH)
+
+    @defer.inlineCallbacks
+    def test_decode_pool_metrics(self):
+        # Decoding in a pool still feeds the decode and dispatch histograms
+        pool = DecodePool(1, THREAD, eager_states=Game.eager_states)
+        self.addCleanup(pool.close)
+        self.start_server(entities=50)
+        game = yield self.log_in(decode_pool=pool)
+        # Every read after logging in goes through the pool
+        decode_time = registry.histogram('decode_time')
+        dispatch_time = registry.histogram('dispatch_time')
+        decoded, dispatched = decode_time.count, dispatch_time.count
+        yield wait_for(lambda: decode_time.count > decoded and
+                dispatch_time.count > dispatched)
+        self.assertEqual(sorted(game.entities),
+                sorted(self.factory.world.entities))
+        yield self.check_move(game)
+
+class WorldTest(unittest.TestCase):
+    def test_animated_asset_stays_a_string(self):
+        world = World(entities=20, rates={'Asset': 20.0})
+        updates = [msg.update_state for i in xrange(10)
+                for msg in world.tick()]
+        self.assertTrue(updates)
+        for update in updates:
+            self.assertEqual(update.state_id, 'Asset')
+            self.assertIn(messages.unwrap_state(update.value), ASSETS)
+
+    def test_unknown_rate_rejected(self):
+        self.assertRaises(ValueError, World, rates={'Mood': 1.0})
+
+    def test_players_apart_from_generated_ids(self):
+        quiet = World(entities=5, churn=20.0)
+        joined = World(entities=5, churn=20.0)
+        joined.add_player('p')
+        for i in xrange(5):
+            self.assertEqual(
+                    [msg.SerializeToString() for msg in quiet.tick()],
+                    [msg.SerializeToString() for msg in joined.tick()])
@@ -0,0 +1,48 @@
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Tests for the column-backed StateStore
+"""
+
+from twisted.trial import unittest
+
+from game.objects import Vector
+from game.store import StateStore
+
+class StateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = StateStore(capacity=2)
+        self.view = self.store.view()
+
+    def test_position_read_reuses_vector(self):
+        self.view['Position'] = Vector(1, 2, 3)
+        first = self.view['Position']
+        self.assertIdentical(self.view['Position'], first)
+        self.assertEqual((first.x, first.y, first.z), (1, 2, 3))
+
+    def test_position_update_gives_new_vector(self):
+        self.view['Position'] = Vector(1, 2, 3)
+        first = self.view['Position']
+        self.view['Position'] = Vector(4, 5, 6)
+        second = self.view['Position']
+        self.assertNotIdentical(second, first)
+        self.assertEqual((second.x, second.y), (4, 5))
+        # Whoever kept the old one still sees the old position
+        self.assertEqual((first.x, first.y), (1, 2))
+
+    def test_released_slot_forgets_position(self):
+        self.view['Position'] = Vector(1, 2, 3)
+        self.view['Position']
+        self.store.release(self.view)
+        view = self.store.view()
+        self.assertNotIn('Position', view)
+        view['Position'] = Vector(7, 8, 9)
+        self.assertEqual(view['Position'].x, 7)
+
+    def test_growth_keeps_positions(self):
+        views = [self.view] + [self.store.view() for i in xrange(10)]
+        for i, view in enumerate(views):
+            view['Position'] = Vector(i, 0, 0)
+        self.assertEqual([view['Position'].x for view in views], range(11))
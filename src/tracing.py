@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+# Copyright 2010, 2011 The ghack Authors. All rights reserved.
+# Use of this source code is governed by the GNU General Public License
+# version 3 (or any later version). See the file COPYING for details.
+
+"""
+Opt-in span tracing, exported in the Chrome trace event format that
+chrome://tracing and Perfetto load.
+
+Nothing is traced until instrument() is called: it wraps the methods in
+SPANS so each call records a span, and leaves them untouched otherwise,
+so a normal run pays nothing. Spans nest by time, so a frame shows the
+tick or dataReceived call with parsing, handlers and drawing inside it.
+"""
+
+import json
+import os
+import time
+import thread
+from functools import wraps
+
+# (module, class, method, span name) for every traced stage
+SPANS = [
+        ('gameloop', 'GameLoop', 'tick', 'tick'),
+        ('gameloop', 'GameLoop', 'on_input', 'input'),
+        ('gameloop', 'GameLoop', '_render', 'render'),
+        ('client.netclient', 'GhackProtocol', 'dataReceived', 'dataReceived'),
+        ('client.netclient', 'GhackProtocol', 'get_message', 'parse'),
+        ('client.netclient', 'GhackProtocol', 'flush', 'flush'),
+        ('client.client', 'Handler', 'handle_msg', 'handler'),
+        ('client.client', 'GameHandler', 'handle_decoded', 'handle_decoded'),
+        ('client.decodepool', 'DecodeStream', '_finished', 'decoded'),
+        ('client.coalesce', 'UpdateCoalescer', 'flush', 'apply_updates'),
+        ('game.game', 'Game', 'redraw', 'redraw'),
+        ('game.cursesrenderer', 'CursesRenderer', 'doupdate', 'doupdate'),
+    ]
+
+# Spans kept at most; later ones are counted and dropped
+LIMIT = 1000000
+
+class Tracer(object):
+    """Collects (name, start, end, thread) spans in memory"""
+    def __init__(self, limit=LIMIT, clock=time.time):
+        self.limit = limit
+        self.clock = clock
+        self.spans = []
+        self.dropped = 0
+
+    def traced(self, function, name):
+        """Wraps function so every call records a span called name"""
+        clock = self.clock
+        spans = self.spans
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if len(spans) < self.limit:
+                    spans.append((name, start, clock(), thread.get_ident()))
+                else:
+                    self.dropped += 1
+        return wrapper
+
+    def events(self):
+        """The spans as trace event dicts, times in microseconds"""
+        pid = os.getpid()
+        return [{'name': name, 'cat': 'ghack', 'ph': 'X',
+                 'ts': start * 1e6, 'dur': (end - start) * 1e6,
+                 'pid': pid, 'tid': tid}
+                for name, start, end, tid in self.spans]
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events(),
+                       'displayTimeUnit': 'ms',
+                       'otherData': {'dropped': self.dropped}}, f)
+
+def instrument(tracer, spans=SPANS):
+    """Wraps every method in spans, importing their modules as needed"""
+    for module, cls, method, name in spans:
+        cls = getattr(__import__(module, fromlist=[cls]), cls)
+        setattr(cls, method, tracer.traced(cls.__dict__[method], name))